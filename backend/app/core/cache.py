@@ -0,0 +1,81 @@
+"""Small in-process TTL cache with tag invalidation.
+
+Entries expire after `ttl` seconds and the least recently used ones are
+evicted past `max_entries`. Each entry can carry tags (e.g. the user ids
+it depends on) and `invalidate(tag)` drops every entry with that tag, so
+writes can clear exactly what they change.
+
+Per process: with several workers, another worker's write only shows up
+here once the entry expires, which is what the short TTL bounds.
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Iterable, Optional, Set, Tuple
+
+from app.core.config import settings
+from app.core.metrics import cache_requests
+
+_MISSING = object()
+
+
+class TTLCache:
+    def __init__(self, name: str, ttl: float, max_entries: int = 10_000):
+        self.name = name
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any, Tuple[Hashable, ...]]]" = OrderedDict()
+        self._tags: Dict[Hashable, Set[Hashable]] = {}
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key, _MISSING)
+            if entry is not _MISSING and entry[0] > now:
+                self._entries.move_to_end(key)
+                cache_requests.inc(cache=self.name, result="hit")
+                return entry[1]
+            if entry is not _MISSING:
+                self._drop(key)
+        cache_requests.inc(cache=self.name, result="miss")
+        return default
+
+    def set(self, key: Hashable, value: Any, tags: Iterable[Hashable] = ()) -> None:
+        if self.ttl <= 0:
+            return
+        tags = tuple(tags)
+        with self._lock:
+            self._drop(key)
+            self._entries[key] = (time.monotonic() + self.ttl, value, tags)
+            for tag in tags:
+                self._tags.setdefault(tag, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                self._drop(next(iter(self._entries)))
+
+    def invalidate(self, *tags: Optional[Hashable]) -> None:
+        with self._lock:
+            for tag in tags:
+                for key in self._tags.pop(tag, ()):
+                    self._drop(key)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._tags.clear()
+
+    def _drop(self, key: Hashable) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        for tag in entry[2]:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+
+# Profiles (GET /users/me, GET /users/{id}), tagged with the profile's user id.
+# Invalidated by profile updates, follows/unfollows and changes to the user's posts.
+profile_cache = TTLCache("profile", settings.PROFILE_CACHE_TTL_SECONDS)
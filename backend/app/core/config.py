@@ -9,18 +9,23 @@ class Settings(BaseSettings):
         extra="ignore",
     )
 
-    # Neo4j
-    NEO4J_URI: str
+    # Storage backend: "neo4j" (default) or "memory" for offline tests/benchmarks
+    STORAGE_BACKEND: str = "neo4j"
+
+    # Neo4j (required when STORAGE_BACKEND=neo4j)
+    NEO4J_URI: Optional[str] = None
     NEO4J_USER: Optional[str] = None
     NEO4J_USERNAME: Optional[str] = None
-    NEO4J_PASSWORD: str
+    NEO4J_PASSWORD: Optional[str] = None
     NEO4J_DATABASE: str = "neo4j"
 
     # JWT
     JWT_SECRET: Optional[str] = None
     JWT_SECRET_KEY: Optional[str] = None
     JWT_ALGORITHM: str = "HS256"
-    ACCESS_TOKEN_EXPIRE_MINUTES: int = 60
+    ACCESS_TOKEN_EXPIRE_MINUTES: int = 15
+    REFRESH_TOKEN_EXPIRE_DAYS: int = 14
+    VERIFICATION_TOKEN_EXPIRE_HOURS: int = 48
     
     @property
     def jwt_secret_value(self) -> str:
@@ -39,6 +44,82 @@ class Settings(BaseSettings):
     # Frontend origin for CORS
     FRONTEND_ORIGIN: Optional[str] = None
 
+    # Instrumentation
+    SERVER_TIMING_ENABLED: bool = True
+    METRICS_TOKEN: Optional[str] = None
+
+    # Slow-query log: threshold (0 disables), PROFILE sampling rate, ring buffer size
+    SLOW_QUERY_MS: int = 500
+    SLOW_QUERY_PROFILE_SAMPLE_RATE: float = 0.2
+    SLOW_QUERY_BUFFER_SIZE: int = 100
+
+    # Background jobs: rows per delete transaction, lease before a stalled job
+    # is picked up again, idle poll interval, attempts before a job is failed
+    JOB_BATCH_SIZE: int = 1000
+    JOB_LEASE_SECONDS: float = 300.0
+    JOB_POLL_SECONDS: float = 10.0
+    JOB_MAX_ATTEMPTS: int = 3
+
+    # People you may know: stored per user, candidates scored per refresh,
+    # followers re-queued when someone's follows change, refreshes per worker round
+    RECS_PER_USER: int = 50
+    RECS_CANDIDATES: int = 500
+    RECS_FANOUT: int = 1000
+    RECS_BATCH_SIZE: int = 50
+    RECS_POLL_SECONDS: float = 30.0
+
+    # Neo4j message storage: chain each conversation's messages in bucket nodes
+    # of at most MESSAGE_BUCKET_SIZE (run `scripts.migrate message_buckets` first)
+    MESSAGE_BUCKETS: bool = False
+    MESSAGE_BUCKET_SIZE: int = 200
+
+    # Most user ids accepted by POST /users/relationships
+    RELATIONSHIP_BATCH_MAX: int = 100
+
+    # Profile cache lifetime (0 disables); bounds staleness across workers
+    PROFILE_CACHE_TTL_SECONDS: float = 15.0
+
+    # User typeahead: index hits ranked per query (deeper pages come from these)
+    USER_SEARCH_CANDIDATES: int = 200
+    # Post search: index hits ranked per query, age at which relevance is halved,
+    # weight of a comment match relative to a match in the post itself
+    POST_SEARCH_CANDIDATES: int = 500
+    POST_SEARCH_RECENCY_DAYS: float = 30.0
+    POST_SEARCH_COMMENT_WEIGHT: float = 0.5
+
+    # Password hashing pool: worker processes, max queued+running jobs before 503
+    HASH_WORKERS: int = 2
+    HASH_MAX_PENDING: int = 32
+    HASH_RETRY_AFTER_SECONDS: int = 2
+
+    # Login throttling: failures allowed per window, then exponential backoff blocks
+    LOGIN_RATE_LIMIT_ENABLED: bool = True
+    LOGIN_MAX_FAILURES_PER_IP: int = 20
+    LOGIN_MAX_FAILURES_PER_USERNAME: int = 5
+    LOGIN_WINDOW_SECONDS: int = 300
+    LOGIN_BACKOFF_BASE_SECONDS: int = 30
+    LOGIN_BACKOFF_MAX_SECONDS: int = 3600
+    # Take the client IP from X-Forwarded-For (only behind a trusted proxy)
+    TRUST_FORWARDED_FOR: bool = False
+
+    # Email: delivery via the outbox worker (app.services.email_service)
+    EMAIL_TRANSPORT: str = "sendgrid"  # sendgrid | smtp | file
+    SENDGRID_API_KEY: Optional[str] = None
+    MAIL_FROM: str = "mazeeda.media@gmail.com"
+    BASE_URL: str = "https://socapp-backend.onrender.com"
+    SMTP_HOST: str = "localhost"
+    SMTP_PORT: int = 1025
+    SMTP_USER: Optional[str] = None
+    SMTP_PASSWORD: Optional[str] = None
+    SMTP_STARTTLS: bool = False
+    EMAIL_FILE_DIR: str = "outbox"
+    EMAIL_BATCH_SIZE: int = 50
+    EMAIL_CONCURRENCY: int = 4
+    EMAIL_MAX_ATTEMPTS: int = 8
+    EMAIL_RETRY_BASE_SECONDS: int = 30
+    EMAIL_RETRY_MAX_SECONDS: int = 3600
+    EMAIL_POLL_SECONDS: float = 5.0
+
     # Helpers
     @property
     def auth_user(self) -> str:
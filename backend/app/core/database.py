@@ -1,17 +1,74 @@
+from fastapi import HTTPException
 from neo4j import GraphDatabase
+from neo4j.exceptions import SessionExpired, ServiceUnavailable, Neo4jError
 from app.core.config import settings
+from app.core.instrumentation import instrument_session
+from app.core.metrics import neo4j_query_retries, register_pool
 
 class Neo4jConnection:
     def __init__(self):
-        self.driver = GraphDatabase.driver(
-            settings.NEO4J_URI,
-            auth=(settings.auth_user, settings.NEO4J_PASSWORD)
-        )
+        # Created lazily so the in-memory storage backend never needs Neo4j settings
+        self._driver = None
+
+    @property
+    def driver(self):
+        if self._driver is None:
+            if not (settings.NEO4J_URI and settings.auth_user and settings.NEO4J_PASSWORD):
+                raise HTTPException(status_code=500, detail="Neo4j configuration missing: set NEO4J_URI, NEO4J_USER, NEO4J_PASSWORD")
+            self._driver = GraphDatabase.driver(
+                settings.NEO4J_URI,
+                auth=(settings.auth_user, settings.NEO4J_PASSWORD)
+            )
+        return self._driver
+
+    def reset(self):
+        """Drop the driver after a lost connection; the next use reconnects."""
+        drv, self._driver = self._driver, None
+        if drv is not None:
+            try:
+                drv.close()
+            except Exception:
+                pass
 
     def close(self):
-        self.driver.close()
+        if self._driver is not None:
+            self._driver.close()
 
     def get_session(self):
-        return self.driver.session(database=settings.NEO4J_DATABASE)
+        return instrument_session(self.driver.session(database=settings.NEO4J_DATABASE))
 
 db = Neo4jConnection()
+register_pool("main", lambda: db._driver)
+
+
+def _run_with_retry(helper: str, attempts_allowed: int, fn):
+    attempts = 0
+    last_err: Exception | None = None
+    while attempts < attempts_allowed:
+        attempts += 1
+        try:
+            with db.get_session() as session:
+                return fn(session)
+        except (SessionExpired, ServiceUnavailable, OSError) as e:
+            db.reset()
+            last_err = e
+            neo4j_query_retries.inc(helper=helper)
+            continue
+        except Neo4jError as e:
+            raise HTTPException(status_code=500, detail=f"Neo4j error: {e.message}")
+        except HTTPException:
+            raise
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Database error: {e}")
+    raise HTTPException(status_code=500, detail=f"Database connection error: {last_err}")
+
+
+def run_query(cypher: str, **params):
+    """Execute a Cypher query and return a MATERIALIZED list of records.
+    Avoids using Result outside session to prevent 'result has been consumed'."""
+    return _run_with_retry("run_query", 3, lambda session: list(session.run(cypher, **params)))
+
+
+def run_single(cypher: str, **params):
+    """Execute a Cypher query and return a SINGLE record, consumed within the session."""
+    return _run_with_retry("run_single", 2, lambda session: session.run(cypher, **params).single())
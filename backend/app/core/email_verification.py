@@ -1,32 +1,28 @@
 # email_verification.py
-import os
 import logging
-import secrets
-from sendgrid import SendGridAPIClient
-from sendgrid.helpers.mail import Mail
+from datetime import datetime, timedelta
+from typing import Tuple
 from dotenv import load_dotenv
+from fastapi import HTTPException
+from jose import ExpiredSignatureError, JWTError, jwt
+
+from app.core.config import settings
+from app.services.email_service import queue_email
 
 load_dotenv()
 logger = logging.getLogger(__name__)
 
-async def send_verification_email(email: str, verification_token: str):
-    try:
-        sg_api_key = os.getenv("SENDGRID_API_KEY")
-        if not sg_api_key:
-            logger.error("❌ SENDGRID_API_KEY not found in environment variables")
-            return False
-
-        # Use deployed backend URL by default
-        base_url = os.getenv("BASE_URL", "https://socapp-backend.onrender.com")
-        verification_url = f"{base_url}/auth/verify-email?token={verification_token}"
 
-        logger.info(f"📧 Sending verification email to: {email}")
+def queue_verification_email(email: str, verification_token: str) -> str:
+    """Put the verification email in the outbox; the outbox worker delivers it.
+    Blocking (one database write), so call it from a sync route or the threadpool."""
+    verification_url = f"{settings.BASE_URL}/auth/verify-email?token={verification_token}"
+    logger.info(f"📧 Queueing verification email to: {email}")
 
-        message = Mail(
-            from_email=os.getenv("MAIL_FROM", "mazeeda.media@gmail.com"),
-            to_emails=email,
-            subject="Verify Your Email Address - CCS Social",
-            html_content=f"""
+    return queue_email(
+        to=email,
+        subject="Verify Your Email Address - CCS Social",
+        html=f"""
             <div style="font-family: Arial, sans-serif; max-width: 600px; margin: 0 auto; padding: 20px;">
                 <h2 style="color: #333;">Welcome to CCS Social! 🎉</h2>
                 <p>Thank you for registering! Please verify your email address to activate your account.</p>
@@ -45,32 +41,39 @@ async def send_verification_email(email: str, verification_token: str):
                 </p>
             </div>
             """,
-            plain_text_content=(
-                f"Welcome to CCS Social!\n\n"
-                f"Thank you for registering! Please verify your email address to activate your account.\n\n"
-                f"Verify your email by clicking this link:\n{verification_url}\n\n"
-                f"If the button doesn't work, copy and paste the above URL into your web browser."
-            )
-        )
+        text=(
+            f"Welcome to CCS Social!\n\n"
+            f"Thank you for registering! Please verify your email address to activate your account.\n\n"
+            f"Verify your email by clicking this link:\n{verification_url}\n\n"
+            f"If the button doesn't work, copy and paste the above URL into your web browser."
+        ),
+    )
+
 
-        sg = SendGridAPIClient(sg_api_key)
-        response = sg.send(message)
+# `purpose` keeps these tokens from being accepted anywhere else (e.g. as access tokens)
+VERIFY_EMAIL_PURPOSE = "verify_email"
 
-        if response.status_code in [200, 202]:
-            logger.info(f"✅ Email accepted for delivery to {email}")
-            return True
-        else:
-            logger.error(f"❌ SendGrid returned status: {response.status_code}")
-            logger.error(f"❌ Response body: {response.body}")
-            return False
 
-    except Exception as e:
-        logger.exception(f"❌ Error sending verification email: {e}")
-        if hasattr(e, "body"):
-            logger.error(f"SendGrid error body: {e.body}")
-        return False
+def generate_verification_token(user_id: str, email: str) -> str:
+    """Signed, time-limited token carrying the user id and the address being verified."""
+    expire = datetime.utcnow() + timedelta(hours=settings.VERIFICATION_TOKEN_EXPIRE_HOURS)
+    claims = {"sub": user_id, "email": email, "purpose": VERIFY_EMAIL_PURPOSE, "exp": expire}
+    return jwt.encode(claims, settings.jwt_secret_value, algorithm=settings.JWT_ALGORITHM)
 
 
-def generate_verification_token() -> str:
-    """Generate a secure token for email verification."""
-    return secrets.token_urlsafe(32)
+def is_signed_token(token: str) -> bool:
+    # Legacy tokens were secrets.token_urlsafe values, which never contain "."
+    return token.count(".") == 2
+
+
+def read_verification_token(token: str) -> Tuple[str, str]:
+    """(user_id, email) from a signed token; 400 if it is invalid or expired."""
+    try:
+        claims = jwt.decode(token, settings.jwt_secret_value, algorithms=[settings.JWT_ALGORITHM])
+    except ExpiredSignatureError:
+        raise HTTPException(status_code=400, detail="Verification link has expired, please request a new one")
+    except JWTError:
+        raise HTTPException(status_code=400, detail="Invalid verification token")
+    if claims.get("purpose") != VERIFY_EMAIL_PURPOSE or not claims.get("sub") or not claims.get("email"):
+        raise HTTPException(status_code=400, detail="Invalid verification token")
+    return claims["sub"], claims["email"]
@@ -0,0 +1,26 @@
+from typing import Dict, List, Optional
+from fastapi import HTTPException
+
+
+def parse_fields(raw: Optional[str], allowed: Dict[str, str]) -> List[str]:
+    """Parse a comma separated `?fields=` value against a projection map.
+
+    Returns every allowed field (in declaration order) when `raw` is empty,
+    so omitting the parameter keeps the full response shape.
+    Unknown field names are rejected with a 400.
+    """
+    requested = {f.strip() for f in (raw or "").split(",") if f.strip()}
+    if not requested:
+        return list(allowed)
+    unknown = requested - set(allowed)
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown fields: {', '.join(sorted(unknown))}. Allowed: {', '.join(allowed)}",
+        )
+    return [f for f in allowed if f in requested]
+
+
+def build_projection(fields: List[str], allowed: Dict[str, str]) -> str:
+    """Build a Cypher RETURN body (`expr AS field, ...`) for the requested fields."""
+    return ",\n       ".join(f"{allowed[f]} AS {f}" for f in fields)
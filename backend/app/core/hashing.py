@@ -0,0 +1,122 @@
+"""Password hashing on a dedicated, bounded process pool.
+
+Argon2/bcrypt are CPU-bound; run on the shared AnyIO threadpool a login
+storm occupies every thread and starves ordinary requests. Here they run
+in HASH_WORKERS separate processes. At most HASH_MAX_PENDING jobs may be
+queued or running; beyond that callers get a 503 with Retry-After
+instead of waiting, so hashing load can't back up into the rest of the API.
+"""
+import asyncio
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Optional, Tuple
+
+from fastapi import HTTPException, status
+from passlib.context import CryptContext
+
+from app.core.config import settings
+from app.core.metrics import password_hash_pending, password_hash_rejections
+
+pwd_context = CryptContext(
+    # Argon2 for new hashes, keep bcrypt to verify existing users
+    schemes=["argon2", "bcrypt"],
+    deprecated="auto",
+)
+
+_lock = threading.Lock()
+_pool: Optional[ProcessPoolExecutor] = None
+_pending = 0
+
+
+# ---- run inside the worker processes ----
+def _hash(password: str) -> str:
+    return pwd_context.hash(password)
+
+
+def _verify_and_update(password: str, hashed: str) -> Tuple[bool, Optional[str]]:
+    # new_hash is set when `hashed` uses a deprecated scheme (bcrypt) or old parameters
+    try:
+        return pwd_context.verify_and_update(password, hashed)
+    except (ValueError, TypeError):
+        # A stored hash passlib can't read, or a backend that rejects it: a
+        # failed login (which the throttle counts), never a 500
+        return False, None
+
+
+# ---- pool management ----
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    with _lock:
+        if _pool is None:
+            # spawn: forking a process that already runs threads/event loops is unsafe
+            _pool = ProcessPoolExecutor(
+                max_workers=settings.HASH_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _pool
+
+
+def start() -> None:
+    """Start the worker processes ahead of the first login."""
+    pool = _get_pool()
+    for _ in range(settings.HASH_WORKERS):
+        pool.submit(int)
+
+
+def shutdown() -> None:
+    global _pool
+    with _lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def pending() -> int:
+    return _pending
+
+
+def _admit() -> None:
+    global _pending
+    with _lock:
+        if _pending >= settings.HASH_MAX_PENDING:
+            password_hash_rejections.inc()
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Too many sign-in requests right now, please retry shortly",
+                headers={"Retry-After": str(settings.HASH_RETRY_AFTER_SECONDS)},
+            )
+        _pending += 1
+
+
+def _release() -> None:
+    global _pending
+    with _lock:
+        _pending -= 1
+
+
+async def _run(fn, *args):
+    _admit()
+    try:
+        loop = asyncio.get_running_loop()
+        try:
+            return await loop.run_in_executor(_get_pool(), fn, *args)
+        except BrokenProcessPool:
+            # A worker died (e.g. OOM-killed); replace the pool and retry once
+            shutdown()
+            return await loop.run_in_executor(_get_pool(), fn, *args)
+    finally:
+        _release()
+
+
+async def hash_password(password: str) -> str:
+    return await _run(_hash, password)
+
+
+async def verify_password(password: str, hashed: str) -> Tuple[bool, Optional[str]]:
+    """Returns (valid, new_hash); new_hash is the Argon2 rehash of a legacy hash to store."""
+    return await _run(_verify_and_update, password, hashed)
+
+
+password_hash_pending.set_callback(pending)
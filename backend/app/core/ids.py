@@ -0,0 +1,58 @@
+"""Time-ordered ids (UUIDv7, RFC 9562) for posts, comments and messages.
+
+The first 48 bits are the Unix time in milliseconds, so the ids sort by
+creation time both as UUIDs and as strings. Within one millisecond a
+12-bit counter keeps the ids from one process increasing. A page cursor
+can therefore be just the id of the last row: `id_time` recovers its
+time even when that row has since been deleted. Rows from before these
+ids have random uuid4 ids, and `id_time` returns None for them.
+
+Rows store the id's own time as their creation time (`new_timed_id`), so
+(created_at, id) order and id order agree.
+"""
+import os
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Optional, Tuple
+
+from app.core.timestamps import format_ts
+
+_lock = threading.Lock()
+_last_ms = 0
+_counter = 0
+
+
+def new_id() -> str:
+    global _last_ms, _counter
+    with _lock:
+        ms = time.time_ns() // 1_000_000
+        if ms > _last_ms:
+            # Random start, with headroom left for the rest of the millisecond
+            _last_ms, _counter = ms, int.from_bytes(os.urandom(2), "big") & 0x3FF
+        else:
+            # Same millisecond (or the clock stepped back): keep counting
+            _counter += 1
+            if _counter > 0xFFF:
+                _last_ms, _counter = _last_ms + 1, 0
+        ms, counter = _last_ms, _counter
+    rand = int.from_bytes(os.urandom(8), "big") & ((1 << 62) - 1)
+    return str(uuid.UUID(int=(ms << 80) | (0x7 << 76) | (counter << 64) | (0b10 << 62) | rand))
+
+
+def new_timed_id() -> Tuple[str, str]:
+    """A new id and its creation time as an app.core.timestamps string."""
+    value = new_id()
+    return value, format_ts(id_time(value))
+
+
+def id_time(value: str) -> Optional[datetime]:
+    """Creation time embedded in a `new_id` id; None for other ids."""
+    try:
+        u = uuid.UUID(value)
+    except (TypeError, ValueError, AttributeError):
+        return None
+    if u.version != 7:
+        return None
+    return datetime.fromtimestamp((u.int >> 80) / 1000, tz=timezone.utc)
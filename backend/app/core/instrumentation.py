@@ -0,0 +1,188 @@
+"""Request-scoped database instrumentation.
+
+Every Neo4j session handed out by the app is wrapped so that each `run`
+is counted and timed against the current request. The HTTP middleware
+creates the per-request stats, then reports them as a `Server-Timing`
+header and one structured log line.
+"""
+import logging
+import time
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, List, Optional
+
+from fastapi import Request
+
+from app.core.config import settings
+
+logger = logging.getLogger("app.requests")
+
+
+class RequestStats:
+    """Mutable counters shared by everything running inside one request."""
+
+    __slots__ = ("queries", "db_time", "rows")
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.rows = 0
+
+
+_current_stats: ContextVar[Optional[RequestStats]] = ContextVar("request_db_stats", default=None)
+
+
+def current_stats() -> Optional[RequestStats]:
+    return _current_stats.get()
+
+
+QueryListener = Callable[[str, Dict[str, Any], float, int], None]
+_query_listeners: List[QueryListener] = []
+
+
+def add_query_listener(listener: QueryListener) -> None:
+    """Register `listener(query, params, elapsed_seconds, rows)`, called once per finished query."""
+    _query_listeners.append(listener)
+
+
+class InstrumentedResult:
+    """Proxy around a neo4j Result that adds fetch time and row counts."""
+
+    def __init__(self, result, query: str, params: Dict[str, Any], elapsed: float, stats: Optional[RequestStats]):
+        self._result = result
+        self._query = query
+        self._params = params
+        self._elapsed = elapsed
+        self._rows = 0
+        self._stats = stats
+        self._finished = False
+
+    def _add(self, elapsed: float, rows: int = 0):
+        self._elapsed += elapsed
+        self._rows += rows
+        if self._stats is not None:
+            self._stats.db_time += elapsed
+            self._stats.rows += rows
+
+    def _finish(self):
+        if self._finished:
+            return
+        self._finished = True
+        for listener in _query_listeners:
+            try:
+                listener(self._query, self._params, self._elapsed, self._rows)
+            except Exception:
+                logger.exception("Query listener failed")
+
+    def __iter__(self):
+        it = iter(self._result)
+        while True:
+            start = time.perf_counter()
+            try:
+                record = next(it)
+            except StopIteration:
+                self._add(time.perf_counter() - start)
+                self._finish()
+                return
+            self._add(time.perf_counter() - start, 1)
+            yield record
+
+    def single(self, *args, **kwargs):
+        start = time.perf_counter()
+        record = None
+        try:
+            record = self._result.single(*args, **kwargs)
+        finally:
+            self._add(time.perf_counter() - start, 1 if record is not None else 0)
+            self._finish()
+        return record
+
+    def consume(self):
+        start = time.perf_counter()
+        try:
+            return self._result.consume()
+        finally:
+            self._add(time.perf_counter() - start)
+            self._finish()
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._result, name)
+
+
+class InstrumentedSession:
+    """Proxy around a neo4j Session that records every `run` call."""
+
+    def __init__(self, session):
+        self._session = session
+        self._pending: Optional[InstrumentedResult] = None
+
+    def __enter__(self):
+        self._session.__enter__()
+        return self
+
+    def __exit__(self, *exc):
+        try:
+            return self._session.__exit__(*exc)
+        finally:
+            self._finish_pending()
+
+    def _finish_pending(self):
+        # Results that were never read are discarded by the driver on the
+        # next run/close; report them with the time seen so far.
+        if self._pending is not None:
+            self._pending._finish()
+            self._pending = None
+
+    def run(self, query, parameters=None, **kwargs):
+        self._finish_pending()
+        stats = _current_stats.get()
+        start = time.perf_counter()
+        result = self._session.run(query, parameters, **kwargs)
+        elapsed = time.perf_counter() - start
+        if stats is not None:
+            stats.queries += 1
+            stats.db_time += elapsed
+        self._pending = InstrumentedResult(result, str(query), {**(parameters or {}), **kwargs}, elapsed, stats)
+        return self._pending
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._session, name)
+
+
+def instrument_session(session) -> InstrumentedSession:
+    return InstrumentedSession(session)
+
+
+def route_template(request: Request) -> str:
+    """Return the matched route path (e.g. `/users/{user_id}`), falling back to the raw path."""
+    route = request.scope.get("route")
+    return getattr(route, "path", None) or request.url.path
+
+
+async def db_timing_middleware(request: Request, call_next):
+    stats = RequestStats()
+    token = _current_stats.set(stats)
+    start = time.perf_counter()
+    try:
+        response = await call_next(request)
+    finally:
+        _current_stats.reset(token)
+    total_ms = (time.perf_counter() - start) * 1000
+    db_ms = stats.db_time * 1000
+
+    if settings.SERVER_TIMING_ENABLED:
+        response.headers["Server-Timing"] = (
+            f'db;dur={db_ms:.1f};desc="{stats.queries} queries, {stats.rows} rows", '
+            f"app;dur={max(total_ms - db_ms, 0.0):.1f}, "
+            f"total;dur={total_ms:.1f}"
+        )
+    logger.info(
+        "request method=%s route=%s status=%s duration_ms=%.1f db_queries=%d db_ms=%.1f db_rows=%d",
+        request.method,
+        route_template(request),
+        response.status_code,
+        total_ms,
+        stats.queries,
+        db_ms,
+        stats.rows,
+    )
+    return response
@@ -0,0 +1,320 @@
+"""Minimal Prometheus-style metrics registry and `/metrics` rendering.
+
+Kept dependency-free on purpose: counters, gauges and histograms with
+labels, rendered in the Prometheus text exposition format. Metrics are
+per process; when running several uvicorn workers, scrape each one.
+"""
+import hashlib
+import re
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from fastapi import Request
+from starlette.routing import Mount
+
+from app.core.instrumentation import add_query_listener
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Iterable[str], values: Iterable[str], extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        return tuple(str(labels.get(n, "")) for n in self.labelnames)
+
+    def samples(self) -> List[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self.samples())
+        return "\n".join(lines)
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return [f"{self.name}{_labels(self.labelnames, k)} {v}" for k, v in items]
+
+
+class Gauge(_Metric):
+    """Gauge with inc/dec/set, or computed at scrape time via `callback`.
+
+    A callback returns either a number or a list of (label values, number).
+    """
+    kind = "gauge"
+
+    def __init__(self, *args, callback: Optional[Callable] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[LabelValues, float] = {}
+        self._callback = callback
+
+    def set_callback(self, callback: Callable) -> None:
+        self._callback = callback
+
+    def set(self, value: float, **labels: str) -> None:
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels: str) -> None:
+        self.inc(-amount, **labels)
+
+    def samples(self) -> List[str]:
+        if self._callback is not None:
+            try:
+                value = self._callback()
+            except Exception:
+                return []
+            items = value if isinstance(value, list) else [((), value)]
+        else:
+            with self._lock:
+                items = list(self._values.items())
+        return [f"{self.name}{_labels(self.labelnames, k)} {v}" for k, v in items]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, *args, buckets: Iterable[float] = DEFAULT_BUCKETS, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.buckets = tuple(sorted(buckets))
+        # label values -> [bucket counts..., sum, count]
+        self._values: Dict[LabelValues, List[float]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [0.0] * (len(self.buckets) + 2)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[i] += 1
+            state[-2] += value
+            state[-1] += 1
+
+    def time(self, **labels: str):
+        return _Timer(self, labels)
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            items = [(k, list(v)) for k, v in self._values.items()]
+        lines = []
+        for key, state in items:
+            for i, bound in enumerate(self.buckets):
+                le = 'le="%s"' % bound
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, key, le)} {state[i]}")
+            inf = 'le="+Inf"'
+            lines.append(f"{self.name}_bucket{_labels(self.labelnames, key, inf)} {state[-1]}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, key)} {state[-2]}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, key)} {state[-1]}")
+        return lines
+
+
+class _Timer:
+    def __init__(self, histogram: Histogram, labels: Dict[str, str]):
+        self._histogram = histogram
+        self._labels = labels
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self._histogram.observe(time.perf_counter() - self._start, **self._labels)
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        return "\n".join(m.render() for m in self._metrics) + "\n"
+
+
+registry = Registry()
+
+# ---- HTTP ----
+http_requests_total = registry.register(Counter(
+    "http_requests_total", "HTTP requests by route and status.", ["method", "route", "status"]))
+http_request_duration = registry.register(Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route.", ["method", "route"]))
+http_requests_in_flight = registry.register(Gauge(
+    "http_requests_in_flight", "HTTP requests currently being served."))
+
+# ---- Neo4j ----
+neo4j_query_duration = registry.register(Histogram(
+    "neo4j_query_duration_seconds", "Cypher query time (run + fetch) by query name.", ["query"]))
+neo4j_query_rows = registry.register(Counter(
+    "neo4j_query_rows_total", "Rows returned by query name.", ["query"]))
+neo4j_query_retries = registry.register(Counter(
+    "neo4j_query_retries_total", "Retries after a lost connection, by helper.", ["helper"]))
+
+_pools: Dict[str, Callable] = {}
+
+
+def register_pool(name: str, get_driver: Callable) -> None:
+    """Expose connection pool usage of the driver returned by `get_driver()`."""
+    _pools[name] = get_driver
+
+
+def _pool_samples():
+    # Reads driver internals (neo4j 5.x); any shape change just yields no samples.
+    out = []
+    for name, get_driver in _pools.items():
+        try:
+            driver = get_driver()
+            pool = getattr(driver, "_pool", None) if driver is not None else None
+            if pool is None:
+                continue
+            conns = [c for dq in list(pool.connections.values()) for c in list(dq)]
+            in_use = sum(1 for c in conns if getattr(c, "in_use", False))
+            out.append(((name, "in_use"), in_use))
+            out.append(((name, "idle"), len(conns) - in_use))
+            out.append(((name, "max"), pool.pool_config.max_connection_pool_size))
+        except Exception:
+            continue
+    return out
+
+
+neo4j_pool_connections = registry.register(Gauge(
+    "neo4j_pool_connections", "Neo4j driver pool connections by state.", ["pool", "state"],
+    callback=_pool_samples))
+
+# ---- Socket.IO ----
+socketio_connected_clients = registry.register(Gauge(
+    "socketio_connected_clients", "Connected Socket.IO clients."))
+socketio_emit_duration = registry.register(Histogram(
+    "socketio_emit_duration_seconds", "Socket.IO emit latency by event.", ["event"]))
+
+
+# ---- Password hashing ----
+password_hash_pending = registry.register(Gauge(
+    "password_hash_pending", "Password hash/verify jobs queued or running in the hashing pool."))
+password_hash_rejections = registry.register(Counter(
+    "password_hash_rejections_total", "Hash/verify jobs rejected with 503 because the pool queue was full."))
+
+login_throttled = registry.register(Counter(
+    "login_throttled_total", "Login attempts rejected with 429, by the limit that was hit.", ["scope"]))
+
+
+# ---- Email ----
+email_outbox_results = registry.register(Counter(
+    "email_outbox_results_total", "Outbox delivery attempts by result (sent, retry, dead).", ["result"]))
+
+
+# ---- Background jobs ----
+jobs_finished = registry.register(Counter(
+    "jobs_finished_total", "Background jobs finished, by kind and status (succeeded, failed).", ["kind", "status"]))
+job_attempt_failures = registry.register(Counter(
+    "job_attempt_failures_total", "Job attempts that raised and were requeued or failed, by kind.", ["kind"]))
+
+
+# ---- Recommendations ----
+recommendation_refreshes = registry.register(Counter(
+    "recommendation_refreshes_total", "People-you-may-know lists recomputed, by trigger (queued, on_demand).",
+    ["trigger"]))
+
+
+# ---- Caches ----
+cache_requests = registry.register(Counter(
+    "cache_requests_total", "In-process cache lookups by cache and result (hit, miss).", ["cache", "result"]))
+
+
+def register_rooms_callback(callback: Callable[[], float]) -> None:
+    registry.register(Gauge("socketio_rooms", "Active Socket.IO conversation rooms.", callback=callback))
+
+
+# ---- Query naming ----
+_NAME_RE = re.compile(r"^\s*//\s*([\w.:-]+)")
+
+
+def query_name(cypher: str) -> str:
+    """Name used to key query metrics.
+
+    Queries can name themselves with a leading `// name` comment; others
+    get a stable name from their first clause and a short hash.
+    """
+    m = _NAME_RE.match(cypher)
+    if m:
+        return m.group(1)
+    normalized = " ".join(cypher.split())
+    first = normalized.split(" ", 1)[0].lower() if normalized else "query"
+    return f"{first}_{hashlib.sha1(normalized.encode()).hexdigest()[:8]}"
+
+
+def _observe_query(query: str, params: dict, elapsed: float, rows: int) -> None:
+    name = query_name(query)
+    neo4j_query_duration.observe(elapsed, query=name)
+    neo4j_query_rows.inc(rows, query=name)
+
+
+add_query_listener(_observe_query)
+
+
+def _route_label(request: Request) -> str:
+    route = request.scope.get("route")
+    if route is not None:
+        return route.path
+    for r in request.app.router.routes:
+        if isinstance(r, Mount) and request.url.path.startswith(r.path):
+            return r.path
+    # Unmatched paths are collapsed to keep label cardinality bounded
+    return "unmatched"
+
+
+async def metrics_middleware(request: Request, call_next):
+    http_requests_in_flight.inc()
+    start = time.perf_counter()
+    status = "500"
+    try:
+        response = await call_next(request)
+        status = str(response.status_code)
+        return response
+    finally:
+        http_requests_in_flight.dec()
+        route = _route_label(request)
+        http_request_duration.observe(time.perf_counter() - start, method=request.method, route=route)
+        http_requests_total.inc(method=request.method, route=route, status=status)
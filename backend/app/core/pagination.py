@@ -0,0 +1,37 @@
+import base64
+import json
+import math
+from typing import Any, List, Optional, Sequence
+
+from fastapi import HTTPException
+
+
+def encode_cursor(*values: Any) -> str:
+    """Opaque keyset cursor for the sort key of the last row on a page."""
+    raw = json.dumps(list(values), separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def _is_kind(value: Any, kind: type) -> bool:
+    if kind is float:
+        # Any JSON number; bool is an int subclass but not a sort key
+        return isinstance(value, (int, float)) and not isinstance(value, bool) and math.isfinite(value)
+    return isinstance(value, kind)
+
+
+def decode_cursor(cursor: Optional[str], size: int,
+                  kinds: Optional[Sequence[type]] = None) -> Optional[List[Any]]:
+    """Inverse of `encode_cursor`; None when there is no cursor, 400 when it is
+    malformed. `kinds` (float for any number) checks values that are used
+    as they are, rather than looked up or parsed by the repository."""
+    if not cursor:
+        return None
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except ValueError:
+        values = None
+    if not isinstance(values, list) or len(values) != size:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if kinds and not all(_is_kind(v, k) for v, k in zip(values, kinds)):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return values
@@ -0,0 +1,22 @@
+"""Scoring for "people you may know".
+
+A candidate is someone the user doesn't follow yet who is followed by
+people the user follows (friends of friends, `mutuals` of them) or who is
+in the same `program`. Mutuals dominate with diminishing returns, a shared
+program is worth about as much as two mutuals, and follower count breaks
+ties. The memory backend calls `recommendation_score`; the Neo4j query
+computes the same formula in Cypher.
+"""
+import math
+
+MUTUAL_WEIGHT = 10.0
+PROGRAM_WEIGHT = 10.0
+
+
+def recommendation_score(mutuals: int, same_program: bool, followers: int) -> float:
+    return round(
+        MUTUAL_WEIGHT * math.log(1 + mutuals)
+        + (PROGRAM_WEIGHT if same_program else 0.0)
+        + math.log(1 + followers),
+        6,
+    )
@@ -0,0 +1,137 @@
+"""Login throttling: sliding-window failure counts per IP and per username.
+
+A key that reaches its failure limit inside the window is blocked, and
+each further block of the same key doubles in length (up to a cap). The
+check runs before any database lookup or password hash, so credential
+stuffing can't turn into hashing load.
+
+State lives in a `LimiterStore`. `MemoryLimiterStore` is per process;
+with several workers, plug in a shared store (e.g. Redis sorted sets for
+the windows and expiring keys for blocks) by implementing the same
+methods and assigning it to `login_limiter.store`.
+"""
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import deque
+from typing import Deque, Dict, Optional, Tuple
+
+from fastapi import HTTPException, Request, status
+
+from app.core.config import settings
+from app.core.metrics import login_throttled
+
+
+class LimiterStore(ABC):
+    @abstractmethod
+    def add_hit(self, key: str, now: float, window: float) -> int:
+        """Record a hit at `now` and return the hits within the last `window` seconds."""
+
+    @abstractmethod
+    def get_block(self, key: str) -> Tuple[float, int]:
+        """(blocked_until, strikes) for the key; (0, 0) when unknown."""
+
+    @abstractmethod
+    def set_block(self, key: str, until: float, strikes: int, ttl: float) -> None:
+        """Store a block; the whole entry (strikes included) may be forgotten after `ttl`."""
+
+    @abstractmethod
+    def reset(self, key: str) -> None:
+        """Forget hits, block and strikes for the key."""
+
+
+class MemoryLimiterStore(LimiterStore):
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._hits: Dict[str, Deque[float]] = {}
+        self._blocks: Dict[str, Tuple[float, int, float]] = {}
+
+    def add_hit(self, key, now, window):
+        with self._lock:
+            hits = self._hits.setdefault(key, deque())
+            hits.append(now)
+            while hits and hits[0] <= now - window:
+                hits.popleft()
+            self._prune(now, window)
+            return len(hits)
+
+    def get_block(self, key):
+        with self._lock:
+            until, strikes, expires = self._blocks.get(key, (0.0, 0, 0.0))
+            if expires and expires <= time.monotonic():
+                self._blocks.pop(key, None)
+                return 0.0, 0
+            return until, strikes
+
+    def set_block(self, key, until, strikes, ttl):
+        with self._lock:
+            self._blocks[key] = (until, strikes, time.monotonic() + ttl)
+            self._hits.pop(key, None)
+
+    def reset(self, key):
+        with self._lock:
+            self._hits.pop(key, None)
+            self._blocks.pop(key, None)
+
+    def _prune(self, now: float, window: float) -> None:
+        # Bound memory under a spray of distinct IPs/usernames
+        if len(self._hits) > 100_000:
+            for k in [k for k, d in self._hits.items() if not d or d[-1] <= now - window]:
+                del self._hits[k]
+
+
+class LoginLimiter:
+    def __init__(self, store: LimiterStore):
+        self.store = store
+
+    def _keys(self, ip: str, username: str):
+        return (
+            ("ip", f"login:ip:{ip}", settings.LOGIN_MAX_FAILURES_PER_IP),
+            ("username", f"login:user:{username.strip().lower()}", settings.LOGIN_MAX_FAILURES_PER_USERNAME),
+        )
+
+    def check(self, ip: str, username: str) -> None:
+        """Raise 429 if the IP or the username is currently blocked."""
+        if not settings.LOGIN_RATE_LIMIT_ENABLED:
+            return
+        now = time.time()
+        for scope, key, _ in self._keys(ip, username):
+            until, _ = self.store.get_block(key)
+            if until > now:
+                login_throttled.inc(scope=scope)
+                raise HTTPException(
+                    status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                    detail="Too many failed login attempts, please try again later",
+                    headers={"Retry-After": str(int(until - now) + 1)},
+                )
+
+    def record_failure(self, ip: str, username: str) -> None:
+        if not settings.LOGIN_RATE_LIMIT_ENABLED:
+            return
+        now = time.time()
+        window = settings.LOGIN_WINDOW_SECONDS
+        for _, key, limit in self._keys(ip, username):
+            if self.store.add_hit(key, now, window) < limit:
+                continue
+            _, strikes = self.store.get_block(key)
+            strikes += 1
+            backoff = min(settings.LOGIN_BACKOFF_MAX_SECONDS,
+                          settings.LOGIN_BACKOFF_BASE_SECONDS * 2 ** (strikes - 1))
+            # Strikes are remembered for a while after the block, so repeat offenders escalate
+            self.store.set_block(key, now + backoff, strikes, ttl=backoff + settings.LOGIN_BACKOFF_MAX_SECONDS)
+
+    def record_success(self, ip: str, username: str) -> None:
+        # Only the account is cleared; an IP spraying many accounts stays counted
+        if settings.LOGIN_RATE_LIMIT_ENABLED:
+            self.store.reset(self._keys(ip, username)[1][1])
+
+
+def client_ip(request: Request) -> str:
+    if settings.TRUST_FORWARDED_FOR:
+        forwarded: Optional[str] = request.headers.get("x-forwarded-for")
+        if forwarded:
+            return forwarded.split(",")[0].strip()
+    return request.client.host if request.client else "unknown"
+
+
+login_limiter = LoginLimiter(MemoryLimiterStore())
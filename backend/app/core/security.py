@@ -1,16 +1,19 @@
+import threading
+import time
 from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+from uuid import uuid4
+
 from jose import jwt, JWTError
-from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from app.core.config import settings
-from app.core.database import db
+from app.core.hashing import pwd_context
+from app.repositories import repos
+
+ACCESS_TOKEN_TYPE = "access"
+REFRESH_TOKEN_TYPE = "refresh"
 
-pwd_context = CryptContext(
-    # Argon2 for new hashes, keep bcrypt to verify existing users
-    schemes=["argon2", "bcrypt"],
-    deprecated="auto",
-)
 
 def create_access_token(data: dict, expires_delta: int | None = None) -> str:
     """
@@ -23,10 +26,163 @@ def create_access_token(data: dict, expires_delta: int | None = None) -> str:
     encoded_jwt = jwt.encode(to_encode, settings.jwt_secret_value, algorithm=settings.JWT_ALGORITHM)
     return encoded_jwt
 
+
+def user_role(user: dict) -> str:
+    return str(user.get("role") or ("admin" if user.get("is_admin") else "student"))
+
+
+def issue_token_pair(user: dict, family: Optional[str] = None) -> dict:
+    """
+    Access token carrying the identity the routes need (id, username, role),
+    plus a refresh token in the same family. A login starts a new family;
+    /auth/refresh passes the family of the token it rotates.
+    """
+    family = family or uuid4().hex
+    access = create_access_token({
+        "sub": user["username"],
+        "id": user["id"],
+        "username": user["username"],
+        "role": user_role(user),
+        "typ": ACCESS_TOKEN_TYPE,
+        "fam": family,
+        "jti": uuid4().hex,
+    })
+    refresh = create_access_token(
+        {"sub": user["id"], "typ": REFRESH_TOKEN_TYPE, "fam": family, "jti": uuid4().hex},
+        expires_delta=settings.REFRESH_TOKEN_EXPIRE_DAYS * 24 * 60,
+    )
+    return {
+        "access_token": access,
+        "token_type": "bearer",
+        "expires_in": settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60,
+        "refresh_token": refresh,
+    }
+
+
+class RevocationList:
+    """
+    Revoked token ids (`jti`) and token families (`fam`), each kept only
+    until the latest expiry of a token it could match, so the set stays
+    small.
+
+    Every revocation is written through to repos.revocations, which
+    outlives restarts and is shared by all processes; /auth/refresh
+    checks there. Access tokens are checked against the in-memory copy
+    only, on every request: it knows this process's revocations since it
+    started, so elsewhere a revoked session's access tokens keep working
+    for at most ACCESS_TOKEN_EXPIRE_MINUTES.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries: Dict[str, float] = {}
+        self._next_prune = 0.0
+
+    def revoke_token(self, jti: str, expires_at: float) -> bool:
+        """Revoke a token id; False if it already was (i.e. the token is being
+        reused), by any process since any restart."""
+        key = f"jti:{jti}"
+        self._add(key, expires_at)
+        return repos.revocations.add(key, expires_at)
+
+    def revoke_family(self, family: str) -> None:
+        # Refresh tokens are the longest lived members of a family
+        key = f"fam:{family}"
+        expires_at = time.time() + settings.REFRESH_TOKEN_EXPIRE_DAYS * 86400
+        self._add(key, expires_at)
+        repos.revocations.add(key, expires_at)
+
+    def is_revoked(self, payload: dict) -> bool:
+        """In-memory check, cheap enough for every request."""
+        with self._lock:
+            return any(k in self._entries for k in self._keys(payload))
+
+    def is_revoked_persistent(self, payload: dict) -> bool:
+        """Also ask repos.revocations: what a refresh token is checked against."""
+        return self.is_revoked(payload) or repos.revocations.any_revoked(self._keys(payload), time.time())
+
+    @staticmethod
+    def _keys(payload: dict) -> List[str]:
+        return [f"jti:{payload.get('jti')}", f"fam:{payload.get('fam')}"]
+
+    def _add(self, key: str, expires_at: float) -> bool:
+        now = time.time()
+        with self._lock:
+            prune = now >= self._next_prune
+            if prune:
+                self._entries = {k: exp for k, exp in self._entries.items() if exp > now}
+                self._next_prune = now + 60
+            added = key not in self._entries
+            self._entries[key] = max(expires_at, self._entries.get(key, 0.0))
+        if prune:
+            repos.revocations.prune(now, 1000)
+        return added
+
+
+revocations = RevocationList()
+
+
+def decode_token(token: str, token_type: str, check_revoked: bool = True) -> dict:
+    """Decode and check a token of the given type; raises 401."""
+    credentials_exception = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Could not validate credentials",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+    try:
+        payload = jwt.decode(token, settings.jwt_secret_value, algorithms=[settings.JWT_ALGORITHM])
+    except JWTError:
+        raise credentials_exception
+    # Purpose-bound tokens (e.g. email verification) are never session tokens;
+    # access tokens issued before `typ` existed count as access tokens
+    if payload.get("sub") is None or payload.get("purpose"):
+        raise credentials_exception
+    if payload.get("typ", ACCESS_TOKEN_TYPE) != token_type:
+        raise credentials_exception
+    if check_revoked and revocations.is_revoked(payload):
+        raise credentials_exception
+    return payload
+
+
+def rotate_refresh_token(token: str) -> dict:
+    """
+    Spend a refresh token and return its claims; the caller issues the
+    next pair in the same family. Presenting an already spent token means
+    it leaked (or was replayed), so the whole family is revoked and every
+    token descended from that login stops working.
+    """
+    payload = decode_token(token, REFRESH_TOKEN_TYPE, check_revoked=False)
+    if not payload.get("jti") or not payload.get("fam") or revocations.is_revoked_persistent({"fam": payload["fam"]}):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    if not revocations.revoke_token(payload["jti"], payload["exp"]):
+        revocations.revoke_family(payload["fam"])
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Refresh token reuse detected, please log in again",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return payload
+
+
+def revoke_refresh_token(token: str) -> None:
+    """Log out: revoke the session (token family) a refresh token belongs to."""
+    try:
+        payload = decode_token(token, REFRESH_TOKEN_TYPE, check_revoked=False)
+    except HTTPException:
+        return  # expired or invalid: nothing left to revoke
+    if payload.get("fam"):
+        revocations.revoke_family(payload["fam"])
+
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """
     Verify a plain password against a hashed password.
     Let Passlib handle bcrypt's internal 72-byte limit.
+    Runs inline; request handlers use app.core.hashing instead.
     """
     return pwd_context.verify(plain_password, hashed_password)
 
@@ -39,32 +195,44 @@ def get_password_hash(password: str) -> str:
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
 
+def _load_user(subject: str) -> dict:
+    # Try email first, then fall back to username
+    user = repos.users.get_by_email(subject) or repos.users.get_by_username(subject)
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    user.pop("password", None)  # Remove password for safety
+    return user
+
 def get_current_user(token: str = Depends(oauth2_scheme)) -> dict:
     """
-    Retrieve the current user from a JWT token.
+    Identity of the caller: {id, username, role}, read from the access
+    token without touching the database. Routes that need the full
+    profile use `get_current_user_full`.
     """
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Could not validate credentials",
-        headers={"WWW-Authenticate": "Bearer"},
-    )
-    try:
-        payload = jwt.decode(token, settings.jwt_secret_value, algorithms=[settings.JWT_ALGORITHM])
-        subject = payload.get("sub")
-        if subject is None:
-            raise credentials_exception
-    except JWTError:
-        raise credentials_exception
+    payload = decode_token(token, ACCESS_TOKEN_TYPE)
+    if not payload.get("id"):
+        # Tokens issued before identity claims: look the user up once per request
+        return _load_user(payload["sub"])
+    return {
+        "id": payload["id"],
+        "username": payload.get("username") or payload["sub"],
+        "role": payload.get("role") or "student",
+    }
 
-    with db.get_session() as session:
-        # Try email first
-        record = session.run("MATCH (u:User {email: $sub}) RETURN u", sub=subject).single()
-        if not record:
-            # Fallback to username
-            record = session.run("MATCH (u:User {username: $sub}) RETURN u", sub=subject).single()
-        if not record:
-            raise credentials_exception
-
-        user = dict(record["u"])
-        user.pop("password", None)  # Remove password for safety
-        return user
+def get_current_user_full(current_user: dict = Depends(get_current_user)) -> dict:
+    """
+    The caller's stored user record (without password); one lookup by id.
+    """
+    user = repos.users.get_by_id(current_user["id"])
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    user.pop("password", None)
+    return user
@@ -0,0 +1,141 @@
+"""Slow-query log with sampled PROFILE capture.
+
+Queries slower than SLOW_QUERY_MS are logged with redacted parameters.
+A sample of them is re-planned in a background thread: read-only Cypher
+is run under PROFILE (operator tree with db hits and rows), anything that
+writes is only EXPLAINed so it is never executed twice. Results are kept
+in a ring buffer served by the admin routes.
+"""
+import logging
+import random
+import re
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+from app.core.config import settings
+from app.core.database import db
+from app.core.instrumentation import add_query_listener
+from app.core.metrics import query_name
+from app.core.timestamps import now_iso
+
+logger = logging.getLogger("app.slow_queries")
+
+_WRITE_RE = re.compile(r"\b(CREATE|MERGE|SET|DELETE|REMOVE|DETACH|FOREACH|LOAD\s+CSV)\b", re.IGNORECASE)
+# Don't re-profile the same query more often than this
+_PROFILE_COOLDOWN_SECONDS = 60.0
+
+_lock = threading.Lock()
+_slow_log: deque = deque(maxlen=settings.SLOW_QUERY_BUFFER_SIZE)
+_profiles: deque = deque(maxlen=settings.SLOW_QUERY_BUFFER_SIZE)
+_last_profiled: Dict[str, float] = {}
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="slow-query-profile")
+
+
+def redact_params(params: Dict[str, Any]) -> Dict[str, Any]:
+    """Keep parameter shapes, drop values that could hold user data."""
+    out: Dict[str, Any] = {}
+    for key, value in params.items():
+        if value is None or isinstance(value, (bool, int, float)):
+            out[key] = value
+        elif isinstance(value, str):
+            out[key] = f"<str len={len(value)}>"
+        elif isinstance(value, (list, tuple)):
+            out[key] = f"<list len={len(value)}>"
+        elif isinstance(value, dict):
+            out[key] = f"<map keys={sorted(value)}>"
+        else:
+            out[key] = f"<{type(value).__name__}>"
+    return out
+
+
+def _plan_to_json(plan: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    if not plan:
+        return None
+    args = plan.get("args") or {}
+    return {
+        "operator": plan.get("operatorType"),
+        "db_hits": plan.get("dbHits", args.get("DbHits")),
+        "rows": plan.get("rows", args.get("Rows")),
+        "estimated_rows": args.get("EstimatedRows"),
+        "identifiers": plan.get("identifiers"),
+        "details": args.get("Details"),
+        "children": [_plan_to_json(c) for c in plan.get("children") or []],
+    }
+
+
+def _total_db_hits(node: Optional[Dict[str, Any]]) -> int:
+    if not node:
+        return 0
+    return int(node.get("db_hits") or 0) + sum(_total_db_hits(c) for c in node["children"])
+
+
+def _capture_profile(name: str, query: str, params: Dict[str, Any], elapsed_ms: float) -> None:
+    mode = "EXPLAIN" if _WRITE_RE.search(query) else "PROFILE"
+    try:
+        # Raw driver session: keeps the capture out of request stats and listeners
+        with db.driver.session(database=settings.NEO4J_DATABASE) as session:
+            summary = session.run(f"{mode} {query}", params).consume()
+        plan = _plan_to_json(summary.profile if mode == "PROFILE" else summary.plan)
+    except Exception as e:
+        logger.warning("slow query %s: %s capture failed: %s", name, mode, e)
+        return
+    with _lock:
+        _profiles.append({
+            "query_name": name,
+            "mode": mode,
+            "elapsed_ms": round(elapsed_ms, 1),
+            "total_db_hits": _total_db_hits(plan) if mode == "PROFILE" else None,
+            "captured_at": now_iso(),
+            "query": query,
+            "params": redact_params(params),
+            "plan": plan,
+        })
+
+
+def _on_query(query: str, params: Dict[str, Any], elapsed: float, rows: int) -> None:
+    threshold = settings.SLOW_QUERY_MS
+    elapsed_ms = elapsed * 1000
+    if threshold <= 0 or elapsed_ms < threshold:
+        return
+    name = query_name(query)
+    redacted = redact_params(params)
+    logger.warning("slow query name=%s duration_ms=%.1f rows=%d params=%s", name, elapsed_ms, rows, redacted)
+
+    now = time.monotonic()
+    with _lock:
+        _slow_log.append({
+            "query_name": name,
+            "elapsed_ms": round(elapsed_ms, 1),
+            "rows": rows,
+            "at": now_iso(),
+            "params": redacted,
+        })
+        if random.random() >= settings.SLOW_QUERY_PROFILE_SAMPLE_RATE:
+            return
+        if now - _last_profiled.get(name, float("-inf")) < _PROFILE_COOLDOWN_SECONDS:
+            return
+        _last_profiled[name] = now
+    _executor.submit(_capture_profile, name, query, dict(params), elapsed_ms)
+
+
+def recent_slow_queries() -> List[Dict[str, Any]]:
+    with _lock:
+        return list(reversed(_slow_log))
+
+
+def recent_profiles() -> List[Dict[str, Any]]:
+    with _lock:
+        return list(reversed(_profiles))
+
+
+def clear() -> None:
+    with _lock:
+        _slow_log.clear()
+        _profiles.clear()
+        _last_profiled.clear()
+
+
+add_query_listener(_on_query)
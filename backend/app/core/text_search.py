@@ -0,0 +1,129 @@
+"""Text normalisation shared by the search indexes.
+
+Both backends index the same terms: lower-cased, accent-free runs of
+letters and digits, so "José_Díaz99" is found by "jose", "diaz99" and
+"josediaz". Queries are tokenised the same way.
+
+User typeahead: every query token must match some term by prefix, or,
+for longer tokens, within one edit. Post search: every token must occur,
+the last one as a prefix (it may still be being typed).
+"""
+import html
+import math
+import re
+import unicodedata
+from typing import Iterable, List, Optional
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+
+# Tokens shorter than this only match by prefix (fuzzy short tokens match everything)
+FUZZY_MIN_LENGTH = 4
+
+
+def normalize(text: Optional[str]) -> str:
+    decomposed = unicodedata.normalize("NFKD", text or "")
+    return "".join(c for c in decomposed if not unicodedata.combining(c)).lower()
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    return _TOKEN.findall(normalize(text))
+
+
+def user_search_terms(username: Optional[str], name: Optional[str] = None) -> List[str]:
+    """Index terms for a user; the first is the whole username without separators."""
+    parts = tokenize(username)
+    terms = ["".join(parts)] + parts + tokenize(name)
+    return list(dict.fromkeys(t for t in terms if t))
+
+
+def user_search_text(username: Optional[str], name: Optional[str] = None) -> str:
+    return " ".join(user_search_terms(username, name))
+
+
+def lucene_prefix_query(tokens: Iterable[str]) -> str:
+    """All tokens required; each by prefix, or within one edit when long enough.
+    Tokens are [a-z0-9]+ so nothing needs escaping."""
+    clauses = [f"({t}* OR {t}~1)" if len(t) >= FUZZY_MIN_LENGTH else f"{t}*" for t in tokens]
+    return " AND ".join(clauses)
+
+
+def lucene_all_terms_query(tokens: List[str]) -> str:
+    """All tokens required, the last one as a prefix."""
+    return " AND ".join(tokens[:-1] + [f"{tokens[-1]}*"])
+
+
+def recency_rank(relevance: float, age_seconds: float, recency_days: float) -> float:
+    """Relevance halved at `recency_days` of age, a third at twice that, ...
+    The Neo4j post search query computes the same expression."""
+    return round(relevance / (1 + max(age_seconds, 0.0) / 86400.0 / recency_days), 6)
+
+
+def highlight(text: Optional[str], tokens: List[str], width: int = 160) -> Optional[str]:
+    """HTML-escaped snippet of `text` around the first match, with the
+    matching words wrapped in <mark>; None when nothing matches."""
+    text = text or ""
+    spans = [
+        (m.start(), m.end()) for m in re.finditer(r"\w+", text)
+        if any(part.startswith(t) for part in tokenize(m.group()) for t in tokens)
+    ]
+    if not spans:
+        return None
+    start = max(0, spans[0][0] - width // 4)
+    if start:
+        # Don't cut the first word of the snippet in half
+        space = text.find(" ", start, spans[0][0])
+        start = space + 1 if space != -1 else spans[0][0]
+    end = min(len(text), start + width)
+    if end < len(text):
+        space = text.rfind(" ", spans[0][1], end)
+        end = space if space != -1 else end
+    out, pos = [], start
+    for a, b in spans:
+        if b <= start or a >= end:
+            continue
+        out.append(html.escape(text[pos:a]))
+        out.append(f"<mark>{html.escape(text[a:b])}</mark>")
+        pos = b
+    out.append(html.escape(text[pos:end]))
+    return ("…" if start else "") + "".join(out) + ("…" if end < len(text) else "")
+
+
+def within_one_edit(a: str, b: str) -> bool:
+    """Levenshtein distance <= 1."""
+    if a == b:
+        return True
+    if abs(len(a) - len(b)) > 1:
+        return False
+    if len(a) > len(b):
+        a, b = b, a
+    i = 0
+    while i < len(a) and a[i] == b[i]:
+        i += 1
+    if len(a) == len(b):
+        return a[i + 1:] == b[i + 1:]
+    return a[i:] == b[i + 1:]
+
+
+def term_matches(token: str, term: str) -> bool:
+    if term.startswith(token):
+        return True
+    return len(token) >= FUZZY_MIN_LENGTH and within_one_edit(token, term)
+
+
+def user_match_tier(tokens: List[str], terms: List[str]) -> int:
+    """3: the username is the query, 2: the username starts with it,
+    1: every token prefixes some term, 0: fuzzy match only."""
+    compact = "".join(tokens)
+    if terms and terms[0] == compact:
+        return 3
+    if terms and terms[0].startswith(compact):
+        return 2
+    if all(any(w.startswith(t) for w in terms) for t in tokens):
+        return 1
+    return 0
+
+
+def user_search_rank(tier: int, mutual_count: int, followers_count: int) -> float:
+    """Match quality first, then mutual connections, then popularity.
+    The Neo4j search query computes the same expression."""
+    return round(tier * 100 + 5 * math.log(1 + mutual_count) + math.log(1 + followers_count), 6)
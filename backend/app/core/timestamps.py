@@ -0,0 +1,40 @@
+"""Timestamps: one canonical format for every stored time.
+
+Repositories and the API carry times as `format_ts` strings: UTC,
+ISO-8601 with microseconds and a `Z` (e.g. 2024-03-01T10:00:00.000000Z).
+They are fixed-width, so they also sort like the instants they name. The
+Neo4j repositories store native DATETIME values instead and convert at
+their boundary; `scripts.migrate native_datetimes` converts older string
+values.
+"""
+from datetime import datetime, timezone
+from typing import Optional
+
+
+def utc_now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def format_ts(dt: datetime) -> str:
+    """Canonical string for `dt`; naive datetimes are taken as UTC."""
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+
+
+def now_iso() -> str:
+    return format_ts(utc_now())
+
+
+def parse_ts(value: str) -> datetime:
+    """Aware UTC datetime from an ISO-8601 string, naive (UTC) or with Z/offset.
+    Raises ValueError for anything else."""
+    dt = datetime.fromisoformat(value)
+    if dt.tzinfo is None:
+        return dt.replace(tzinfo=timezone.utc)
+    return dt.astimezone(timezone.utc)
+
+
+def normalize_ts(value: Optional[str]) -> Optional[str]:
+    """`value` in the canonical format (None stays None)."""
+    return None if value is None else format_ts(parse_ts(value))
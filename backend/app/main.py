@@ -1,12 +1,21 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from pydantic import BaseModel, EmailStr
 from app.core.config import settings
 from app.core.cloudinary_config import configure_cloudinary
-from app.routes import auth, users, posts, chat, comments, messages, uploads
+from app.core.instrumentation import db_timing_middleware
+from app.core.metrics import metrics_middleware, registry
+from app.core import slow_queries  # registers the slow-query listener
+from app.routes import auth, users, posts, chat, comments, messages, uploads, admin, jobs
+from app.repositories import repos
+from app.core import hashing
 from app.sockets import socket_app
-#from app.core.email_verification import send_verification_email
+from app.core.email_verification import queue_verification_email
+from app.services.email_service import outbox_worker
+from app.services.jobs import job_worker
+from app.services.recommendations import recommendation_worker
 import os
 import secrets
 
@@ -36,6 +45,11 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# ✅ Per-request DB query counts/timings (Server-Timing header + log line)
+app.middleware("http")(db_timing_middleware)
+# ✅ Route latency / in-flight metrics for /metrics
+app.middleware("http")(metrics_middleware)
+
 # ✅ Ensure uploads directory exists
 UPLOAD_DIR = "uploads"
 os.makedirs(UPLOAD_DIR, exist_ok=True)
@@ -51,10 +65,53 @@ app.include_router(chat.router)
 app.include_router(comments.router)
 app.include_router(messages.router)
 app.include_router(uploads.router, prefix="/api", tags=["uploads"])
+app.include_router(admin.router)
+app.include_router(jobs.router)
 
 # ✅ Mount Socket.IO
 app.mount("/socket.io", socket_app)
 
+# ✅ Constraints/indexes for the configured storage backend
+@app.on_event("startup")
+def ensure_schema():
+    repos.ensure_schema()
+
+# ✅ Password hashing worker processes
+@app.on_event("startup")
+def start_hashing_pool():
+    hashing.start()
+
+@app.on_event("shutdown")
+def stop_hashing_pool():
+    hashing.shutdown()
+
+# ✅ Email outbox worker
+@app.on_event("startup")
+async def start_email_worker():
+    outbox_worker.start()
+
+@app.on_event("shutdown")
+async def stop_email_worker():
+    await outbox_worker.stop()
+
+# ✅ Background job worker (deletions, maintenance)
+@app.on_event("startup")
+async def start_job_worker():
+    job_worker.start()
+
+@app.on_event("shutdown")
+async def stop_job_worker():
+    await job_worker.stop()
+
+# ✅ People-you-may-know refresh worker
+@app.on_event("startup")
+async def start_recommendation_worker():
+    recommendation_worker.start()
+
+@app.on_event("shutdown")
+async def stop_recommendation_worker():
+    await recommendation_worker.stop()
+
 # ===========================
 # Test Email Endpoint
 # ===========================
@@ -62,14 +119,11 @@ class TestEmailRequest(BaseModel):
     email: EmailStr
 
 @app.post("/test-email")
-async def test_email(request: TestEmailRequest):
+def test_email(request: TestEmailRequest):
     token = secrets.token_hex(16)
     try:
-        success = await send_verification_email(request.email, token)
-        if success:
-            return {"message": f"✅ Verification email sent to {request.email}", "token": token}
-        else:
-            raise HTTPException(status_code=500, detail="Failed to send email.")
+        email_id = queue_verification_email(request.email, token)
+        return {"message": f"✅ Verification email queued for {request.email}", "token": token, "email_id": email_id}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error sending email: {e}")
 
@@ -84,6 +138,13 @@ def root():
 def health():
     return {"status": "ok"}
 
+@app.get("/metrics", include_in_schema=False)
+def metrics(request: Request):
+    # Optional bearer token so the scrape endpoint isn't public
+    if settings.METRICS_TOKEN and request.headers.get("authorization") != f"Bearer {settings.METRICS_TOKEN}":
+        raise HTTPException(status_code=401, detail="Invalid metrics token")
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
 # ===========================
 # Run Uvicorn
 # ===========================
@@ -0,0 +1,27 @@
+from app.core.config import settings
+from app.repositories.base import (
+    CommentRepository,
+    DuplicateUserError,
+    FollowRepository,
+    JobRepository,
+    MessageRepository,
+    OutboxRepository,
+    PostRepository,
+    RecommendationRepository,
+    Repositories,
+    UserRepository,
+)
+
+
+def build_repositories(backend: str) -> Repositories:
+    """Build the repositories for `backend` ("neo4j" or "memory")."""
+    if backend == "neo4j":
+        from app.repositories.neo4j_repo import Neo4jRepositories
+        return Neo4jRepositories()
+    if backend == "memory":
+        from app.repositories.memory_repo import MemoryRepositories
+        return MemoryRepositories()
+    raise ValueError(f"Unknown STORAGE_BACKEND: {backend!r} (expected 'neo4j' or 'memory')")
+
+
+repos = build_repositories(settings.STORAGE_BACKEND.lower())
@@ -0,0 +1,406 @@
+"""Storage interfaces used by the routes.
+
+Each backend (Neo4j, in-memory) implements these repositories and
+returns plain dicts in the shapes the API already serves. Lookups that
+find nothing return None/False and leave the HTTP error to the route.
+"""
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional, Tuple
+
+# Field names accepted by `?fields=` (see app.core.fields), in response order
+USER_LIST_FIELDS = (
+    "id", "username", "bio", "profile_pic",
+    "followers_count", "following_count", "is_following",
+)
+USER_PROFILE_FIELDS = USER_LIST_FIELDS + ("pinned_posts",)
+# Background job lifecycle (see JobRepository)
+JOB_STATUSES = ("queued", "running", "succeeded", "failed")
+# People directory orders (GET /users/?sort=)
+USER_SORTS = ("newest", "followers")
+POST_LIST_FIELDS = (
+    "id", "content", "image_url", "created_at",
+    "user", "likes_count", "comments_count",
+)
+
+
+class DuplicateUserError(Exception):
+    """The email or username already belongs to another user."""
+
+
+class UserRepository(ABC):
+    """User nodes. `get_by_*` return all properties, including the password hash."""
+
+    @abstractmethod
+    def get_by_id(self, user_id: str) -> Optional[Dict[str, Any]]: ...
+
+    @abstractmethod
+    def get_by_username(self, username: str) -> Optional[Dict[str, Any]]: ...
+
+    @abstractmethod
+    def get_by_email(self, email: str) -> Optional[Dict[str, Any]]: ...
+
+    @abstractmethod
+    def get_by_verification_token(self, token: str) -> Optional[Dict[str, Any]]:
+        """Only for legacy stored tokens; new verification tokens are signed."""
+
+    @abstractmethod
+    def create(self, user: Dict[str, Any]) -> None:
+        """Insert in one write; raises DuplicateUserError if email/username is taken."""
+
+    @abstractmethod
+    def update(self, user_id: str, updates: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Apply `updates` and return the updated user (without password).
+        Raises DuplicateUserError if email/username is taken."""
+
+    @abstractmethod
+    def mark_email_verified(self, user_id: str, email: str, verified_at: str) -> bool:
+        """Verify the user if `email` is still theirs; False when no such user/email."""
+
+    @abstractmethod
+    def list_users(self, fields: List[str], me: Optional[str], limit: int, sort: str = "newest",
+                   after: Optional[Tuple[Any, str]] = None) -> List[Dict[str, Any]]:
+        """One page of users ordered by `sort` (see USER_SORTS): created_at
+        or followers_count, descending, ties by id descending. Rows hold
+        `fields` (raw values; `profile_pic` is the stored avatar_url) plus
+        `_key`/`_id`, the sort value and id to pass back as `after`.
+        Users without a created_at are not listed under "newest"."""
+
+    @abstractmethod
+    def get_profile(self, user_id: str, fields: List[str], me: Optional[str]) -> Optional[Dict[str, Any]]: ...
+
+    @abstractmethod
+    def get_own_profile(self, user_id: str) -> Optional[Dict[str, Any]]:
+        """The user (without password) with `followers_count`,
+        `following_count` and `pinned_posts`, in one read."""
+
+    @abstractmethod
+    def get_public(self, user_id: str) -> Optional[Dict[str, Any]]:
+        """{id, username, profile_pic} for chat headers."""
+
+    @abstractmethod
+    def pinned_posts(self, user_id: str) -> List[Dict[str, Any]]: ...
+
+    @abstractmethod
+    def search(self, query: str, me: Optional[str], limit: int,
+               after: Optional[Tuple[float, str]] = None) -> List[Dict[str, Any]]:
+        """Typeahead over the username/name index (see app.core.text_search).
+        Rows {id, username, name, bio, profile_pic, followers_count,
+        mutual_count, rank}, best first (rank desc, then id); `after` is the
+        (rank, id) of the previous page's last row. Mutuals are users `me`
+        follows who follow the row's user."""
+
+    @abstractmethod
+    def detach_follows(self, user_id: str, limit: int) -> int:
+        """Remove up to `limit` of the user's FOLLOWS relationships (either
+        direction), keeping the other side's counters right; returns how many."""
+
+    @abstractmethod
+    def delete(self, user_id: str) -> bool:
+        """Delete the user with its remaining relationships and derived data
+        (e.g. stored recommendations). Messages are deleted separately."""
+
+
+class FollowRepository(ABC):
+    @abstractmethod
+    def follow(self, follower_id: str, user_id: str) -> None: ...
+
+    @abstractmethod
+    def unfollow(self, follower_id: str, user_id: str) -> None: ...
+
+    @abstractmethod
+    def followers(self, user_id: str, limit: int,
+                  after: Optional[Tuple[str, str]] = None) -> List[Dict[str, Any]]:
+        """Users following `user_id`, most recent follow first, plus `_key`
+        (follow time, "" if unknown) and `_id`; `after` is the last row's
+        (_key, _id)."""
+
+    @abstractmethod
+    def following(self, user_id: str, limit: int,
+                  after: Optional[Tuple[str, str]] = None) -> List[Dict[str, Any]]:
+        """Users `user_id` follows, paged like `followers`."""
+
+    @abstractmethod
+    def follow_status(self, me: str, user_ids: List[str]) -> Dict[str, Dict[str, bool]]:
+        """{user id: {"following", "followed_by"}} relative to `me`; unknown ids are left out."""
+
+
+class PostRepository(ABC):
+    @abstractmethod
+    def create(self, author: Dict[str, Any], post: Dict[str, Any]) -> None: ...
+
+    @abstractmethod
+    def list_posts(self, fields: List[str], user_id: Optional[str],
+                   limit: Optional[int] = None, before: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Newest first, holding only `fields`. With `limit`, one page; `before`
+        is the id of the previous page's last post (see app.core.ids)."""
+
+    @abstractmethod
+    def get(self, post_id: str) -> Optional[Dict[str, Any]]:
+        """Post with `user`, `likes_count` and `comments_count`."""
+
+    @abstractmethod
+    def exists(self, post_id: str) -> bool: ...
+
+    @abstractmethod
+    def is_author(self, user_id: str, post_id: str) -> bool: ...
+
+    @abstractmethod
+    def update(self, post_id: str, updates: Dict[str, Any]) -> None: ...
+
+    @abstractmethod
+    def delete(self, post_id: str) -> None:
+        """Tombstone the post: constant time, and it (with its comments and
+        likes) drops out of every read at once. `purge_batch` removes it."""
+
+    @abstractmethod
+    def purge_batch(self, post_id: str, limit: int) -> int:
+        """Remove up to `limit` rows of a deleted post (its comments, then its
+        likes, then the post itself) in one write; returns how many, 0 once
+        nothing is left."""
+
+    @abstractmethod
+    def like(self, user_id: str, post_id: str) -> int:
+        """Like (idempotent) and return the new like count."""
+
+    @abstractmethod
+    def feed_for(self, user_id: str) -> List[Dict[str, Any]]:
+        """Posts by accounts `user_id` follows, newest first."""
+
+    @abstractmethod
+    def search(self, query: str, as_of: float, limit: int,
+               after: Optional[Tuple[float, str]] = None) -> List[Dict[str, Any]]:
+        """Posts whose content, or a comment on them, contains every query
+        word (the last as a prefix; see app.core.text_search). Each row is
+        the post with `user` and counts, plus `matched_comments` [{id,
+        content}] and `rank`: text relevance (comment matches weighted by
+        POST_SEARCH_COMMENT_WEIGHT) discounted by age at `as_of` (epoch
+        seconds). Best first, then id; `after` is the (rank, id) of the
+        previous page's last row."""
+
+
+class CommentRepository(ABC):
+    @abstractmethod
+    def create(self, user_id: str, post_id: str, comment: Dict[str, Any]) -> None: ...
+
+    @abstractmethod
+    def list_for_post(self, post_id: str, limit: Optional[int] = None,
+                      after: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Oldest first, each with its author under `user`. With `limit`, one
+        page; `after` is the id of the previous page's last comment."""
+
+    @abstractmethod
+    def is_author(self, user_id: str, comment_id: str) -> bool: ...
+
+    @abstractmethod
+    def update(self, comment_id: str, content: str, updated_at: str) -> None: ...
+
+    @abstractmethod
+    def delete(self, comment_id: str) -> None:
+        """Tombstone the comment (constant time); `purge` removes it."""
+
+    @abstractmethod
+    def purge(self, comment_id: str) -> int:
+        """Remove a deleted comment; returns 1, or 0 if it is already gone."""
+
+
+class MessageRepository(ABC):
+    @abstractmethod
+    def ensure_user(self, user_id: str, username: Optional[str] = None, profile_pic: Optional[str] = None) -> None: ...
+
+    @abstractmethod
+    def ensure_conversation(self, conversation_id: str, me: str, other: str, now: str) -> Optional[Dict[str, Any]]:
+        """Create (or fetch) the conversation and both memberships; returns {id, created_at}."""
+
+    @abstractmethod
+    def participants(self, conversation_id: str) -> List[str]: ...
+
+    @abstractmethod
+    def create_message(self, conversation_id: str, message: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Store `message` (id, content, timestamp, sender_id, receiver_id); returns its API shape."""
+
+    @abstractmethod
+    def list_messages(self, conversation_id: str, limit: Optional[int] = None,
+                      before: Optional[str] = None) -> List[Dict[str, Any]]:
+        """[{id, content, timestamp, sender_id}] oldest first. With `limit`, only
+        the latest `limit` messages sent before the message with id `before`
+        (all messages if None), so older history loads page by page."""
+
+    @abstractmethod
+    def conversation_with(self, me: str, other: str) -> Optional[Dict[str, Any]]:
+        """{conversation_id, user, last_message} or None."""
+
+    @abstractmethod
+    def list_conversations(self, me: str, limit: int, offset: int) -> List[Dict[str, Any]]:
+        """[{id, user, last_message}] ordered by last message, newest first."""
+
+    @abstractmethod
+    def mark_read(self, conversation_id: str, user_id: str) -> int: ...
+
+    @abstractmethod
+    def clear_conversation(self, conversation_id: str, cleared_at: str) -> int:
+        """Hide every message sent up to `cleared_at` (constant time; later
+        messages stay visible); returns how many messages the conversation
+        held. `purge_cleared_batch` removes the hidden ones."""
+
+    @abstractmethod
+    def purge_cleared_batch(self, conversation_id: str, limit: int) -> int:
+        """Delete up to `limit` hidden messages in one write; returns how many."""
+
+    @abstractmethod
+    def conversation_ids_for(self, user_id: str) -> List[str]:
+        """Conversations the user participates in."""
+
+    @abstractmethod
+    def delete_sent_batch(self, user_id: str, limit: int) -> Tuple[int, List[str]]:
+        """Delete up to `limit` messages sent by the user, in one write;
+        returns (deleted, ids of the conversations they were in)."""
+
+    @abstractmethod
+    def prune_empty_conversations(self, conversation_ids: List[str]) -> int:
+        """Delete those of the given conversations that have no messages left."""
+
+
+class OutboxRepository(ABC):
+    """Persistent queue of outgoing emails, drained by app.services.email_service.
+
+    Items: {id, to, subject, html, text, created_at, attempts, next_attempt_at}
+    with `next_attempt_at` in epoch seconds.
+    """
+
+    @abstractmethod
+    def enqueue(self, email: Dict[str, Any]) -> None: ...
+
+    @abstractmethod
+    def claim(self, now: float, limit: int, lease_seconds: float) -> List[Dict[str, Any]]:
+        """Lease up to `limit` due items (oldest due first). Items whose lease ran
+        out without being completed (e.g. the worker died) become due again."""
+
+    @abstractmethod
+    def complete(self, email_ids: List[str]) -> None:
+        """Remove delivered items."""
+
+    @abstractmethod
+    def retry(self, email_id: str, attempts: int, next_attempt_at: float, error: str) -> None: ...
+
+    @abstractmethod
+    def fail(self, email_id: str, attempts: int, error: str) -> None:
+        """Give up on the item; it is kept (status "dead") for inspection."""
+
+
+class RecommendationRepository(ABC):
+    """Precomputed "people you may know" lists, refreshed in the background
+    by app.services.recommendations and scored by app.core.ranking.
+
+    Rows: {id, username, name, bio, profile_pic, followers_count,
+    mutual_count, same_program, score}, best first.
+    """
+
+    @abstractmethod
+    def mark_stale(self, user_id: str, fanout: int) -> None:
+        """Queue `user_id` and up to `fanout` of its followers (whose
+        friends-of-friends go through it) for a refresh."""
+
+    @abstractmethod
+    def claim_stale(self, limit: int) -> List[str]:
+        """Take up to `limit` queued user ids off the queue."""
+
+    @abstractmethod
+    def refresh(self, user_id: str, limit: int, candidates: int) -> int:
+        """Score up to `candidates` friend-of-friend and same-program users
+        and store the best `limit`; returns how many were stored."""
+
+    @abstractmethod
+    def get(self, user_id: str, limit: int) -> Optional[List[Dict[str, Any]]]:
+        """The stored list, minus users followed since; None if never computed."""
+
+
+class JobRepository(ABC):
+    """Persistent background jobs, run by app.services.jobs.
+
+    Jobs: {id, kind, params, state, progress, result, status, error,
+    attempts, created_by, created_at, started_at, finished_at, lease_until,
+    lease_token}. params/state/progress/result are JSON-serialisable dicts;
+    status is one of JOB_STATUSES. `state` is the handler's resume point,
+    `progress` what the API shows. `lease_token` identifies the current
+    claim: writes from a worker whose lease was taken over are ignored.
+    """
+
+    @abstractmethod
+    def create(self, job: Dict[str, Any]) -> None: ...
+
+    @abstractmethod
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]: ...
+
+    @abstractmethod
+    def list_recent(self, limit: int) -> List[Dict[str, Any]]:
+        """Newest first."""
+
+    @abstractmethod
+    def claim(self, now: float, lease_seconds: float) -> Optional[Dict[str, Any]]:
+        """Lease the oldest queued job, or a running one whose lease ran out
+        (its worker died), counting the attempt. At most one caller wins a
+        job; it comes back with a fresh `lease_token`."""
+
+    @abstractmethod
+    def checkpoint(self, job_id: str, lease_token: str, state: Dict[str, Any],
+                   progress: Dict[str, Any], lease_until: float) -> bool:
+        """Store the handler's resume point and progress, and extend the lease.
+        False (and nothing written) if the lease is no longer `lease_token`'s."""
+
+    @abstractmethod
+    def release(self, job_id: str, lease_token: str, error: str) -> None:
+        """Put a failed attempt back in the queue; it resumes from its last checkpoint."""
+
+    @abstractmethod
+    def finish(self, job_id: str, lease_token: str, status: str, result: Optional[Dict[str, Any]],
+               error: Optional[str], finished_at: str) -> None: ...
+
+
+class RevocationRepository(ABC):
+    """Revoked refresh tokens and sessions, shared by every API process and
+    kept across restarts; app.core.security.RevocationList caches them.
+
+    Keys are `jti:<token id>` or `fam:<token family>`, each kept until
+    `expires_at` (epoch seconds), the latest expiry of a token it matches.
+    """
+
+    @abstractmethod
+    def add(self, key: str, expires_at: float) -> bool:
+        """Record a revocation; False if the key already was revoked. Of
+        concurrent adds of one key, exactly one returns True."""
+
+    @abstractmethod
+    def any_revoked(self, keys: List[str], now: float) -> bool: ...
+
+    @abstractmethod
+    def prune(self, now: float, limit: int) -> int:
+        """Delete up to `limit` expired entries; returns how many."""
+
+
+class Repositories:
+    """The set of repositories for one storage backend."""
+
+    def __init__(
+        self,
+        users: UserRepository,
+        follows: FollowRepository,
+        posts: PostRepository,
+        comments: CommentRepository,
+        messages: MessageRepository,
+        outbox: OutboxRepository,
+        recommendations: RecommendationRepository,
+        jobs: JobRepository,
+        revocations: RevocationRepository,
+    ):
+        self.users = users
+        self.follows = follows
+        self.posts = posts
+        self.comments = comments
+        self.messages = messages
+        self.outbox = outbox
+        self.recommendations = recommendations
+        self.jobs = jobs
+        self.revocations = revocations
+
+    def ensure_schema(self) -> None:
+        """Create constraints/indexes the backend relies on (no-op by default)."""
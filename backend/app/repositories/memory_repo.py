@@ -0,0 +1,1199 @@
+"""In-memory implementation of the repositories.
+
+Keeps the graph in indexed dicts (unique-key indexes for users,
+adjacency sets for follows/likes/memberships) and sorted (key, id) lists
+kept with `bisect`, so it answers the same calls as the Neo4j backend
+with predictable Python-only cost. Used for offline tests, local runs
+and benchmarks of the API layer (STORAGE_BACKEND=memory). One re-entrant
+lock serialises access, since sync routes run on the threadpool.
+"""
+import bisect
+import math
+import threading
+import uuid
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from app.core.config import settings
+from app.core.ranking import recommendation_score
+from app.core.text_search import (
+    recency_rank,
+    term_matches,
+    tokenize,
+    user_match_tier,
+    user_search_rank,
+    user_search_terms,
+)
+from app.core.ids import id_time
+from app.core.timestamps import format_ts, now_iso, parse_ts
+from app.repositories.base import (
+    CommentRepository,
+    DuplicateUserError,
+    FollowRepository,
+    JobRepository,
+    MessageRepository,
+    OutboxRepository,
+    PostRepository,
+    RecommendationRepository,
+    Repositories,
+    RevocationRepository,
+    UserRepository,
+)
+
+
+def _cursor_key(row: Optional[Dict[str, Any]], field: str, row_id: str) -> Optional[Tuple[str, str]]:
+    """(time, id) sort key of the row a cursor id names, taken from the id
+    itself if the row is gone; None when neither is known."""
+    at = row.get(field) if row else None
+    if at is None:
+        t = id_time(row_id)
+        at = format_ts(t) if t else None
+    return (at, row_id) if at is not None else None
+
+
+def _epoch(iso: Optional[str]) -> float:
+    try:
+        return parse_ts(iso or "").timestamp()
+    except ValueError:
+        return 0.0
+
+
+class ContentIndex:
+    """Inverted index for post search: term -> {doc key: term frequency},
+    with the distinct terms kept sorted for prefix lookups. Documents are
+    ("post", id) or ("comment", id) keys."""
+
+    def __init__(self):
+        self.postings: Dict[str, Dict[Tuple[str, str], int]] = {}
+        self.terms: List[str] = []
+        self.doc_terms: Dict[Tuple[str, str], List[str]] = {}
+
+    def put(self, key: Tuple[str, str], text: Optional[str]) -> None:
+        self.remove(key)
+        tokens = tokenize(text)
+        if not tokens:
+            return
+        self.doc_terms[key] = tokens
+        for term in tokens:
+            docs = self.postings.get(term)
+            if docs is None:
+                docs = self.postings[term] = {}
+                bisect.insort(self.terms, term)
+            docs[key] = docs.get(key, 0) + 1
+
+    def remove(self, key: Tuple[str, str]) -> None:
+        for term in set(self.doc_terms.pop(key, ())):
+            docs = self.postings.get(term)
+            if docs is None:
+                continue
+            docs.pop(key, None)
+            if not docs:
+                del self.postings[term]
+                _remove_sorted(self.terms, term)
+
+    def _matching_terms(self, token: str, prefix: bool) -> List[str]:
+        if not prefix:
+            return [token] if token in self.postings else []
+        out = []
+        i = bisect.bisect_left(self.terms, token)
+        while i < len(self.terms) and self.terms[i].startswith(token):
+            out.append(self.terms[i])
+            i += 1
+        return out
+
+    def search(self, tokens: List[str]) -> Dict[Tuple[str, str], float]:
+        """Documents containing every token (the last by prefix), with a
+        BM25-like score: sum of idf * tf / (tf + 1.2) over the tokens."""
+        total = max(len(self.doc_terms), 1)
+        scores: Optional[Dict[Tuple[str, str], float]] = None
+        for n, token in enumerate(tokens):
+            hits: Dict[Tuple[str, str], float] = {}
+            for term in self._matching_terms(token, prefix=n == len(tokens) - 1):
+                docs = self.postings[term]
+                idf = math.log(1 + total / len(docs))
+                for key, tf in docs.items():
+                    hits[key] = max(hits.get(key, 0.0), idf * tf / (tf + 1.2))
+            if scores is None:
+                scores = hits
+            else:
+                scores = {k: v + hits[k] for k, v in scores.items() if k in hits}
+            if not scores:
+                return {}
+        return scores or {}
+
+
+def _public(user: Dict[str, Any]) -> Dict[str, Any]:
+    u = dict(user)
+    u.pop("password", None)
+    return u
+
+
+class MemoryGraph:
+    """Shared state for all in-memory repositories."""
+
+    def __init__(self):
+        self.lock = threading.RLock()
+        # Users and unique-key indexes
+        self.users: Dict[str, Dict[str, Any]] = {}
+        self.user_by_username: Dict[str, str] = {}
+        self.user_by_email: Dict[str, str] = {}
+        self.user_by_token: Dict[str, str] = {}
+        # Typeahead index: term -> user ids, the sorted distinct terms, terms per user
+        self.search_terms: Dict[str, Set[str]] = {}
+        self.search_term_list: List[str] = []
+        self.user_terms: Dict[str, List[str]] = {}
+        # People directory orders: sorted (created_at, id) and (followers, id)
+        self.users_by_created: List[Tuple[str, str]] = []
+        self.users_by_followers: List[Tuple[int, str]] = []
+        # FOLLOWS adjacency: user id -> {other id: followed_at}
+        self.following: Dict[str, Dict[str, str]] = {}
+        self.followers: Dict[str, Dict[str, str]] = {}
+        self.pinned: Dict[str, List[str]] = {}
+        # Posts: sorted (created_at, id) globally and per author
+        self.posts: Dict[str, Dict[str, Any]] = {}
+        self.post_author: Dict[str, str] = {}
+        self.posts_sorted: List[Tuple[str, str]] = []
+        self.posts_by_author: Dict[str, List[Tuple[str, str]]] = {}
+        self.likes: Dict[str, Set[str]] = {}
+        self.liked_by: Dict[str, Set[str]] = {}
+        # Comments: sorted (created_at, id) per post
+        self.comments: Dict[str, Dict[str, Any]] = {}
+        self.comment_author: Dict[str, str] = {}
+        self.comment_post: Dict[str, str] = {}
+        self.comments_by_author: Dict[str, Set[str]] = {}
+        self.comments_by_post: Dict[str, List[Tuple[str, str]]] = {}
+        # Conversations and messages: sorted (timestamp, id) per conversation
+        self.conversations: Dict[str, Dict[str, Any]] = {}
+        self.participants: Dict[str, Set[str]] = {}
+        self.user_conversations: Dict[str, Set[str]] = {}
+        self.messages: Dict[str, Dict[str, Any]] = {}
+        self.messages_by_conversation: Dict[str, List[Tuple[str, str]]] = {}
+        self.message_conversation: Dict[str, str] = {}
+        self.sent_by: Dict[str, Set[str]] = {}
+        self.readers: Dict[str, Set[str]] = {}
+        # MESSAGE_BUCKETS: per conversation, buckets in order (position = seq),
+        # and the (conversation, seq) each bucketed message is in
+        self.message_buckets: Dict[str, List[Dict[str, Any]]] = {}
+        self.message_bucket: Dict[str, Tuple[str, int]] = {}
+        # Post search over post and comment content
+        self.content_index = ContentIndex()
+        # People you may know: user id -> [(candidate id, score, mutuals, same program)],
+        # and the ids queued for a refresh (a dict keeps queue order)
+        self.recommendations: Dict[str, List[Tuple[str, float, int, bool]]] = {}
+        self.recs_stale: Dict[str, None] = {}
+
+    # ---- helpers shared by the repositories (call with lock held) ----
+    def index_user(self, user: Dict[str, Any]) -> None:
+        uid = user["id"]
+        old = self.users.get(uid)
+        if old is not None:
+            for key, index in (("username", self.user_by_username), ("email", self.user_by_email),
+                               ("verification_token", self.user_by_token)):
+                if old.get(key) is not None and index.get(old[key]) == uid:
+                    del index[old[key]]
+        self.users[uid] = user
+        for key, index in (("username", self.user_by_username), ("email", self.user_by_email),
+                           ("verification_token", self.user_by_token)):
+            if user.get(key) is not None:
+                index[user[key]] = uid
+        if old is None:
+            bisect.insort(self.users_by_followers, (len(self.followers.get(uid, {})), uid))
+        if (old or {}).get("created_at") != user.get("created_at"):
+            if old is not None and old.get("created_at") is not None:
+                _remove_sorted(self.users_by_created, (old["created_at"], uid))
+            if user.get("created_at") is not None:
+                bisect.insort(self.users_by_created, (user["created_at"], uid))
+        terms = user_search_terms(user.get("username"), user.get("name"))
+        if terms != self.user_terms.get(uid):
+            self.unindex_search(uid)
+            self.user_terms[uid] = terms
+            for term in terms:
+                if term not in self.search_terms:
+                    self.search_terms[term] = set()
+                    bisect.insort(self.search_term_list, term)
+                self.search_terms[term].add(uid)
+
+    def unindex_user(self, uid: str) -> None:
+        """Drop the user from the directory orders (before removing the user)."""
+        user = self.users.get(uid)
+        if user is None:
+            return
+        _remove_sorted(self.users_by_followers, (len(self.followers.get(uid, {})), uid))
+        if user.get("created_at") is not None:
+            _remove_sorted(self.users_by_created, (user["created_at"], uid))
+
+    def set_follow(self, follower_id: str, user_id: str, at: Optional[str]) -> None:
+        """Add (at set) or remove (at None) a FOLLOWS edge, keeping the followers order."""
+        followers = self.followers.setdefault(user_id, {})
+        if (at is not None) == (follower_id in followers):
+            return
+        _remove_sorted(self.users_by_followers, (len(followers), user_id))
+        if at is not None:
+            self.following.setdefault(follower_id, {})[user_id] = at
+            followers[follower_id] = at
+        else:
+            self.following.get(follower_id, {}).pop(user_id, None)
+            followers.pop(follower_id, None)
+        if user_id in self.users:
+            bisect.insort(self.users_by_followers, (len(followers), user_id))
+
+    def unindex_search(self, uid: str) -> None:
+        for term in self.user_terms.pop(uid, []):
+            owners = self.search_terms.get(term)
+            if owners is None:
+                continue
+            owners.discard(uid)
+            if not owners:
+                del self.search_terms[term]
+                i = bisect.bisect_left(self.search_term_list, term)
+                if i < len(self.search_term_list) and self.search_term_list[i] == term:
+                    del self.search_term_list[i]
+
+    def search_matches(self, token: str) -> Set[str]:
+        """Users with a term that `token` prefixes (bisect range) or, for long
+        tokens, that is within one edit of it (scan of the distinct terms)."""
+        found: Set[str] = set()
+        terms = self.search_term_list
+        i = bisect.bisect_left(terms, token)
+        while i < len(terms) and terms[i].startswith(token):
+            found |= self.search_terms[terms[i]]
+            i += 1
+        if len(token) >= 4:
+            for term in terms:
+                if term_matches(token, term):
+                    found |= self.search_terms[term]
+        return found
+
+    def ensure_user(self, user_id: str, **on_create: Any) -> Dict[str, Any]:
+        user = self.users.get(user_id)
+        if user is None:
+            user = {"id": user_id, **{k: v for k, v in on_create.items() if v is not None}}
+            self.index_user(user)
+        return user
+
+    def remove_message(self, mid: str) -> None:
+        msg = self.messages.pop(mid, None)
+        if msg is None:
+            return
+        cid = self.message_conversation.pop(mid, None)
+        if cid is not None:
+            _remove_sorted(self.messages_by_conversation.get(cid, []), (msg.get("timestamp") or "", mid))
+        loc = self.message_bucket.pop(mid, None)
+        if loc is not None:
+            bucket = self.message_buckets[loc[0]][loc[1]]
+            _remove_sorted(bucket["keys"], (msg.get("timestamp") or "", mid))
+            bucket["count"] -= 1
+        self.sent_by.get(msg.get("sender_id"), set()).discard(mid)
+        self.readers.pop(mid, None)
+
+    def remove_conversation(self, cid: str) -> None:
+        self.conversations.pop(cid, None)
+        for uid in self.participants.pop(cid, set()):
+            self.user_conversations.get(uid, set()).discard(cid)
+        self.messages_by_conversation.pop(cid, None)
+        for bucket in self.message_buckets.pop(cid, []):
+            for _, mid in bucket["keys"]:
+                self.message_bucket.pop(mid, None)
+
+    def remove_comment(self, cid: str) -> None:
+        comment = self.comments.pop(cid, None)
+        if comment is None:
+            return
+        self.content_index.remove(("comment", cid))
+        author = self.comment_author.pop(cid, None)
+        if author is not None:
+            self.comments_by_author.get(author, set()).discard(cid)
+        pid = self.comment_post.pop(cid, None)
+        if pid is not None:
+            _remove_sorted(self.comments_by_post.get(pid, []), (comment.get("created_at") or "", cid))
+
+    def remove_post(self, pid: str) -> None:
+        post = self.posts.pop(pid, None)
+        if post is None:
+            return
+        self.content_index.remove(("post", pid))
+        key = (post.get("created_at") or "", pid)
+        _remove_sorted(self.posts_sorted, key)
+        author = self.post_author.pop(pid, None)
+        if author is not None:
+            _remove_sorted(self.posts_by_author.get(author, []), key)
+        for uid in self.likes.pop(pid, set()):
+            self.liked_by.get(uid, set()).discard(pid)
+        for pins in self.pinned.values():
+            if pid in pins:
+                pins.remove(pid)
+        # DETACH DELETE leaves comments orphaned (no ON_POST); they drop out of every read
+        for _, cid in self.comments_by_post.pop(pid, []):
+            self.comment_post.pop(cid, None)
+            self.content_index.remove(("comment", cid))
+
+
+def _remove_sorted(items: List[Tuple[str, str]], key: Tuple[str, str]) -> None:
+    i = bisect.bisect_left(items, key)
+    if i < len(items) and items[i] == key:
+        del items[i]
+
+
+class MemoryUserRepository(UserRepository):
+    def __init__(self, graph: MemoryGraph):
+        self.g = graph
+
+    def _lookup(self, index: Dict[str, str], key: str) -> Optional[Dict[str, Any]]:
+        with self.g.lock:
+            uid = index.get(key)
+            return dict(self.g.users[uid]) if uid is not None else None
+
+    def get_by_id(self, user_id):
+        with self.g.lock:
+            user = self.g.users.get(user_id)
+            return dict(user) if user is not None else None
+
+    def get_by_username(self, username):
+        return self._lookup(self.g.user_by_username, username)
+
+    def get_by_email(self, email):
+        return self._lookup(self.g.user_by_email, email)
+
+    def get_by_verification_token(self, token):
+        return self._lookup(self.g.user_by_token, token)
+
+    def _check_unique(self, user_id: str, user: Dict[str, Any]) -> None:
+        for index, key in ((self.g.user_by_email, "email"), (self.g.user_by_username, "username")):
+            owner = index.get(user.get(key))
+            if owner is not None and owner != user_id:
+                raise DuplicateUserError()
+
+    def create(self, user):
+        with self.g.lock:
+            self._check_unique(user["id"], user)
+            self.g.index_user({k: v for k, v in user.items() if v is not None})
+
+    def update(self, user_id, updates):
+        with self.g.lock:
+            user = self.g.users.get(user_id)
+            if user is None:
+                return None
+            merged = {**user, **updates}
+            self._check_unique(user_id, merged)
+            self.g.index_user({k: v for k, v in merged.items() if v is not None})
+            return _public(self.g.users[user_id])
+
+    def mark_email_verified(self, user_id, email, verified_at):
+        with self.g.lock:
+            user = self.g.users.get(user_id)
+            if user is None or user.get("email") != email:
+                return False
+            user = {**user, "email_verified": True, "verified_at": user.get("verified_at") or verified_at}
+            user.pop("verification_token", None)
+            self.g.index_user(user)
+            return True
+
+    def _row(self, user: Dict[str, Any], fields: List[str], me: Optional[str]) -> Dict[str, Any]:
+        g = self.g
+        uid = user["id"]
+        computed = {
+            "id": lambda: uid,
+            "username": lambda: user.get("username"),
+            "bio": lambda: user.get("bio"),
+            "profile_pic": lambda: user.get("avatar_url"),
+            "followers_count": lambda: len(g.followers.get(uid, {})),
+            "following_count": lambda: len(g.following.get(uid, {})),
+            "is_following": lambda: bool(me) and uid in g.following.get(me, {}),
+            "pinned_posts": lambda: [dict(g.posts[p]) for p in g.pinned.get(uid, []) if p in g.posts],
+        }
+        # Only the requested fields are evaluated, mirroring the Cypher projection
+        return {f: computed[f]() for f in fields}
+
+    def list_users(self, fields, me, limit, sort="newest", after=None):
+        g = self.g
+        with g.lock:
+            order = g.users_by_created if sort == "newest" else g.users_by_followers
+            # Walk the ascending order backwards from just below `after`
+            i = bisect.bisect_left(order, tuple(after)) - 1 if after else len(order) - 1
+            rows = []
+            while i >= 0 and len(rows) < limit:
+                key, uid = order[i]
+                row = self._row(g.users[uid], fields, me)
+                row["_key"], row["_id"] = key, uid
+                rows.append(row)
+                i -= 1
+            return rows
+
+    def get_profile(self, user_id, fields, me):
+        with self.g.lock:
+            user = self.g.users.get(user_id)
+            return self._row(user, fields, me) if user is not None else None
+
+    def get_own_profile(self, user_id):
+        g = self.g
+        with g.lock:
+            user = g.users.get(user_id)
+            if user is None:
+                return None
+            out = _public(user)
+            out["followers_count"] = len(g.followers.get(user_id, {}))
+            out["following_count"] = len(g.following.get(user_id, {}))
+            out["pinned_posts"] = [dict(g.posts[p]) for p in g.pinned.get(user_id, []) if p in g.posts]
+            return out
+
+    def get_public(self, user_id):
+        with self.g.lock:
+            user = self.g.users.get(user_id)
+            if user is None:
+                return None
+            return {
+                "id": user["id"],
+                "username": user.get("username"),
+                "profile_pic": user.get("profile_pic") or user.get("avatar_url") or "",
+            }
+
+    def pinned_posts(self, user_id):
+        with self.g.lock:
+            return [dict(self.g.posts[p]) for p in self.g.pinned.get(user_id, []) if p in self.g.posts]
+
+    def search(self, query, me, limit, after=None):
+        tokens = tokenize(query)
+        if not tokens:
+            return []
+        g = self.g
+        with g.lock:
+            candidates = g.search_matches(tokens[0])
+            for token in tokens[1:]:
+                candidates &= g.search_matches(token)
+            my_following = set(g.following.get(me, {})) if me else set()
+            rows = []
+            for uid in candidates:
+                user = g.users[uid]
+                followers = g.followers.get(uid, {})
+                mutual_count = len(my_following.intersection(followers))
+                rank = user_search_rank(user_match_tier(tokens, g.user_terms[uid]), mutual_count, len(followers))
+                if after and (rank > after[0] or (rank == after[0] and uid <= after[1])):
+                    continue
+                rows.append({
+                    "id": uid,
+                    "username": user.get("username"),
+                    "name": user.get("name"),
+                    "bio": user.get("bio"),
+                    "profile_pic": user.get("avatar_url"),
+                    "followers_count": len(followers),
+                    "mutual_count": mutual_count,
+                    "rank": rank,
+                })
+            rows.sort(key=lambda r: (-r["rank"], r["id"]))
+            return rows[:limit]
+
+    def detach_follows(self, user_id, limit):
+        g = self.g
+        with g.lock:
+            edges = [(user_id, other) for other in g.following.get(user_id, {})]
+            edges += [(other, user_id) for other in g.followers.get(user_id, {})]
+            for follower, followed in edges[:limit]:
+                g.set_follow(follower, followed, None)
+            return min(len(edges), limit)
+
+    def delete(self, user_id):
+        g = self.g
+        with g.lock:
+            if user_id not in g.users:
+                return False
+            g.unindex_user(user_id)
+            user = g.users.pop(user_id, None)
+            for other in list(g.following.get(user_id, {})):
+                g.set_follow(user_id, other, None)
+            for other in list(g.followers.get(user_id, {})):
+                g.set_follow(other, user_id, None)
+            g.unindex_search(user_id)
+            if user is not None:
+                for key, index in (("username", g.user_by_username), ("email", g.user_by_email),
+                                   ("verification_token", g.user_by_token)):
+                    if user.get(key) is not None:
+                        index.pop(user[key], None)
+            g.following.pop(user_id, None)
+            g.followers.pop(user_id, None)
+            g.pinned.pop(user_id, None)
+            g.recommendations.pop(user_id, None)
+            g.recs_stale.pop(user_id, None)
+            for readers in g.readers.values():
+                readers.discard(user_id)
+            for pid in g.liked_by.pop(user_id, set()):
+                g.likes.get(pid, set()).discard(user_id)
+            for cid in g.user_conversations.pop(user_id, set()):
+                g.participants.get(cid, set()).discard(user_id)
+            # AUTHORED relationships go with the user; the posts/comments stay, like DETACH DELETE
+            for _, pid in g.posts_by_author.pop(user_id, []):
+                g.post_author.pop(pid, None)
+            for cid in g.comments_by_author.pop(user_id, set()):
+                g.comment_author.pop(cid, None)
+            g.sent_by.pop(user_id, None)
+            return True
+
+
+class MemoryFollowRepository(FollowRepository):
+    def __init__(self, graph: MemoryGraph):
+        self.g = graph
+
+    def follow(self, follower_id, user_id):
+        with self.g.lock:
+            if follower_id not in self.g.users or user_id not in self.g.users:
+                return
+            self.g.set_follow(follower_id, user_id, now_iso())
+
+    def unfollow(self, follower_id, user_id):
+        with self.g.lock:
+            self.g.set_follow(follower_id, user_id, None)
+
+    def _page(self, edges: Dict[str, str], limit, after):
+        keys = sorted(((at or "", uid) for uid, at in edges.items() if uid in self.g.users), reverse=True)
+        if after is not None:
+            keys = [k for k in keys if k < tuple(after)]
+        rows = []
+        for at, uid in keys[:limit]:
+            row = _public(self.g.users[uid])
+            row["_key"], row["_id"] = at, uid
+            rows.append(row)
+        return rows
+
+    def followers(self, user_id, limit, after=None):
+        with self.g.lock:
+            return self._page(self.g.followers.get(user_id, {}), limit, after)
+
+    def following(self, user_id, limit, after=None):
+        with self.g.lock:
+            return self._page(self.g.following.get(user_id, {}), limit, after)
+
+    def follow_status(self, me, user_ids):
+        g = self.g
+        with g.lock:
+            if me not in g.users:
+                return {}
+            following, followers = g.following.get(me, {}), g.followers.get(me, {})
+            return {
+                uid: {"following": uid in following, "followed_by": uid in followers}
+                for uid in user_ids if uid in g.users
+            }
+
+
+class MemoryPostRepository(PostRepository):
+    def __init__(self, graph: MemoryGraph):
+        self.g = graph
+
+    def create(self, author, post):
+        g = self.g
+        with g.lock:
+            g.ensure_user(
+                author["id"],
+                name=author.get("name"),
+                username=author.get("username"),
+                avatar_url=author.get("avatar_url"),
+            )
+            pid = post["id"]
+            g.posts[pid] = {k: v for k, v in post.items() if v is not None}
+            g.post_author[pid] = author["id"]
+            key = (post.get("created_at") or "", pid)
+            bisect.insort(g.posts_sorted, key)
+            bisect.insort(g.posts_by_author.setdefault(author["id"], []), key)
+            g.content_index.put(("post", pid), post.get("content"))
+
+    def _count(self, pid: str, field: str) -> int:
+        if field == "likes_count":
+            return len(self.g.likes.get(pid, ()))
+        return len(self.g.comments_by_post.get(pid, ()))
+
+    def list_posts(self, fields, user_id, limit=None, before=None):
+        g = self.g
+        with g.lock:
+            keys = g.posts_by_author.get(user_id, []) if user_id else g.posts_sorted
+            end = len(keys)
+            if before is not None:
+                anchor = _cursor_key(g.posts.get(before), "created_at", before)
+                end = bisect.bisect_left(keys, anchor) if anchor else 0
+            out = []
+            for i in range(end - 1, -1, -1):
+                if limit is not None and len(out) >= limit:
+                    break
+                pid = keys[i][1]
+                author = g.post_author.get(pid)
+                if author is None or author not in g.users:
+                    continue
+                post = g.posts[pid]
+                row = {}
+                for f in fields:
+                    if f == "user":
+                        row[f] = _public(g.users[author])
+                    elif f in ("likes_count", "comments_count"):
+                        row[f] = self._count(pid, f)
+                    else:
+                        row[f] = post.get(f)
+                out.append(row)
+            return out
+
+    def get(self, post_id):
+        g = self.g
+        with g.lock:
+            post = g.posts.get(post_id)
+            author = g.post_author.get(post_id)
+            if post is None or author not in g.users:
+                return None
+            p = dict(post)
+            p["user"] = _public(g.users[author])
+            p["likes_count"] = self._count(post_id, "likes_count")
+            p["comments_count"] = self._count(post_id, "comments_count")
+            return p
+
+    def exists(self, post_id):
+        with self.g.lock:
+            return post_id in self.g.posts
+
+    def is_author(self, user_id, post_id):
+        with self.g.lock:
+            return post_id in self.g.posts and self.g.post_author.get(post_id) == user_id
+
+    def update(self, post_id, updates):
+        with self.g.lock:
+            post = self.g.posts.get(post_id)
+            if post is not None:
+                post.update(updates)
+                if "content" in updates:
+                    self.g.content_index.put(("post", post_id), post.get("content"))
+
+    def delete(self, post_id):
+        # Removing from the dicts is already cheap here, so there is no tombstone
+        with self.g.lock:
+            self.g.remove_post(post_id)
+
+    def purge_batch(self, post_id, limit):
+        return 0
+
+    def like(self, user_id, post_id):
+        with self.g.lock:
+            if user_id in self.g.users and post_id in self.g.posts:
+                self.g.likes.setdefault(post_id, set()).add(user_id)
+                self.g.liked_by.setdefault(user_id, set()).add(post_id)
+            return len(self.g.likes.get(post_id, ()))
+
+    def feed_for(self, user_id):
+        g = self.g
+        with g.lock:
+            keys = []
+            for followed in g.following.get(user_id, {}):
+                keys.extend(g.posts_by_author.get(followed, []))
+            keys.sort(reverse=True)
+            return [dict(g.posts[pid]) for _, pid in keys]
+
+    def search(self, query, as_of, limit, after=None):
+        tokens = tokenize(query)
+        if not tokens:
+            return []
+        g = self.g
+        with g.lock:
+            relevance: Dict[str, float] = {}
+            matched: Dict[str, List[Dict[str, Any]]] = {}
+            for (kind, doc_id), score in g.content_index.search(tokens).items():
+                if kind == "post":
+                    pid = doc_id
+                else:
+                    pid = g.comment_post.get(doc_id)
+                    if pid is None:
+                        continue
+                    score *= settings.POST_SEARCH_COMMENT_WEIGHT
+                    matched.setdefault(pid, []).append({"id": doc_id, "content": g.comments[doc_id].get("content")})
+                relevance[pid] = max(relevance.get(pid, 0.0), score)
+            ranked = []
+            for pid, score in relevance.items():
+                if g.post_author.get(pid) not in g.users:
+                    continue
+                age = as_of - _epoch(g.posts[pid].get("created_at"))
+                rank = recency_rank(score, age, settings.POST_SEARCH_RECENCY_DAYS)
+                if after and (rank > after[0] or (rank == after[0] and pid <= after[1])):
+                    continue
+                ranked.append((-rank, pid))
+            ranked.sort()
+            rows = []
+            for neg_rank, pid in ranked[:limit]:
+                post = self.get(pid)
+                post["matched_comments"] = matched.get(pid, [])[:3]
+                post["rank"] = -neg_rank
+                rows.append(post)
+            return rows
+
+
+class MemoryCommentRepository(CommentRepository):
+    def __init__(self, graph: MemoryGraph):
+        self.g = graph
+
+    def create(self, user_id, post_id, comment):
+        g = self.g
+        with g.lock:
+            g.ensure_user(user_id)
+            if post_id not in g.posts:
+                return
+            cid = comment["id"]
+            g.comments[cid] = {k: v for k, v in comment.items() if v is not None}
+            g.comment_author[cid] = user_id
+            g.comments_by_author.setdefault(user_id, set()).add(cid)
+            g.comment_post[cid] = post_id
+            bisect.insort(g.comments_by_post.setdefault(post_id, []), (comment.get("created_at") or "", cid))
+            g.content_index.put(("comment", cid), comment.get("content"))
+
+    def list_for_post(self, post_id, limit=None, after=None):
+        g = self.g
+        with g.lock:
+            keys = g.comments_by_post.get(post_id, [])
+            start = 0
+            if after is not None:
+                anchor = _cursor_key(g.comments.get(after), "created_at", after)
+                start = bisect.bisect_right(keys, anchor) if anchor else len(keys)
+            out = []
+            for _, cid in keys[start:]:
+                if limit is not None and len(out) >= limit:
+                    break
+                author = g.comment_author.get(cid)
+                if author not in g.users:
+                    continue
+                comment = dict(g.comments[cid])
+                comment["user"] = _public(g.users[author])
+                out.append(comment)
+            return out
+
+    def is_author(self, user_id, comment_id):
+        with self.g.lock:
+            return comment_id in self.g.comments and self.g.comment_author.get(comment_id) == user_id
+
+    def update(self, comment_id, content, updated_at):
+        with self.g.lock:
+            comment = self.g.comments.get(comment_id)
+            if comment is not None:
+                comment["content"] = content
+                comment["updated_at"] = updated_at
+                self.g.content_index.put(("comment", comment_id), content)
+
+    def delete(self, comment_id):
+        with self.g.lock:
+            self.g.remove_comment(comment_id)
+
+    def purge(self, comment_id):
+        return 0
+
+
+class MemoryMessageRepository(MessageRepository):
+    def __init__(self, graph: MemoryGraph):
+        self.g = graph
+
+    def ensure_user(self, user_id, username=None, profile_pic=None):
+        with self.g.lock:
+            self.g.ensure_user(str(user_id), username=username or str(user_id), profile_pic=profile_pic)
+
+    def ensure_conversation(self, conversation_id, me, other, now):
+        g = self.g
+        with g.lock:
+            convo = g.conversations.setdefault(conversation_id, {"id": conversation_id, "created_at": now})
+            members = g.participants.setdefault(conversation_id, set())
+            for uid in (str(me), str(other)):
+                if uid in g.users:
+                    members.add(uid)
+                    g.user_conversations.setdefault(uid, set()).add(conversation_id)
+            return dict(convo)
+
+    def participants(self, conversation_id):
+        with self.g.lock:
+            return list(self.g.participants.get(conversation_id, ()))
+
+    def create_message(self, conversation_id, message):
+        g = self.g
+        with g.lock:
+            if conversation_id not in g.conversations:
+                return None
+            if message["sender_id"] not in g.users or message["receiver_id"] not in g.users:
+                return None
+            mid = message["id"]
+            g.messages[mid] = {**message, "created_at": message["timestamp"]}
+            g.message_conversation[mid] = conversation_id
+            bisect.insort(g.messages_by_conversation.setdefault(conversation_id, []), (message["timestamp"], mid))
+            g.sent_by.setdefault(message["sender_id"], set()).add(mid)
+            return _message_json(g.messages[mid])
+
+    def list_messages(self, conversation_id, limit=None, before=None):
+        g = self.g
+        with g.lock:
+            keys = g.messages_by_conversation.get(conversation_id, [])
+            end = len(keys)
+            if before is not None:
+                anchor = _cursor_key(g.messages.get(before), "timestamp", before)
+                end = bisect.bisect_left(keys, anchor) if anchor else 0
+            start = 0 if limit is None else max(0, end - limit)
+            return [_message_json(g.messages[mid]) for _, mid in keys[start:end]]
+
+    def _other(self, cid: str, me: str) -> Optional[str]:
+        return next((u for u in self.g.participants.get(cid, ()) if u != me), None)
+
+    def _summary(self, cid: str, me: str) -> Dict[str, Any]:
+        g = self.g
+        other_id = self._other(cid, me)
+        other = g.users.get(other_id, {}) if other_id else {}
+        msgs = g.messages_by_conversation.get(cid, [])
+        last = g.messages[msgs[-1][1]] if msgs else None
+        return {
+            "id": cid,
+            "user": {
+                "id": other_id,
+                "username": other.get("username"),
+                "profile_pic": other.get("profile_pic") or other.get("avatar_url") or "",
+            },
+            "last_message": _message_json(last) if last else None,
+        }
+
+    def conversation_with(self, me, other):
+        g = self.g
+        with g.lock:
+            shared = g.user_conversations.get(me, set()) & g.user_conversations.get(other, set())
+            if not shared:
+                return None
+            summary = self._summary(next(iter(shared)), me)
+            return {"conversation_id": summary["id"], "user": summary["user"], "last_message": summary["last_message"]}
+
+    def list_conversations(self, me, limit, offset):
+        g = self.g
+        with g.lock:
+            # Like the Neo4j MATCH on the other participant: gone once they are deleted
+            convos = [
+                self._summary(cid, me)
+                for cid in g.user_conversations.get(me, ())
+                if g.messages_by_conversation.get(cid) and self._other(cid, me) in g.users
+            ]
+        convos.sort(key=lambda c: c["last_message"]["timestamp"] or "", reverse=True)
+        return convos[offset:offset + limit]
+
+    def mark_read(self, conversation_id, user_id):
+        g = self.g
+        with g.lock:
+            if user_id not in g.users:
+                return 0
+            marked = 0
+            for _, mid in g.messages_by_conversation.get(conversation_id, []):
+                readers = g.readers.setdefault(mid, set())
+                if g.messages[mid].get("receiver_id") == user_id and user_id not in readers:
+                    readers.add(user_id)
+                    marked += 1
+            return marked
+
+    def clear_conversation(self, conversation_id, cleared_at):
+        # Deleted right away rather than hidden; purge_cleared_batch has nothing left to do
+        g = self.g
+        with g.lock:
+            keys = list(g.messages_by_conversation.get(conversation_id, []))
+            for _, mid in [k for k in keys if k[0] <= cleared_at]:
+                g.remove_message(mid)
+            if conversation_id in g.conversations and not g.messages_by_conversation.get(conversation_id):
+                g.remove_conversation(conversation_id)
+            return len(keys)
+
+    def purge_cleared_batch(self, conversation_id, limit):
+        return 0
+
+    def conversation_ids_for(self, user_id):
+        with self.g.lock:
+            return list(self.g.user_conversations.get(user_id, set()))
+
+    def delete_sent_batch(self, user_id, limit):
+        g = self.g
+        with g.lock:
+            mids = list(g.sent_by.get(user_id, set()))[:limit]
+            cids = {g.message_conversation[mid] for mid in mids if mid in g.message_conversation}
+            for mid in mids:
+                g.remove_message(mid)
+            return len(mids), list(cids)
+
+    def prune_empty_conversations(self, conversation_ids):
+        g = self.g
+        with g.lock:
+            empty = [c for c in conversation_ids if c in g.conversations and not g.messages_by_conversation.get(c)]
+            for cid in empty:
+                g.remove_conversation(cid)
+            return len(empty)
+
+
+class MemoryBucketedMessageRepository(MemoryMessageRepository):
+    """Message pages read the way Neo4jBucketedMessageRepository reads them
+    (settings.MESSAGE_BUCKETS): from the cursor's bucket and at most
+    limit / MESSAGE_BUCKET_SIZE + 1 older ones. Everything else uses the
+    per-conversation lists, as without buckets."""
+
+    def create_message(self, conversation_id, message):
+        g = self.g
+        with g.lock:
+            created = super().create_message(conversation_id, message)
+            if created is None:
+                return None
+            buckets = g.message_buckets.setdefault(conversation_id, [])
+            if not buckets or buckets[-1]["count"] >= settings.MESSAGE_BUCKET_SIZE:
+                buckets.append({"first_at": message["timestamp"], "count": 0, "keys": []})
+            bucket = buckets[-1]
+            bucket["count"] += 1
+            bisect.insort(bucket["keys"], (message["timestamp"], message["id"]))
+            g.message_bucket[message["id"]] = (conversation_id, len(buckets) - 1)
+            return created
+
+    def list_messages(self, conversation_id, limit=None, before=None):
+        g = self.g
+        with g.lock:
+            buckets = g.message_buckets.get(conversation_id)
+            if not buckets:
+                return []
+            start, anchor = len(buckets) - 1, None
+            if before is not None:
+                # A message of another conversation only lends its id's time
+                loc = g.message_bucket.get(before)
+                own = loc is not None and loc[0] == conversation_id
+                anchor = _cursor_key(g.messages.get(before) if own else None, "timestamp", before)
+                if anchor is None:
+                    return []
+                if own:
+                    start = loc[1]
+                else:
+                    i = bisect.bisect_right([b["first_at"] for b in buckets], anchor[0]) - 1
+                    start = i if i >= 0 else start
+            low = 0 if not limit else max(0, start - (limit // settings.MESSAGE_BUCKET_SIZE + 1))
+            keys = sorted(k for b in buckets[low:start + 1] for k in b["keys"])
+            if anchor is not None:
+                keys = keys[:bisect.bisect_left(keys, anchor)]
+            if limit:
+                keys = keys[-limit:]
+            return [_message_json(g.messages[mid]) for _, mid in keys]
+
+
+def _message_json(m: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "id": m["id"],
+        "content": m["content"],
+        "timestamp": m.get("timestamp") or m.get("created_at"),
+        "sender_id": str(m["sender_id"]),
+    }
+
+
+class MemoryRecommendationRepository(RecommendationRepository):
+    def __init__(self, graph: MemoryGraph):
+        self.g = graph
+
+    def mark_stale(self, user_id, fanout):
+        g = self.g
+        with g.lock:
+            if user_id not in g.users:
+                return
+            g.recs_stale[user_id] = None
+            for i, follower in enumerate(g.followers.get(user_id, {})):
+                if i >= fanout:
+                    break
+                g.recs_stale[follower] = None
+
+    def claim_stale(self, limit):
+        with self.g.lock:
+            ids = list(self.g.recs_stale)[:limit]
+            for uid in ids:
+                del self.g.recs_stale[uid]
+            return ids
+
+    def refresh(self, user_id, limit, candidates):
+        g = self.g
+        with g.lock:
+            user = g.users.get(user_id)
+            if user is None:
+                return 0
+            followed = g.following.get(user_id, {})
+            counts: Dict[str, int] = {}
+            for middle in followed:
+                for c in g.following.get(middle, {}):
+                    if c != user_id and c not in followed:
+                        counts[c] = counts.get(c, 0) + 1
+            # Each source is capped at `candidates` before scoring, like the Cypher
+            mutuals = dict(sorted(counts.items(), key=lambda kv: -kv[1])[:candidates])
+            program = user.get("program")
+            if program is not None:
+                classmates = sorted(
+                    (uid for uid, u in g.users.items()
+                     if u.get("program") == program and uid != user_id and uid not in followed),
+                    key=lambda uid: -len(g.followers.get(uid, {})),
+                )[:candidates]
+                for uid in classmates:
+                    mutuals.setdefault(uid, 0)
+            scored = []
+            for uid, m in mutuals.items():
+                same = program is not None and g.users[uid].get("program") == program
+                scored.append((uid, recommendation_score(m, same, len(g.followers.get(uid, {}))), m, same))
+            scored.sort(key=lambda row: (-row[1], row[0]))
+            g.recommendations[user_id] = scored[:limit]
+            return len(g.recommendations[user_id])
+
+    def get(self, user_id, limit):
+        g = self.g
+        with g.lock:
+            stored = g.recommendations.get(user_id)
+            if stored is None:
+                return None
+            followed = g.following.get(user_id, {})
+            rows = []
+            for uid, score, mutuals, same in stored:
+                user = g.users.get(uid)
+                if user is None or uid in followed:
+                    continue
+                rows.append({
+                    "id": uid,
+                    "username": user.get("username"),
+                    "name": user.get("name"),
+                    "bio": user.get("bio"),
+                    "profile_pic": user.get("avatar_url"),
+                    "followers_count": len(g.followers.get(uid, {})),
+                    "mutual_count": mutuals,
+                    "same_program": same,
+                    "score": score,
+                })
+                if len(rows) >= limit:
+                    break
+            return rows
+
+
+class MemoryOutboxRepository(OutboxRepository):
+    """Outbox kept in process memory: survives worker restarts only as long as the process."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.items: Dict[str, Dict[str, Any]] = {}
+
+    def enqueue(self, email):
+        with self.lock:
+            self.items[email["id"]] = {**email, "status": "pending"}
+
+    def claim(self, now, limit, lease_seconds):
+        with self.lock:
+            due = [
+                e for e in self.items.values()
+                if (e["status"] == "pending" and e["next_attempt_at"] <= now)
+                or (e["status"] == "sending" and e["lease_until"] <= now)
+            ]
+            due.sort(key=lambda e: e["next_attempt_at"])
+            for e in due[:limit]:
+                e["status"] = "sending"
+                e["lease_until"] = now + lease_seconds
+            return [dict(e) for e in due[:limit]]
+
+    def complete(self, email_ids):
+        with self.lock:
+            for email_id in email_ids:
+                self.items.pop(email_id, None)
+
+    def retry(self, email_id, attempts, next_attempt_at, error):
+        with self.lock:
+            e = self.items.get(email_id)
+            if e is not None:
+                e.update(status="pending", attempts=attempts, next_attempt_at=next_attempt_at, last_error=error)
+
+    def fail(self, email_id, attempts, error):
+        with self.lock:
+            e = self.items.get(email_id)
+            if e is not None:
+                e.update(status="dead", attempts=attempts, last_error=error)
+
+
+class MemoryJobRepository(JobRepository):
+    """Jobs kept in process memory: a restart loses them, unlike the Neo4j backend."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.items: Dict[str, Dict[str, Any]] = {}
+
+    def create(self, job):
+        with self.lock:
+            self.items[job["id"]] = dict(job)
+
+    def get(self, job_id):
+        with self.lock:
+            job = self.items.get(job_id)
+            return dict(job) if job is not None else None
+
+    def list_recent(self, limit):
+        with self.lock:
+            jobs = sorted(self.items.values(), key=lambda j: j["created_at"], reverse=True)
+            return [dict(j) for j in jobs[:limit]]
+
+    def claim(self, now, lease_seconds):
+        with self.lock:
+            due = [
+                j for j in self.items.values()
+                if j["status"] == "queued" or (j["status"] == "running" and j.get("lease_until", 0) <= now)
+            ]
+            if not due:
+                return None
+            job = min(due, key=lambda j: j["created_at"])
+            job.update(status="running", lease_until=now + lease_seconds, lease_token=uuid.uuid4().hex,
+                       attempts=(job.get("attempts") or 0) + 1)
+            job.setdefault("started_at", now_iso())
+            return dict(job)
+
+    def _leased(self, job_id, lease_token):
+        job = self.items.get(job_id)
+        if job is None or job["status"] != "running" or job.get("lease_token") != lease_token:
+            return None
+        return job
+
+    def checkpoint(self, job_id, lease_token, state, progress, lease_until):
+        with self.lock:
+            job = self._leased(job_id, lease_token)
+            if job is None:
+                return False
+            job.update(state=dict(state), progress=dict(progress), lease_until=lease_until)
+            return True
+
+    def release(self, job_id, lease_token, error):
+        with self.lock:
+            job = self._leased(job_id, lease_token)
+            if job is not None:
+                job.update(status="queued", error=error)
+                job.pop("lease_until", None)
+                job.pop("lease_token", None)
+
+    def finish(self, job_id, lease_token, status, result, error, finished_at):
+        with self.lock:
+            job = self._leased(job_id, lease_token)
+            if job is not None:
+                job.update(status=status, result=result, error=error, finished_at=finished_at)
+                job.pop("lease_until", None)
+                job.pop("lease_token", None)
+
+
+class MemoryRevocationRepository(RevocationRepository):
+    """Revocations kept in process memory: a restart forgets them, unlike the Neo4j backend."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.entries: Dict[str, float] = {}
+
+    def add(self, key, expires_at):
+        with self.lock:
+            added = key not in self.entries
+            self.entries[key] = max(expires_at, self.entries.get(key, 0.0))
+            return added
+
+    def any_revoked(self, keys, now):
+        with self.lock:
+            return any(self.entries.get(k, 0.0) > now for k in keys)
+
+    def prune(self, now, limit):
+        with self.lock:
+            expired = [k for k, exp in self.entries.items() if exp <= now][:limit]
+            for k in expired:
+                del self.entries[k]
+            return len(expired)
+
+
+class MemoryRepositories(Repositories):
+    def __init__(self, graph: Optional[MemoryGraph] = None):
+        self.graph = graph or MemoryGraph()
+        super().__init__(
+            users=MemoryUserRepository(self.graph),
+            follows=MemoryFollowRepository(self.graph),
+            posts=MemoryPostRepository(self.graph),
+            comments=MemoryCommentRepository(self.graph),
+            messages=(MemoryBucketedMessageRepository if settings.MESSAGE_BUCKETS else MemoryMessageRepository)(self.graph),
+            outbox=MemoryOutboxRepository(),
+            recommendations=MemoryRecommendationRepository(self.graph),
+            jobs=MemoryJobRepository(),
+            revocations=MemoryRevocationRepository(),
+        )
@@ -0,0 +1,1749 @@
+"""Neo4j implementation of the repositories.
+
+Queries start with a `// repo.method` comment, which names them in the
+query metrics and the slow-query log.
+"""
+import json
+import logging
+import uuid
+from typing import Any, Dict, Optional
+
+from fastapi import HTTPException
+from neo4j.exceptions import ConstraintError
+from neo4j.time import DateTime
+
+from app.core.config import settings
+from app.core.database import db, run_query, run_single
+from app.core.fields import build_projection
+from app.core.ids import id_time
+from app.core.ranking import MUTUAL_WEIGHT, PROGRAM_WEIGHT
+from app.core.text_search import lucene_all_terms_query, lucene_prefix_query, tokenize, user_search_text
+from app.core.timestamps import format_ts, parse_ts, utc_now
+from app.repositories.base import (
+    CommentRepository,
+    DuplicateUserError,
+    FollowRepository,
+    JobRepository,
+    MessageRepository,
+    OutboxRepository,
+    PostRepository,
+    RecommendationRepository,
+    Repositories,
+    RevocationRepository,
+    UserRepository,
+)
+
+logger = logging.getLogger(__name__)
+
+# Cypher for each `?fields=` name. Follow status and pinned posts are
+# sub-queries, so they only run when the caller actually asks for them.
+USER_FIELD_EXPRESSIONS = {
+    "id": "u.id",
+    "username": "u.username",
+    "bio": "u.bio",
+    "profile_pic": "u.avatar_url",
+    # Maintained by follow/unfollow (see Neo4jFollowRepository)
+    "followers_count": "coalesce(u.followers_count, 0)",
+    "following_count": "coalesce(u.following_count, 0)",
+    "is_following": "($me IS NOT NULL AND EXISTS { (:User {id: $me})-[:FOLLOWS]->(u) })",
+    "pinned_posts": "[(u)-[:PINNED]->(p:Post) | properties(p)]",
+}
+
+POST_FIELD_EXPRESSIONS = {
+    "id": "p.id",
+    "content": "p.content",
+    "image_url": "p.image_url",
+    "created_at": "p.created_at",
+    "user": "properties(u)",
+    "likes_count": "COUNT { (p)<-[:LIKED]-(:User) }",
+    "comments_count": "COUNT { (:Comment)-[:ON_POST]->(p) }",
+}
+
+
+# Stored on User nodes but never served
+PRIVATE_USER_FIELDS = ("password", "search_text")
+
+
+# People directory sort keys (indexed, see ensure_schema)
+USER_SORT_KEYS = {
+    "newest": "u.created_at",
+    "followers": "u.followers_count",
+}
+
+
+# Stored as native DATETIME; repository dicts carry app.core.timestamps strings
+TIMESTAMP_FIELDS = frozenset((
+    "created_at", "updated_at", "verified_at", "timestamp", "deleted_at",
+    "cleared_at", "computed_at", "started_at", "finished_at",
+))
+
+
+def _to_db(props: Dict[str, Any]) -> Dict[str, Any]:
+    """`props` with its timestamp strings parsed, ready to write."""
+    return {k: parse_ts(v) if k in TIMESTAMP_FIELDS and isinstance(v, str) else v for k, v in props.items()}
+
+
+def _plain(value: Any) -> Any:
+    """`value` with DATETIMEs (at any depth) as canonical timestamp strings."""
+    if isinstance(value, DateTime):
+        return format_ts(value.to_native())
+    if isinstance(value, dict):
+        return {k: _plain(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_plain(v) for v in value]
+    return value
+
+
+def _cursor_ts(value: Any):
+    """A timestamp sort key taken back from a client cursor."""
+    try:
+        return parse_ts(value)
+    except (TypeError, ValueError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def _user_dict(node) -> Dict[str, Any]:
+    u = _plain(dict(node))
+    for key in PRIVATE_USER_FIELDS:
+        u.pop(key, None)
+    return u
+
+
+def _post_with_stats(rec) -> Dict[str, Any]:
+    p = _plain(dict(rec["p"]))
+    p["user"] = _user_dict(rec["u"])
+    p["likes_count"] = rec["likes_count"]
+    p["comments_count"] = rec["comments_count"]
+    return p
+
+
+class Neo4jUserRepository(UserRepository):
+    def _get_one(self, cypher: str, **params) -> Optional[Dict[str, Any]]:
+        with db.get_session() as session:
+            rec = session.run(cypher, **params).single()
+        if not rec:
+            return None
+        u = _plain(dict(rec["u"]))
+        u.pop("search_text", None)
+        return u
+
+    def get_by_id(self, user_id):
+        return self._get_one("// users.get_by_id\nMATCH (u:User {id: $id}) RETURN u", id=user_id)
+
+    def get_by_username(self, username):
+        return self._get_one("// users.get_by_username\nMATCH (u:User {username: $username}) RETURN u", username=username)
+
+    def get_by_email(self, email):
+        return self._get_one("// users.get_by_email\nMATCH (u:User {email: $email}) RETURN u", email=email)
+
+    def get_by_verification_token(self, token):
+        return self._get_one(
+            "// users.get_by_verification_token\nMATCH (u:User {verification_token: $token}) RETURN u", token=token
+        )
+
+    def create(self, user):
+        # Uniqueness of email/username is enforced by constraints (see ensure_schema)
+        try:
+            with db.get_session() as session:
+                session.run(
+                    "// users.create\nCREATE (u:User $props)",
+                    props={
+                        **_to_db(user),
+                        "search_text": user_search_text(user.get("username"), user.get("name")),
+                        "followers_count": 0,
+                        "following_count": 0,
+                    },
+                ).consume()
+        except ConstraintError:
+            raise DuplicateUserError()
+
+    def update(self, user_id, updates):
+        updates = _to_db(updates)
+        renamed = [k for k in ("username", "name") if k in updates]
+        # Set when only one of the names changes: the typeahead text needs the
+        # other one too, and the write only goes through if it is still as read
+        kept = {"username": "name", "name": "username"}[renamed[0]] if len(renamed) == 1 else None
+        try:
+            with db.get_session() as session:
+                while True:
+                    kept_value = None
+                    if renamed:
+                        names = {k: updates.get(k) for k in ("username", "name")}
+                        if kept:
+                            current = session.run(
+                                "// users.update_names\nMATCH (u:User {id: $id}) RETURN u.username AS username, u.name AS name",
+                                id=user_id,
+                            ).single()
+                            if current is None:
+                                return None
+                            kept_value = names[kept] = current[kept]
+                        updates["search_text"] = user_search_text(names["username"], names["name"])
+                    rec = session.run(
+                        """
+                        // users.update
+                        MATCH (u:User {id: $id})
+                        WHERE $kept IS NULL OR coalesce(u[$kept], '') = coalesce($kept_value, '')
+                        SET u += $updates
+                        RETURN u
+                        """,
+                        id=user_id, kept=kept, kept_value=kept_value, updates=updates,
+                    ).single()
+                    if rec or not kept:
+                        break
+                    # The other name changed since it was read: read it again
+        except ConstraintError:
+            raise DuplicateUserError()
+        return _user_dict(rec["u"]) if rec else None
+
+    def mark_email_verified(self, user_id, email, verified_at):
+        # Already-verified users keep their original verified_at
+        with db.get_session() as session:
+            rec = session.run(
+                """
+                // users.mark_email_verified
+                MATCH (u:User {id: $id})
+                WHERE u.email = $email
+                SET u.verified_at = CASE WHEN u.email_verified THEN u.verified_at ELSE $verified_at END,
+                    u.email_verified = true,
+                    u.verification_token = null
+                RETURN u.id AS id
+                """,
+                id=user_id,
+                email=email,
+                verified_at=parse_ts(verified_at),
+            ).single()
+        return rec is not None
+
+    def list_users(self, fields, me, limit, sort="newest", after=None):
+        key = USER_SORT_KEYS[sort]
+        after_key = after[0] if after else None
+        if after_key is not None and sort == "newest":
+            after_key = _cursor_ts(after_key)
+        with db.get_session() as session:
+            # ORDER BY on an indexed property, so only the page is read
+            results = session.run(
+                f"""
+                // users.list.{sort}
+                MATCH (u:User)
+                WHERE {key} IS NOT NULL
+                  AND ($after_key IS NULL OR {key} < $after_key OR ({key} = $after_key AND u.id < $after_id))
+                WITH u
+                ORDER BY {key} DESC, u.id DESC
+                LIMIT $limit
+                RETURN {build_projection(fields, USER_FIELD_EXPRESSIONS)}, {key} AS _key, u.id AS _id
+                """,
+                me=me,
+                limit=limit,
+                after_key=after_key,
+                after_id=after[1] if after else None,
+            )
+            return [_plain(r.data()) for r in results]
+
+    def get_profile(self, user_id, fields, me):
+        with db.get_session() as session:
+            rec = session.run(
+                f"""
+                // users.get_profile
+                MATCH (u:User {{id: $id}})
+                RETURN {build_projection(fields, USER_FIELD_EXPRESSIONS)}
+                """,
+                id=user_id,
+                me=me,
+            ).single()
+        return _plain(rec.data()) if rec else None
+
+    def get_own_profile(self, user_id):
+        with db.get_session() as session:
+            rec = session.run(
+                """
+                // users.get_own_profile
+                MATCH (u:User {id: $id})
+                RETURN u, [(u)-[:PINNED]->(p:Post) | properties(p)] AS pinned_posts
+                """,
+                id=user_id,
+            ).single()
+        if not rec:
+            return None
+        user = _user_dict(rec["u"])
+        user["followers_count"] = user.get("followers_count") or 0
+        user["following_count"] = user.get("following_count") or 0
+        user["pinned_posts"] = _plain(rec["pinned_posts"])
+        return user
+
+    def get_public(self, user_id):
+        # Try APOC for safe property access, fall back to plain COALESCE
+        try:
+            urec = run_single(
+                """
+                // users.get_public
+                MATCH (u:User {id:$id})
+                RETURN u.id as id,
+                       u.username as username,
+                       coalesce(apoc.property(u, 'profile_pic'), u.avatar_url, '') as profile_pic
+                """,
+                id=user_id,
+            )
+        except Exception:
+            urec = run_single(
+                """
+                // users.get_public
+                MATCH (u:User {id:$id})
+                RETURN u.id as id,
+                       u.username as username,
+                       COALESCE(u.profile_pic, u.avatar_url, '') as profile_pic
+                """,
+                id=user_id,
+            )
+        if not urec:
+            return None
+        return {"id": urec["id"], "username": urec.get("username"), "profile_pic": urec.get("profile_pic")}
+
+    def pinned_posts(self, user_id):
+        with db.get_session() as session:
+            pinned = session.run(
+                "// users.pinned_posts\nMATCH (u:User {id: $id})-[:PINNED]->(p:Post) RETURN p", id=user_id
+            )
+            return [_plain(dict(r["p"])) for r in pinned]
+
+    def search(self, query, me, limit, after=None):
+        tokens = tokenize(query)
+        if not tokens:
+            return []
+        # Ranking mirrors app.core.text_search.user_match_tier / user_search_rank
+        results = run_query(
+            """
+            // users.search
+            CALL db.index.fulltext.queryNodes('user_search', $lucene, {limit: $candidates})
+            YIELD node AS u
+            WITH u, split(u.search_text, ' ') AS terms
+            WITH u,
+                 CASE WHEN terms[0] = $compact THEN 3
+                      WHEN terms[0] STARTS WITH $compact THEN 2
+                      WHEN all(t IN $tokens WHERE any(w IN terms WHERE w STARTS WITH t)) THEN 1
+                      ELSE 0 END AS tier,
+                 coalesce(u.followers_count, 0) AS followers_count,
+                 COUNT { (:User {id: $me})-[:FOLLOWS]->(:User)-[:FOLLOWS]->(u) } AS mutual_count
+            WITH u, followers_count, mutual_count,
+                 round(tier * 100 + 5 * log(1 + mutual_count) + log(1 + followers_count), 6) AS rank
+            WHERE $after_rank IS NULL OR rank < $after_rank OR (rank = $after_rank AND u.id > $after_id)
+            RETURN u.id AS id, u.username AS username, u.name AS name, u.bio AS bio,
+                   u.avatar_url AS profile_pic, followers_count, mutual_count, rank
+            ORDER BY rank DESC, id
+            LIMIT $limit
+            """,
+            lucene=lucene_prefix_query(tokens),
+            candidates=settings.USER_SEARCH_CANDIDATES,
+            tokens=tokens,
+            compact="".join(tokens),
+            me=me,
+            after_rank=after[0] if after else None,
+            after_id=after[1] if after else None,
+            limit=limit,
+        )
+        return [r.data() for r in results]
+
+    def detach_follows(self, user_id, limit):
+        rec = run_single(
+            """
+            // users.delete.follows_batch
+            MATCH (u:User {id: $id})-[r:FOLLOWS]-(f:User)
+            WITH u, r, f LIMIT $limit
+            SET f.followers_count = CASE WHEN startNode(r) = u AND f <> u
+                                         THEN coalesce(f.followers_count, 1) - 1 ELSE f.followers_count END,
+                f.following_count = CASE WHEN endNode(r) = u AND f <> u
+                                         THEN coalesce(f.following_count, 1) - 1 ELSE f.following_count END
+            DELETE r
+            RETURN count(*) AS removed
+            """,
+            id=user_id, limit=int(limit),
+        )
+        return int(rec["removed"]) if rec else 0
+
+    def delete(self, user_id):
+        rec = run_single(
+            """
+            // users.delete.user
+            MATCH (u:User {id: $id})
+            CALL {
+                WITH u
+                MATCH (r:UserRecommendations {user_id: u.id})
+                DELETE r
+            }
+            DETACH DELETE u
+            RETURN count(*) AS deleted
+            """,
+            id=user_id,
+        )
+        return bool(rec and rec["deleted"])
+
+
+class Neo4jFollowRepository(FollowRepository):
+    # The degree counters change in the same write as the relationship,
+    # and only when it is actually created/deleted, so repeats are no-ops
+    def follow(self, follower_id, user_id):
+        with db.get_session() as session:
+            session.run(
+                """
+                // follows.follow
+                MATCH (me:User {id: $me}), (u:User {id: $uid})
+                MERGE (me)-[r:FOLLOWS]->(u)
+                ON CREATE SET r.created_at = $at,
+                              me.following_count = coalesce(me.following_count, 0) + 1,
+                              u.followers_count = coalesce(u.followers_count, 0) + 1
+                """,
+                me=follower_id, uid=user_id, at=utc_now()
+            ).consume()
+
+    def unfollow(self, follower_id, user_id):
+        with db.get_session() as session:
+            session.run(
+                """
+                // follows.unfollow
+                MATCH (me:User {id: $me})-[r:FOLLOWS]->(u:User {id: $uid})
+                DELETE r
+                SET me.following_count = coalesce(me.following_count, 1) - 1,
+                    u.followers_count = coalesce(u.followers_count, 1) - 1
+                """,
+                me=follower_id, uid=user_id
+            ).consume()
+
+    def _page(self, name, pattern, user_id, limit, after):
+        # Follows from before r.created_at was recorded sort last (as the epoch), by id
+        with db.get_session() as session:
+            recs = session.run(
+                f"""
+                // follows.{name}
+                MATCH {pattern}
+                WITH f, coalesce(r.created_at, datetime({epochMillis: 0})) AS since
+                WHERE $after_key IS NULL OR since < $after_key OR (since = $after_key AND f.id < $after_id)
+                WITH f, since
+                ORDER BY since DESC, f.id DESC
+                LIMIT $limit
+                RETURN f, since
+                """,
+                id=user_id,
+                limit=limit,
+                after_key=_cursor_ts(after[0]) if after else None,
+                after_id=after[1] if after else None,
+            )
+            rows = []
+            for r in recs:
+                row = _user_dict(r["f"])
+                row["_key"], row["_id"] = _plain(r["since"]), row["id"]
+                rows.append(row)
+            return rows
+
+    def followers(self, user_id, limit, after=None):
+        return self._page("followers", "(:User {id: $id})<-[r:FOLLOWS]-(f:User)", user_id, limit, after)
+
+    def following(self, user_id, limit, after=None):
+        return self._page("following", "(:User {id: $id})-[r:FOLLOWS]->(f:User)", user_id, limit, after)
+
+    def follow_status(self, me, user_ids):
+        with db.get_session() as session:
+            recs = session.run(
+                """
+                // follows.status
+                MATCH (me:User {id: $me})
+                UNWIND $ids AS uid
+                MATCH (u:User {id: uid})
+                RETURN u.id AS id,
+                       EXISTS { (me)-[:FOLLOWS]->(u) } AS following,
+                       EXISTS { (u)-[:FOLLOWS]->(me) } AS followed_by
+                """,
+                me=me,
+                ids=user_ids,
+            )
+            return {r["id"]: {"following": r["following"], "followed_by": r["followed_by"]} for r in recs}
+
+
+class Neo4jPostRepository(PostRepository):
+    def create(self, author, post):
+        with db.get_session() as session:
+            session.run(
+                """
+                // posts.create
+                MERGE (u:User {id: $author_id})
+                ON CREATE SET u.name = $name, u.username = $username, u.avatar_url = $avatar_url
+                CREATE (p:Post $props)
+                MERGE (u)-[:AUTHORED]->(p)
+                """,
+                author_id=author["id"],
+                name=author.get("name"),
+                username=author.get("username"),
+                avatar_url=author.get("avatar_url"),
+                props=_to_db(post),
+            )
+
+    def list_posts(self, fields, user_id, limit=None, before=None):
+        author = "(u:User {id: $uid})" if user_id else "(u:User)"
+        # The cursor is a post id: its row, or the time in the id once the post
+        # is gone, gives the (created_at, id) key to continue from
+        with db.get_session() as session:
+            results = session.run(
+                f"""
+                // posts.list
+                OPTIONAL MATCH (b:Post {{id: $before}})
+                WITH coalesce(b.created_at, $before_at) AS before_at
+                MATCH {author}-[:AUTHORED]->(p:Post)
+                WHERE $before IS NULL OR p.created_at < before_at OR (p.created_at = before_at AND p.id < $before)
+                WITH p, u
+                ORDER BY p.created_at DESC, p.id DESC
+                {"LIMIT $limit" if limit else ""}
+                RETURN {build_projection(fields, POST_FIELD_EXPRESSIONS)}
+                """,
+                uid=user_id,
+                before=before,
+                before_at=id_time(before) if before else None,
+                limit=limit,
+            )
+            posts = []
+            for record in results:
+                p = _plain(record.data())
+                if p.get("user") is not None:
+                    for key in PRIVATE_USER_FIELDS:
+                        p["user"].pop(key, None)
+                posts.append(p)
+            return posts
+
+    def get(self, post_id):
+        with db.get_session() as session:
+            rec = session.run(
+                """
+                // posts.get
+                MATCH (u:User)-[:AUTHORED]->(p:Post {id: $id})
+                OPTIONAL MATCH (p)<-[:LIKED]-(l:User)
+                OPTIONAL MATCH (c:Comment)-[:ON_POST]->(p)
+                RETURN p, u,
+                       count(DISTINCT l) as likes_count,
+                       count(DISTINCT c) as comments_count
+                """,
+                id=post_id,
+            ).single()
+        return _post_with_stats(rec) if rec else None
+
+    def exists(self, post_id):
+        with db.get_session() as session:
+            rec = session.run("// posts.exists\nMATCH (p:Post {id: $id}) RETURN p.id AS id", id=post_id).single()
+        return rec is not None
+
+    def is_author(self, user_id, post_id):
+        with db.get_session() as session:
+            rel = session.run(
+                "// posts.is_author\nMATCH (u:User {id: $uid})-[:AUTHORED]->(p:Post {id: $pid}) RETURN p.id AS id",
+                uid=user_id, pid=post_id,
+            ).single()
+        return rel is not None
+
+    def update(self, post_id, updates):
+        with db.get_session() as session:
+            session.run("""
+                // posts.update
+                MATCH (p:Post {id: $id})
+                SET p += $updates
+            """, id=post_id, updates=_to_db(updates))
+
+    def delete(self, post_id):
+        # Swapping the label is one node write however large the post's subgraph
+        # is; every read matches :Post, so the post, its comments and likes vanish
+        run_query(
+            """
+            // posts.delete
+            MATCH (p:Post {id: $id})
+            REMOVE p:Post
+            SET p:DeletedPost, p.deleted_at = $now
+            """,
+            id=post_id, now=utc_now(),
+        )
+
+    def purge_batch(self, post_id, limit):
+        for cypher in (
+            """
+            // posts.purge.comments
+            MATCH (c)-[:ON_POST]->(:DeletedPost {id: $id})
+            WITH c LIMIT $limit
+            DETACH DELETE c
+            RETURN count(*) AS removed
+            """,
+            """
+            // posts.purge.likes
+            MATCH (:DeletedPost {id: $id})<-[r:LIKED]-()
+            WITH r LIMIT $limit
+            DELETE r
+            RETURN count(*) AS removed
+            """,
+            """
+            // posts.purge.post
+            MATCH (p:DeletedPost {id: $id})
+            DETACH DELETE p
+            RETURN count(*) AS removed
+            """,
+        ):
+            rec = run_single(cypher, id=post_id, limit=int(limit))
+            removed = int(rec["removed"]) if rec else 0
+            if removed:
+                return removed
+        return 0
+
+    def like(self, user_id, post_id):
+        with db.get_session() as session:
+            session.run(
+                """
+                // posts.like
+                MATCH (u:User {id: $uid}), (p:Post {id: $pid})
+                MERGE (u)-[:LIKED]->(p)
+                """,
+                uid=user_id,
+                pid=post_id,
+            )
+            count_rec = session.run(
+                "// posts.like_count\nMATCH (:User)-[:LIKED]->(p:Post {id: $pid}) RETURN count(*) as likes",
+                pid=post_id,
+            ).single()
+        return count_rec["likes"]
+
+    def feed_for(self, user_id):
+        with db.get_session() as session:
+            results = session.run(
+                """
+                // posts.feed
+                MATCH (me:User {id: $me})-[:FOLLOWS]->(u:User)-[:AUTHORED]->(p:Post)
+                RETURN p ORDER BY p.created_at DESC, p.id DESC
+                """,
+                me=user_id
+            )
+            return [_plain(dict(r["p"])) for r in results]
+
+    def search(self, query, as_of, limit, after=None):
+        tokens = tokenize(query)
+        if not tokens:
+            return []
+        # Ranking mirrors app.core.text_search.recency_rank
+        results = run_query(
+            """
+            // posts.search
+            CALL db.index.fulltext.queryNodes('content_search', $lucene, {limit: $candidates})
+            YIELD node, score
+            OPTIONAL MATCH (node:Comment)-[:ON_POST]->(cp:Post)
+            WITH CASE WHEN node:Post THEN node ELSE cp END AS p,
+                 CASE WHEN node:Post THEN score ELSE score * $comment_weight END AS weighted,
+                 CASE WHEN node:Comment THEN node {.id, .content} END AS matched_comment
+            WHERE p IS NOT NULL
+            WITH p, max(weighted) AS relevance, collect(matched_comment)[..3] AS matched_comments
+            MATCH (u:User)-[:AUTHORED]->(p)
+            WITH p, u, matched_comments, relevance,
+                 duration.inSeconds(p.created_at, datetime({epochSeconds: $as_of})).seconds AS age
+            WITH p, u, matched_comments,
+                 round(relevance / (1 + (CASE WHEN age > 0 THEN age ELSE 0 END) / 86400.0 / $recency_days), 6) AS rank
+            WHERE $after_rank IS NULL OR rank < $after_rank OR (rank = $after_rank AND p.id > $after_id)
+            WITH p, u, matched_comments, rank
+            ORDER BY rank DESC, p.id
+            LIMIT $limit
+            RETURN p, u, matched_comments, rank,
+                   COUNT { (p)<-[:LIKED]-(:User) } AS likes_count,
+                   COUNT { (:Comment)-[:ON_POST]->(p) } AS comments_count
+            """,
+            lucene=lucene_all_terms_query(tokens),
+            candidates=settings.POST_SEARCH_CANDIDATES,
+            comment_weight=settings.POST_SEARCH_COMMENT_WEIGHT,
+            recency_days=settings.POST_SEARCH_RECENCY_DAYS,
+            as_of=int(as_of),
+            after_rank=after[0] if after else None,
+            after_id=after[1] if after else None,
+            limit=limit,
+        )
+        rows = []
+        for r in results:
+            post = _post_with_stats(r)
+            post["matched_comments"] = r["matched_comments"]
+            post["rank"] = r["rank"]
+            rows.append(post)
+        return rows
+
+
+class Neo4jCommentRepository(CommentRepository):
+    def create(self, user_id, post_id, comment):
+        with db.get_session() as session:
+            session.run(
+                """
+                // comments.create
+                MERGE (u:User {id: $uid})
+                WITH u
+                MATCH (p:Post {id: $pid})
+                CREATE (c:Comment $props)
+                MERGE (u)-[:AUTHORED]->(c)
+                MERGE (c)-[:ON_POST]->(p)
+                """,
+                uid=user_id,
+                pid=post_id,
+                props=_to_db(comment),
+            )
+
+    def list_for_post(self, post_id, limit=None, after=None):
+        with db.get_session() as session:
+            results = session.run(
+                f"""
+                // comments.list_for_post
+                OPTIONAL MATCH (a:Comment {{id: $after}})
+                WITH coalesce(a.created_at, $after_at) AS after_at
+                MATCH (u:User)-[:AUTHORED]->(c:Comment)-[:ON_POST]->(p:Post {{id: $pid}})
+                WHERE $after IS NULL OR c.created_at > after_at OR (c.created_at = after_at AND c.id > $after)
+                RETURN c, u
+                ORDER BY c.created_at ASC, c.id ASC
+                {"LIMIT $limit" if limit else ""}
+                """,
+                pid=post_id,
+                after=after,
+                after_at=id_time(after) if after else None,
+                limit=limit,
+            )
+            comments = []
+            for record in results:
+                comment = _plain(dict(record["c"]))
+                comment["user"] = _user_dict(record["u"])
+                comments.append(comment)
+            return comments
+
+    def is_author(self, user_id, comment_id):
+        with db.get_session() as session:
+            record = session.run(
+                """
+                // comments.is_author
+                MATCH (u:User {id: $uid})-[:AUTHORED]->(c:Comment {id: $cid})
+                RETURN c.id AS id
+                """,
+                uid=user_id,
+                cid=comment_id,
+            ).single()
+        return record is not None
+
+    def update(self, comment_id, content, updated_at):
+        with db.get_session() as session:
+            session.run(
+                """
+                // comments.update
+                MATCH (c:Comment {id: $cid})
+                SET c.content = $content,
+                    c.updated_at = $updated_at
+                """,
+                cid=comment_id,
+                content=content,
+                updated_at=parse_ts(updated_at),
+            )
+
+    def delete(self, comment_id):
+        run_query(
+            """
+            // comments.delete
+            MATCH (c:Comment {id: $cid})
+            REMOVE c:Comment
+            SET c:DeletedComment, c.deleted_at = $now
+            """,
+            cid=comment_id, now=utc_now(),
+        )
+
+    def purge(self, comment_id):
+        rec = run_single(
+            """
+            // comments.purge
+            MATCH (c:DeletedComment {id: $cid})
+            DETACH DELETE c
+            RETURN count(*) AS removed
+            """,
+            cid=comment_id,
+        )
+        return int(rec["removed"]) if rec else 0
+
+
+def _last_message_json(r) -> Optional[Dict[str, Any]]:
+    if not r["mid"]:
+        return None
+    return {"id": r["mid"], "content": r["mcontent"], "timestamp": _plain(r["mcreated"]), "sender_id": r["msender"]}
+
+
+class Neo4jMessageRepository(MessageRepository):
+    def ensure_user(self, user_id, username=None, profile_pic=None):
+        cypher = (
+            "// messages.ensure_user\n"
+            "MERGE (u:User {id: $id})\n"
+            "ON CREATE SET u.username = COALESCE($username, $id), u.profile_pic = COALESCE($profile_pic, null)\n"
+            "RETURN u.id as id"
+        )
+        run_query(cypher, id=str(user_id), username=username, profile_pic=profile_pic)
+
+    def ensure_conversation(self, conversation_id, me, other, now):
+        cypher = (
+            "// messages.ensure_conversation\n"
+            "MERGE (c:Conversation {id: $cid})\n"
+            "  ON CREATE SET c.created_at = $now\n"
+            "WITH c\n"
+            "MATCH (u1:User {id: $me})\n"
+            "MATCH (u2:User {id: $other})\n"
+            "MERGE (u1)-[:PARTICIPATES_IN]->(c)\n"
+            "MERGE (u2)-[:PARTICIPATES_IN]->(c)\n"
+            "RETURN c.id as id, c.created_at as created_at"
+        )
+        rec = run_single(cypher, cid=conversation_id, now=parse_ts(now), me=str(me), other=str(other))
+        return {"id": rec["id"], "created_at": _plain(rec["created_at"])} if rec else None
+
+    def participants(self, conversation_id):
+        cypher = (
+            "// messages.participants\n"
+            "MATCH (u:User)-[:PARTICIPATES_IN]->(c:Conversation {id: $cid}) RETURN u.id as id"
+        )
+        return [str(r["id"]) for r in run_query(cypher, cid=conversation_id)]
+
+    def create_message(self, conversation_id, message):
+        cypher = (
+            "// messages.create\n"
+            "MATCH (c:Conversation {id: $cid})\n"
+            "MATCH (s:User {id: $sid})\n"
+            "MATCH (r:User {id: $rid})\n"
+            "CREATE (m:Message {id: $mid, content: $content, timestamp: $now, created_at: $now, sender_id: $sid, receiver_id: $rid})\n"
+            "MERGE (s)-[:SENT]->(m)\n"
+            "MERGE (c)-[:HAS_MESSAGE]->(m)\n"
+            "RETURN m.id as id, m.content as content, m.timestamp as timestamp, m.sender_id as sender_id"
+        )
+        rec = run_single(
+            cypher,
+            cid=str(conversation_id),
+            sid=str(message["sender_id"]),
+            rid=str(message["receiver_id"]),
+            mid=message["id"],
+            content=message["content"],
+            now=parse_ts(message["timestamp"]),
+        )
+        if not rec:
+            return None
+        return {
+            "id": rec["id"],
+            "content": rec["content"],
+            "timestamp": _plain(rec["timestamp"]),
+            "sender_id": str(rec["sender_id"]),
+        }
+
+    def list_messages(self, conversation_id, limit=None, before=None):
+        # A page is the latest `limit` before the cursor message, returned oldest first
+        cypher = (
+            "// messages.list\n"
+            "OPTIONAL MATCH (b:Message {id: $before})\n"
+            "WITH coalesce(b.timestamp, b.created_at, $before_at) AS before_at\n"
+            "MATCH (c:Conversation {id: $cid})-[:HAS_MESSAGE]->(m:Message)\n"
+            "WITH c, m, before_at, COALESCE(m.timestamp, m.created_at) AS ts\n"
+            "WHERE (c.cleared_at IS NULL OR ts > c.cleared_at)\n"
+            "  AND ($before IS NULL OR ts < before_at OR (ts = before_at AND m.id < $before))\n"
+            + ("WITH m, ts ORDER BY ts DESC, m.id DESC LIMIT $limit\n" if limit else "")
+            + "RETURN m.id as id, m.content as content, ts as timestamp, m.sender_id as sender_id\n"
+            "ORDER BY timestamp ASC, id ASC"
+        )
+        rows = run_query(
+            cypher, cid=str(conversation_id), before=before,
+            before_at=id_time(before) if before else None, limit=limit,
+        )
+        return [
+            {
+                "id": r["id"],
+                "content": r["content"],
+                "timestamp": _plain(r["timestamp"]),
+                "sender_id": str(r["sender_id"]),
+            }
+            for r in rows
+        ]
+
+    def conversation_with(self, me, other):
+        # Try APOC for safe property access
+        cypher_apoc = (
+            "// messages.conversation_with\n"
+            "MATCH (me:User {id:$me})-[:PARTICIPATES_IN]->(c:Conversation)<-[:PARTICIPATES_IN]-(other:User {id:$other})\n"
+            "OPTIONAL MATCH (c)-[:HAS_MESSAGE]->(m:Message)\n"
+            "  WHERE (c.cleared_at IS NULL OR coalesce(m.timestamp, m.created_at) > c.cleared_at)\n"
+            "WITH c, other, m\n"
+            "ORDER BY m.timestamp DESC, m.id DESC\n"
+            "WITH c, other, head(collect(m)) AS last\n"
+            "RETURN c.id AS cid, other.id AS oid, other.username AS ousername,\n"
+            "       coalesce(apoc.property(other,'profile_pic'), other.avatar_url, '') AS opic,\n"
+            "       (CASE WHEN last IS NULL THEN NULL ELSE last.id END) AS mid,\n"
+            "       (CASE WHEN last IS NULL THEN NULL ELSE last.content END) AS mcontent,\n"
+            "       (CASE WHEN last IS NULL THEN NULL ELSE last.timestamp END) AS mcreated,\n"
+            "       (CASE WHEN last IS NULL THEN NULL ELSE last.sender_id END) AS msender"
+        )
+        try:
+            rec = run_single(cypher_apoc, me=me, other=other)
+        except Exception:
+            cypher_fb = (
+                "// messages.conversation_with\n"
+                "MATCH (me:User {id:$me})-[:PARTICIPATES_IN]->(c:Conversation)<-[:PARTICIPATES_IN]-(other:User {id:$other})\n"
+                "OPTIONAL MATCH (c)-[:HAS_MESSAGE]->(m:Message)\n"
+                "  WHERE (c.cleared_at IS NULL OR coalesce(m.timestamp, m.created_at) > c.cleared_at)\n"
+                "WITH c, other, m\n"
+                "ORDER BY m.timestamp DESC, m.id DESC\n"
+                "WITH c, other, head(collect(m)) AS last\n"
+                "RETURN c.id AS cid, other.id AS oid, other.username AS ousername,\n"
+                "       COALESCE(other.profile_pic, other.avatar_url, '') AS opic,\n"
+                "       (CASE WHEN last IS NULL THEN NULL ELSE last.id END) AS mid,\n"
+                "       (CASE WHEN last IS NULL THEN NULL ELSE last.content END) AS mcontent,\n"
+                "       (CASE WHEN last IS NULL THEN NULL ELSE last.timestamp END) AS mcreated,\n"
+                "       (CASE WHEN last IS NULL THEN NULL ELSE last.sender_id END) AS msender"
+            )
+            rec = run_single(cypher_fb, me=me, other=other)
+
+        if not rec or not rec.get("cid"):
+            return None
+        return {
+            "conversation_id": rec["cid"],
+            "user": {"id": rec["oid"], "username": rec.get("ousername"), "profile_pic": rec.get("opic")},
+            "last_message": _last_message_json(rec),
+        }
+
+    def list_conversations(self, me, limit, offset):
+        # Try with APOC first to avoid missing property warnings
+        apoc_cypher = (
+            "// messages.list_conversations\n"
+            "MATCH (me:User {id:$me})-[:PARTICIPATES_IN]->(c:Conversation)<-[:PARTICIPATES_IN]-(other:User)\n"
+            "MATCH (c)-[:HAS_MESSAGE]->(m:Message)\n"
+            "WHERE (c.cleared_at IS NULL OR coalesce(m.timestamp, m.created_at) > c.cleared_at)\n"
+            "WITH c, other, m\n"
+            "ORDER BY m.timestamp DESC, m.id DESC\n"
+            "WITH c, other, head(collect(m)) AS last\n"
+            "RETURN c.id AS cid, other.id AS oid, other.username AS ousername,\n"
+            "       coalesce(apoc.property(other, 'profile_pic'), other.avatar_url, '') AS opic,\n"
+            "       last.id AS mid,\n"
+            "       last.content AS mcontent,\n"
+            "       last.timestamp AS mcreated,\n"
+            "       last.sender_id AS msender\n"
+            "ORDER BY mcreated DESC\n"
+            "SKIP $offset LIMIT $limit"
+        )
+        try:
+            rows = run_query(apoc_cypher, me=me, limit=int(limit), offset=int(offset))
+        except Exception:
+            # Fallback to plain COALESCE if APOC is unavailable or any error occurs
+            fallback_cypher = (
+                "// messages.list_conversations\n"
+                "MATCH (me:User {id:$me})-[:PARTICIPATES_IN]->(c:Conversation)<-[:PARTICIPATES_IN]-(other:User)\n"
+                "MATCH (c)-[:HAS_MESSAGE]->(m:Message)\n"
+                "WHERE (c.cleared_at IS NULL OR coalesce(m.timestamp, m.created_at) > c.cleared_at)\n"
+                "WITH c, other, m\n"
+                "ORDER BY m.timestamp DESC, m.id DESC\n"
+                "WITH c, other, head(collect(m)) AS last\n"
+                "RETURN c.id AS cid, other.id AS oid, other.username AS ousername,\n"
+                "      COALESCE(other.avatar_url, '') AS opic,\n"
+                "       last.id AS mid,\n"
+                "       last.content AS mcontent,\n"
+                "       last.timestamp AS mcreated,\n"
+                "       last.sender_id AS msender\n"
+                "ORDER BY mcreated DESC\n"
+                "SKIP $offset LIMIT $limit"
+            )
+            rows = run_query(fallback_cypher, me=me, limit=int(limit), offset=int(offset))
+
+        return [
+            {
+                "id": r["cid"],
+                "user": {"id": r["oid"], "username": r.get("ousername"), "profile_pic": r.get("opic")},
+                "last_message": _last_message_json(r),
+            }
+            for r in rows
+        ]
+
+    def mark_read(self, conversation_id, user_id):
+        cypher = (
+            "// messages.mark_read\n"
+            "MATCH (u:User {id: $uid})\n"
+            "MATCH (c:Conversation {id: $cid})-[:HAS_MESSAGE]->(m:Message {receiver_id: $uid})\n"
+            "WHERE NOT (u)-[:READ_BY]->(m) AND (c.cleared_at IS NULL OR coalesce(m.timestamp, m.created_at) > c.cleared_at)\n"
+            "WITH u, m\n"
+            "MERGE (u)-[:READ_BY]->(m)\n"
+            "RETURN count(m) as marked"
+        )
+        rec = run_single(cypher, uid=user_id, cid=str(conversation_id))
+        return int((rec and rec.get("marked")) or 0)
+
+    def clear_conversation(self, conversation_id, cleared_at):
+        # A watermark instead of deleting: reads skip messages up to it, and
+        # the relationship count is answered from the node's degree store
+        rec = run_single(
+            """
+            // messages.clear_conversation
+            MATCH (c:Conversation {id: $cid})
+            SET c.cleared_at = $cleared_at
+            RETURN COUNT { (c)-[:HAS_MESSAGE]->() } AS cnt
+            """,
+            cid=str(conversation_id), cleared_at=parse_ts(cleared_at),
+        )
+        return int(rec["cnt"] or 0) if rec else 0
+
+    def purge_cleared_batch(self, conversation_id, limit):
+        rec = run_single(
+            """
+            // messages.purge_cleared
+            MATCH (c:Conversation {id: $cid})-[:HAS_MESSAGE]->(m:Message)
+            WHERE coalesce(m.timestamp, m.created_at) <= c.cleared_at
+            WITH m LIMIT $limit
+            DETACH DELETE m
+            RETURN count(*) AS deleted
+            """,
+            cid=str(conversation_id), limit=int(limit),
+        )
+        return int(rec["deleted"]) if rec else 0
+
+    def conversation_ids_for(self, user_id):
+        rows = run_query(
+            "// messages.conversation_ids_for\n"
+            "MATCH (:User {id: $uid})-[:PARTICIPATES_IN]->(c:Conversation) RETURN c.id AS id",
+            uid=str(user_id),
+        )
+        return [r["id"] for r in rows]
+
+    def delete_sent_batch(self, user_id, limit):
+        rec = run_single(
+            """
+            // messages.delete_by_user.batch
+            MATCH (:User {id: $uid})-[:SENT]->(m:Message)
+            WITH m LIMIT $limit
+            OPTIONAL MATCH (c:Conversation)-[:HAS_MESSAGE]->(m)
+            WITH m, c.id AS cid
+            DETACH DELETE m
+            RETURN count(*) AS deleted, collect(DISTINCT cid) AS conversation_ids
+            """,
+            uid=str(user_id), limit=int(limit),
+        )
+        if not rec:
+            return 0, []
+        return int(rec["deleted"]), list(rec["conversation_ids"])
+
+    def prune_empty_conversations(self, conversation_ids):
+        rec = run_single(
+            """
+            // messages.prune_conversations
+            UNWIND $ids AS cid
+            MATCH (c:Conversation {id: cid})
+            WHERE NOT (c)-[:HAS_MESSAGE]->()
+            DETACH DELETE c
+            RETURN count(*) AS pruned
+            """,
+            ids=list(conversation_ids),
+        )
+        return int(rec["pruned"]) if rec else 0
+
+
+# Latest visible message of conversation `c`, looked for in its two newest
+# buckets only (the newest may just have been started)
+# Messages not yet moved into buckets (scripts.migrate message_buckets) are
+# still read through HAS_MESSAGE, so a conversation works before, during
+# and after its migration
+_BUCKETED_LAST_MESSAGE = (
+    "CALL {\n"
+    "    WITH c\n"
+    "    CALL {\n"
+    "        WITH c\n"
+    "        MATCH (c)-[:LATEST_BUCKET]->(:MessageBucket)-[:PREV_BUCKET*0..1]->(:MessageBucket)-[:HOLDS]->(m:Message)\n"
+    "        RETURN m\n"
+    "      UNION\n"
+    "        WITH c\n"
+    "        MATCH (c)-[:HAS_MESSAGE]->(m:Message)\n"
+    "        RETURN m\n"
+    "    }\n"
+    "    WITH c, m WHERE c.cleared_at IS NULL OR coalesce(m.timestamp, m.created_at) > c.cleared_at\n"
+    "    WITH m ORDER BY m.timestamp DESC, m.id DESC\n"
+    "    RETURN head(collect(m)) AS last\n"
+    "}\n"
+)
+
+
+class Neo4jBucketedMessageRepository(Neo4jMessageRepository):
+    """Messages held in per-conversation buckets (settings.MESSAGE_BUCKETS).
+
+    A bucket takes up to MESSAGE_BUCKET_SIZE messages; then the next one is
+    started. Buckets are chained newest to oldest:
+
+        (c:Conversation)-[:LATEST_BUCKET]->(b:MessageBucket)-[:PREV_BUCKET]->(older)
+        (b)-[:HOLDS]->(m:Message)
+
+    so a page of messages, the last message and the unread messages are
+    read from the few buckets they can be in, however long the thread is.
+    Messages still linked by HAS_MESSAGE (not migrated yet) are read too.
+    """
+
+    def create_message(self, conversation_id, message):
+        # The conversation is locked (SET) before its newest bucket is read,
+        # so concurrent sends fill and start buckets one at a time
+        cypher = (
+            "// messages.create\n"
+            "MATCH (c:Conversation {id: $cid})\n"
+            "MATCH (s:User {id: $sid})\n"
+            "MATCH (r:User {id: $rid})\n"
+            "SET c._lock = true\n"
+            "WITH c, s\n"
+            "OPTIONAL MATCH (c)-[latest:LATEST_BUCKET]->(cur:MessageBucket)\n"
+            "CALL {\n"
+            "    WITH c, latest, cur\n"
+            "    WITH c, latest, cur WHERE cur IS NULL OR cur.count >= $size\n"
+            "    CREATE (b:MessageBucket {conversation_id: c.id, seq: coalesce(cur.seq + 1, 0), first_at: $now, count: 0})\n"
+            "    CREATE (c)-[:LATEST_BUCKET]->(b)\n"
+            "    FOREACH (prev IN CASE WHEN cur IS NULL THEN [] ELSE [cur] END | CREATE (b)-[:PREV_BUCKET]->(prev))\n"
+            "    DELETE latest\n"
+            "    RETURN b\n"
+            "  UNION\n"
+            "    WITH cur\n"
+            "    WITH cur WHERE cur IS NOT NULL AND cur.count < $size\n"
+            "    RETURN cur AS b\n"
+            "}\n"
+            "CREATE (m:Message {id: $mid, content: $content, timestamp: $now, created_at: $now, sender_id: $sid, receiver_id: $rid})\n"
+            "CREATE (b)-[:HOLDS]->(m)\n"
+            "MERGE (s)-[:SENT]->(m)\n"
+            "SET b.count = b.count + 1, b.last_at = $now\n"
+            "REMOVE c._lock\n"
+            "RETURN m.id as id, m.content as content, m.timestamp as timestamp, m.sender_id as sender_id"
+        )
+        rec = run_single(
+            cypher,
+            cid=str(conversation_id),
+            sid=str(message["sender_id"]),
+            rid=str(message["receiver_id"]),
+            mid=message["id"],
+            content=message["content"],
+            now=parse_ts(message["timestamp"]),
+            size=int(settings.MESSAGE_BUCKET_SIZE),
+        )
+        if not rec:
+            return None
+        return {
+            "id": rec["id"],
+            "content": rec["content"],
+            "timestamp": _plain(rec["timestamp"]),
+            "sender_id": str(rec["sender_id"]),
+        }
+
+    def list_messages(self, conversation_id, limit=None, before=None):
+        # Start from the cursor message's bucket (or, if it is gone or belongs
+        # to another conversation, the bucket its time falls in; else the
+        # newest) and walk back just far enough for `limit` messages: the start
+        # bucket may hold only one older message. Without a limit every bucket
+        # is read. Every bucket is matched on $cid, so a cursor can't lead
+        # into another conversation's chain. Messages the migration hasn't
+        # bucketed yet come from HAS_MESSAGE, as in the flat layout.
+        depth = "" if not limit else str(limit // settings.MESSAGE_BUCKET_SIZE + 1)
+        cypher = (
+            "// messages.list\n"
+            "MATCH (c:Conversation {id: $cid})\n"
+            "OPTIONAL MATCH (c)-[:LATEST_BUCKET]->(latest:MessageBucket)\n"
+            "OPTIONAL MATCH (ab:MessageBucket {conversation_id: $cid})-[:HOLDS]->(b:Message {id: $before})\n"
+            "OPTIONAL MATCH (c)-[:HAS_MESSAGE]->(fb:Message {id: $before})\n"
+            "WITH c, latest, ab, coalesce(b.timestamp, b.created_at, fb.timestamp, fb.created_at, $before_at) AS before_at\n"
+            "OPTIONAL MATCH (tb:MessageBucket {conversation_id: $cid})\n"
+            "  WHERE ab IS NULL AND tb.first_at <= before_at\n"
+            "WITH c, latest, ab, before_at, tb ORDER BY tb.first_at DESC LIMIT 1\n"
+            "WITH c, before_at, coalesce(ab, tb, latest) AS start\n"
+            "CALL {\n"
+            "    WITH start\n"
+            f"    MATCH (start)-[:PREV_BUCKET*0..{depth}]->(:MessageBucket {{conversation_id: $cid}})-[:HOLDS]->(m:Message)\n"
+            "    RETURN m\n"
+            "  UNION\n"
+            "    WITH c\n"
+            "    MATCH (c)-[:HAS_MESSAGE]->(m:Message)\n"
+            "    RETURN m\n"
+            "}\n"
+            "WITH c, m, before_at, COALESCE(m.timestamp, m.created_at) AS ts\n"
+            "WHERE (c.cleared_at IS NULL OR ts > c.cleared_at)\n"
+            "  AND ($before IS NULL OR ts < before_at OR (ts = before_at AND m.id < $before))\n"
+            + ("WITH m, ts ORDER BY ts DESC, m.id DESC LIMIT $limit\n" if limit else "")
+            + "RETURN m.id as id, m.content as content, ts as timestamp, m.sender_id as sender_id\n"
+            "ORDER BY timestamp ASC, id ASC"
+        )
+        rows = run_query(
+            cypher, cid=str(conversation_id), before=before,
+            before_at=id_time(before) if before else None, limit=limit,
+        )
+        return [
+            {
+                "id": r["id"],
+                "content": r["content"],
+                "timestamp": _plain(r["timestamp"]),
+                "sender_id": str(r["sender_id"]),
+            }
+            for r in rows
+        ]
+
+    def conversation_with(self, me, other):
+        rec = run_single(
+            "// messages.conversation_with\n"
+            "MATCH (me:User {id:$me})-[:PARTICIPATES_IN]->(c:Conversation)<-[:PARTICIPATES_IN]-(other:User {id:$other})\n"
+            + _BUCKETED_LAST_MESSAGE
+            + "RETURN c.id AS cid, other.id AS oid, other.username AS ousername,\n"
+            "       COALESCE(other.profile_pic, other.avatar_url, '') AS opic,\n"
+            "       last.id AS mid, last.content AS mcontent, last.timestamp AS mcreated, last.sender_id AS msender",
+            me=me, other=other,
+        )
+        if not rec or not rec.get("cid"):
+            return None
+        return {
+            "conversation_id": rec["cid"],
+            "user": {"id": rec["oid"], "username": rec.get("ousername"), "profile_pic": rec.get("opic")},
+            "last_message": _last_message_json(rec),
+        }
+
+    def list_conversations(self, me, limit, offset):
+        rows = run_query(
+            "// messages.list_conversations\n"
+            "MATCH (me:User {id:$me})-[:PARTICIPATES_IN]->(c:Conversation)<-[:PARTICIPATES_IN]-(other:User)\n"
+            + _BUCKETED_LAST_MESSAGE
+            + "WITH c, other, last WHERE last IS NOT NULL\n"
+            "RETURN c.id AS cid, other.id AS oid, other.username AS ousername,\n"
+            "       COALESCE(other.profile_pic, other.avatar_url, '') AS opic,\n"
+            "       last.id AS mid, last.content AS mcontent, last.timestamp AS mcreated, last.sender_id AS msender\n"
+            "ORDER BY mcreated DESC, mid DESC\n"
+            "SKIP $offset LIMIT $limit",
+            me=me, limit=int(limit), offset=int(offset),
+        )
+        return [
+            {
+                "id": r["cid"],
+                "user": {"id": r["oid"], "username": r.get("ousername"), "profile_pic": r.get("opic")},
+                "last_message": _last_message_json(r),
+            }
+            for r in rows
+        ]
+
+    def mark_read(self, conversation_id, user_id):
+        # Each member's membership remembers the newest bucket at their last
+        # read; only buckets from there on (and messages not bucketed yet)
+        # can hold unread messages
+        rec = run_single(
+            """
+            // messages.mark_read
+            MATCH (u:User {id: $uid})-[p:PARTICIPATES_IN]->(c:Conversation {id: $cid})
+            OPTIONAL MATCH (c)-[:LATEST_BUCKET]->(latest:MessageBucket)
+            WITH u, p, c, latest, coalesce(p.read_seq, 0) AS from_seq
+            SET p.read_seq = coalesce(latest.seq, p.read_seq)
+            WITH u, c, from_seq
+            CALL {
+                WITH u, c, from_seq
+                CALL {
+                    WITH from_seq
+                    MATCH (b:MessageBucket {conversation_id: $cid})
+                    WHERE b.seq >= from_seq
+                    MATCH (b)-[:HOLDS]->(m:Message {receiver_id: $uid})
+                    RETURN m
+                  UNION
+                    WITH c
+                    MATCH (c)-[:HAS_MESSAGE]->(m:Message {receiver_id: $uid})
+                    RETURN m
+                }
+                WITH u, c, m
+                WHERE NOT (u)-[:READ_BY]->(m)
+                  AND (c.cleared_at IS NULL OR coalesce(m.timestamp, m.created_at) > c.cleared_at)
+                MERGE (u)-[:READ_BY]->(m)
+                RETURN count(m) AS marked
+            }
+            RETURN marked
+            """,
+            uid=user_id, cid=str(conversation_id),
+        )
+        return int((rec and rec.get("marked")) or 0)
+
+    def clear_conversation(self, conversation_id, cleared_at):
+        rec = run_single(
+            """
+            // messages.clear_conversation
+            MATCH (c:Conversation {id: $cid})
+            SET c.cleared_at = $cleared_at
+            WITH c
+            OPTIONAL MATCH (b:MessageBucket {conversation_id: $cid})
+            WHERE b.seq >= 0
+            RETURN sum(COUNT { (b)-[:HOLDS]->() }) + COUNT { (c)-[:HAS_MESSAGE]->() } AS cnt
+            """,
+            cid=str(conversation_id), cleared_at=parse_ts(cleared_at),
+        )
+        return int(rec["cnt"] or 0) if rec else 0
+
+    def purge_cleared_batch(self, conversation_id, limit):
+        # Cleared messages sit in the oldest buckets (or aren't bucketed yet);
+        # once they are gone, drop the emptied buckets too (the chain stays
+        # whole: they are its tail)
+        deleted = super().purge_cleared_batch(conversation_id, limit)
+        if deleted:
+            return deleted
+        rec = run_single(
+            """
+            // messages.purge_cleared
+            MATCH (c:Conversation {id: $cid})
+            MATCH (b:MessageBucket {conversation_id: $cid})
+            WHERE b.first_at <= c.cleared_at
+            MATCH (b)-[:HOLDS]->(m:Message)
+            WHERE coalesce(m.timestamp, m.created_at) <= c.cleared_at
+            WITH b, m LIMIT $limit
+            SET b.count = b.count - 1
+            DETACH DELETE m
+            RETURN count(*) AS deleted
+            """,
+            cid=str(conversation_id), limit=int(limit),
+        )
+        deleted = int(rec["deleted"]) if rec else 0
+        if not deleted:
+            run_query(
+                """
+                // messages.purge_cleared.buckets
+                MATCH (c:Conversation {id: $cid})
+                MATCH (b:MessageBucket {conversation_id: $cid})
+                WHERE b.first_at <= c.cleared_at AND b.last_at <= c.cleared_at
+                  AND NOT (b)-[:HOLDS]->() AND NOT (c)-[:LATEST_BUCKET]->(b)
+                DETACH DELETE b
+                """,
+                cid=str(conversation_id),
+            )
+        return deleted
+
+    def delete_sent_batch(self, user_id, limit):
+        rec = run_single(
+            """
+            // messages.delete_by_user.batch
+            MATCH (:User {id: $uid})-[:SENT]->(m:Message)
+            WITH m LIMIT $limit
+            OPTIONAL MATCH (b:MessageBucket)-[:HOLDS]->(m)
+            OPTIONAL MATCH (flat:Conversation)-[:HAS_MESSAGE]->(m)
+            // Keep the count the append path rolls buckets over by in step
+            FOREACH (held IN CASE WHEN b IS NULL THEN [] ELSE [b] END | SET held.count = held.count - 1)
+            WITH m, coalesce(b.conversation_id, flat.id) AS cid
+            DETACH DELETE m
+            RETURN count(*) AS deleted, collect(DISTINCT cid) AS conversation_ids
+            """,
+            uid=str(user_id), limit=int(limit),
+        )
+        if not rec:
+            return 0, []
+        return int(rec["deleted"]), list(rec["conversation_ids"])
+
+    def prune_empty_conversations(self, conversation_ids):
+        rec = run_single(
+            """
+            // messages.prune_conversations
+            UNWIND $ids AS cid
+            MATCH (c:Conversation {id: cid})
+            WHERE NOT (c)-[:HAS_MESSAGE]->()
+              AND NOT EXISTS { MATCH (b:MessageBucket {conversation_id: cid})-[:HOLDS]->() WHERE b.seq >= 0 }
+            CALL {
+                WITH c
+                MATCH (b:MessageBucket {conversation_id: c.id})
+                WHERE b.seq >= 0
+                DETACH DELETE b
+            }
+            DETACH DELETE c
+            RETURN count(*) AS pruned
+            """,
+            ids=list(conversation_ids),
+        )
+        return int(rec["pruned"]) if rec else 0
+
+
+class Neo4jOutboxRepository(OutboxRepository):
+    def enqueue(self, email):
+        with db.get_session() as session:
+            session.run(
+                "// outbox.enqueue\n"
+                "CREATE (e:EmailOutbox $props) SET e.status = 'pending'",
+                props=_to_db(email),
+            ).consume()
+
+    def claim(self, now, limit, lease_seconds):
+        # Items stuck in 'sending' past their lease (worker died) are picked up
+        # again. The first match reads without locks, so two workers can pick
+        # the same items: each item is write-locked (SET _lock) and checked
+        # again, and only the items that end up with this call's token are
+        # returned; the loser sees the winner's lease and skips them.
+        token = uuid.uuid4().hex
+        rows = run_query(
+            """
+            // outbox.claim
+            MATCH (e:EmailOutbox)
+            WHERE (e.status = 'pending' AND e.next_attempt_at <= $now)
+               OR (e.status = 'sending' AND e.lease_until <= $now)
+            WITH e ORDER BY e.next_attempt_at ASC LIMIT $limit
+            SET e._lock = true
+            REMOVE e._lock
+            WITH e
+            WHERE (e.status = 'pending' AND e.next_attempt_at <= $now)
+               OR (e.status = 'sending' AND e.lease_until <= $now)
+            SET e.status = 'sending', e.lease_until = $lease_until, e.claim_token = $token
+            WITH e
+            WHERE e.claim_token = $token
+            RETURN properties(e) AS e
+            """,
+            now=now, limit=int(limit), lease_until=now + lease_seconds, token=token,
+        )
+        return [_plain(dict(r["e"])) for r in rows]
+
+    def complete(self, email_ids):
+        run_query(
+            "// outbox.complete\nMATCH (e:EmailOutbox) WHERE e.id IN $ids DELETE e",
+            ids=list(email_ids),
+        )
+
+    def retry(self, email_id, attempts, next_attempt_at, error):
+        run_query(
+            """
+            // outbox.retry
+            MATCH (e:EmailOutbox {id: $id})
+            SET e.status = 'pending', e.attempts = $attempts, e.next_attempt_at = $next,
+                e.last_error = $error
+            REMOVE e.lease_until
+            """,
+            id=email_id, attempts=attempts, next=next_attempt_at, error=error,
+        )
+
+    def fail(self, email_id, attempts, error):
+        run_query(
+            """
+            // outbox.fail
+            MATCH (e:EmailOutbox {id: $id})
+            SET e.status = 'dead', e.attempts = $attempts, e.last_error = $error
+            REMOVE e.lease_until
+            """,
+            id=email_id, attempts=attempts, error=error,
+        )
+
+
+class Neo4jRecommendationRepository(RecommendationRepository):
+    # One (:UserRecommendations {user_id}) node per user holds the ranked
+    # ids with their scores in parallel lists, plus the `stale` queue flag
+    def mark_stale(self, user_id, fanout):
+        run_query(
+            """
+            // recs.mark_stale
+            MATCH (u:User {id: $id})
+            CALL {
+                WITH u
+                MATCH (f:User)-[:FOLLOWS]->(u)
+                WITH f LIMIT $fanout
+                RETURN collect(f.id) AS follower_ids
+            }
+            UNWIND [u.id] + follower_ids AS uid
+            MERGE (r:UserRecommendations {user_id: uid})
+            SET r.stale = true
+            """,
+            id=user_id, fanout=int(fanout),
+        )
+
+    def claim_stale(self, limit):
+        rows = run_query(
+            """
+            // recs.claim
+            MATCH (r:UserRecommendations)
+            WHERE r.stale = true
+            WITH r LIMIT $limit
+            SET r.stale = false
+            RETURN r.user_id AS id
+            """,
+            limit=int(limit),
+        )
+        return [r["id"] for r in rows]
+
+    def refresh(self, user_id, limit, candidates):
+        # Each source is capped at `candidates` before scoring, so a user
+        # following very popular accounts can't blow up the sort
+        rec = run_single(
+            f"""
+            // recs.refresh
+            MATCH (u:User {{id: $id}})
+            CALL {{
+                WITH u
+                CALL {{
+                    WITH u
+                    MATCH (u)-[:FOLLOWS]->(:User)-[:FOLLOWS]->(c:User)
+                    WHERE c <> u AND NOT EXISTS {{ (u)-[:FOLLOWS]->(c) }}
+                    WITH c, count(*) AS mutuals
+                    ORDER BY mutuals DESC LIMIT $candidates
+                    RETURN c, mutuals
+                    UNION
+                    WITH u
+                    MATCH (c:User {{program: u.program}})
+                    WHERE c <> u AND NOT EXISTS {{ (u)-[:FOLLOWS]->(c) }}
+                    WITH c ORDER BY c.followers_count DESC LIMIT $candidates
+                    RETURN c, 0 AS mutuals
+                }}
+                WITH u, c, max(mutuals) AS mutuals
+                WITH c, mutuals, (u.program IS NOT NULL AND c.program = u.program) AS same_program
+                WITH c, mutuals, same_program,
+                     round({MUTUAL_WEIGHT} * log(1 + mutuals)
+                           + CASE WHEN same_program THEN {PROGRAM_WEIGHT} ELSE 0.0 END
+                           + log(1 + coalesce(c.followers_count, 0)), 6) AS score
+                ORDER BY score DESC, c.id
+                LIMIT $limit
+                RETURN collect(c.id) AS ids, collect(score) AS scores,
+                       collect(mutuals) AS mutuals, collect(same_program) AS same_program
+            }}
+            MERGE (r:UserRecommendations {{user_id: u.id}})
+            SET r.ids = ids, r.scores = scores, r.mutuals = mutuals,
+                r.same_program = same_program, r.computed_at = $now
+            RETURN size(ids) AS stored
+            """,
+            id=user_id, limit=int(limit), candidates=int(candidates),
+            now=utc_now(),
+        )
+        return int(rec["stored"]) if rec else 0
+
+    def get(self, user_id, limit):
+        rec = run_single(
+            """
+            // recs.get
+            MATCH (r:UserRecommendations {user_id: $id})
+            WHERE r.ids IS NOT NULL
+            CALL {
+                WITH r
+                UNWIND range(0, size(r.ids) - 1) AS i
+                MATCH (c:User {id: r.ids[i]})
+                WHERE NOT EXISTS { (:User {id: r.user_id})-[:FOLLOWS]->(c) }
+                WITH r, i, c ORDER BY i LIMIT $limit
+                RETURN collect({
+                    id: c.id, username: c.username, name: c.name, bio: c.bio,
+                    profile_pic: c.avatar_url, followers_count: coalesce(c.followers_count, 0),
+                    mutual_count: r.mutuals[i], same_program: r.same_program[i], score: r.scores[i]
+                }) AS rows
+            }
+            RETURN rows
+            """,
+            id=user_id, limit=int(limit),
+        )
+        return list(rec["rows"]) if rec else None
+
+
+# Job dict fields stored as JSON strings (node properties can't hold maps)
+JOB_JSON_FIELDS = ("params", "state", "progress", "result")
+
+
+def _job_dict(props) -> Dict[str, Any]:
+    job = _plain(dict(props))
+    for key in JOB_JSON_FIELDS:
+        if job.get(key) is not None:
+            job[key] = json.loads(job[key])
+    return job
+
+
+class Neo4jJobRepository(JobRepository):
+    def create(self, job):
+        props = _to_db({k: json.dumps(v) if k in JOB_JSON_FIELDS and v is not None else v for k, v in job.items()})
+        run_query("// jobs.create\nCREATE (j:Job $props)", props=props)
+
+    def get(self, job_id):
+        rec = run_single("// jobs.get\nMATCH (j:Job {id: $id}) RETURN properties(j) AS j", id=job_id)
+        return _job_dict(rec["j"]) if rec else None
+
+    def list_recent(self, limit):
+        rows = run_query(
+            "// jobs.list\nMATCH (j:Job) WITH j ORDER BY j.created_at DESC LIMIT $limit RETURN properties(j) AS j",
+            limit=int(limit),
+        )
+        return [_job_dict(r["j"]) for r in rows]
+
+    def claim(self, now, lease_seconds):
+        # Two workers can match the same job; the write lock serialises them
+        # and the re-check lets only the first one through, so the attempt is
+        # counted once and only the winner gets its token back.
+        token = uuid.uuid4().hex
+        rec = run_single(
+            """
+            // jobs.claim
+            MATCH (j:Job)
+            WHERE j.status = 'queued' OR (j.status = 'running' AND j.lease_until <= $now)
+            WITH j ORDER BY j.created_at ASC LIMIT 1
+            SET j._lock = true
+            REMOVE j._lock
+            WITH j
+            WHERE j.status = 'queued' OR (j.status = 'running' AND j.lease_until <= $now)
+            SET j.status = 'running', j.lease_until = $lease_until, j.lease_token = $token,
+                j.attempts = coalesce(j.attempts, 0) + 1,
+                j.started_at = coalesce(j.started_at, $started_at)
+            RETURN properties(j) AS j
+            """,
+            now=now, lease_until=now + lease_seconds, token=token,
+            started_at=utc_now(),
+        )
+        return _job_dict(rec["j"]) if rec else None
+
+    def checkpoint(self, job_id, lease_token, state, progress, lease_until):
+        rec = run_single(
+            """
+            // jobs.checkpoint
+            MATCH (j:Job {id: $id})
+            WHERE j.status = 'running' AND j.lease_token = $token
+            SET j.state = $state, j.progress = $progress, j.lease_until = $lease_until
+            RETURN true AS ok
+            """,
+            id=job_id, token=lease_token, state=json.dumps(state), progress=json.dumps(progress),
+            lease_until=lease_until,
+        )
+        return rec is not None
+
+    def release(self, job_id, lease_token, error):
+        run_query(
+            """
+            // jobs.release
+            MATCH (j:Job {id: $id})
+            WHERE j.status = 'running' AND j.lease_token = $token
+            SET j.status = 'queued', j.error = $error
+            REMOVE j.lease_until, j.lease_token
+            """,
+            id=job_id, token=lease_token, error=error,
+        )
+
+    def finish(self, job_id, lease_token, status, result, error, finished_at):
+        run_query(
+            """
+            // jobs.finish
+            MATCH (j:Job {id: $id})
+            WHERE j.status = 'running' AND j.lease_token = $token
+            SET j.status = $status, j.result = $result, j.error = $error, j.finished_at = $finished_at
+            REMOVE j.lease_until, j.lease_token
+            """,
+            id=job_id, token=lease_token, status=status,
+            result=json.dumps(result) if result is not None else None,
+            error=error, finished_at=parse_ts(finished_at),
+        )
+
+
+class Neo4jRevocationRepository(RevocationRepository):
+    def add(self, key, expires_at):
+        # MERGE on the unique key is atomic, so only one of two concurrent
+        # adds creates the node and sees its own token come back
+        token = uuid.uuid4().hex
+        rec = run_single(
+            """
+            // revocations.add
+            MERGE (r:RevokedToken {key: $key})
+            ON CREATE SET r.expires_at = $expires_at, r.added_by = $token
+            ON MATCH SET r.expires_at = CASE WHEN r.expires_at < $expires_at THEN $expires_at ELSE r.expires_at END
+            RETURN r.added_by = $token AS added
+            """,
+            key=key, expires_at=expires_at, token=token,
+        )
+        return bool(rec and rec["added"])
+
+    def any_revoked(self, keys, now):
+        rec = run_single(
+            """
+            // revocations.any
+            MATCH (r:RevokedToken) WHERE r.key IN $keys AND r.expires_at > $now
+            RETURN count(r) > 0 AS revoked
+            """,
+            keys=list(keys), now=now,
+        )
+        return bool(rec and rec["revoked"])
+
+    def prune(self, now, limit):
+        rec = run_single(
+            """
+            // revocations.prune
+            MATCH (r:RevokedToken) WHERE r.expires_at <= $now
+            WITH r LIMIT $limit
+            DELETE r
+            RETURN count(*) AS pruned
+            """,
+            now=now, limit=int(limit),
+        )
+        return int(rec["pruned"]) if rec else 0
+
+
+# Constraints ensure_schema refuses to start without
+REQUIRED_CONSTRAINTS = ("user_email_unique", "user_username_unique")
+
+
+class Neo4jRepositories(Repositories):
+    def __init__(self):
+        super().__init__(
+            users=Neo4jUserRepository(),
+            follows=Neo4jFollowRepository(),
+            posts=Neo4jPostRepository(),
+            comments=Neo4jCommentRepository(),
+            messages=Neo4jBucketedMessageRepository() if settings.MESSAGE_BUCKETS else Neo4jMessageRepository(),
+            outbox=Neo4jOutboxRepository(),
+            recommendations=Neo4jRecommendationRepository(),
+            jobs=Neo4jJobRepository(),
+            revocations=Neo4jRevocationRepository(),
+        )
+
+    def ensure_schema(self):
+        """Ensure required Neo4j constraints exist. Fails safe (e.g. missing privileges).
+        Schema only: data backfills are in scripts.migrate, not run on every start."""
+        statements = [
+            # Registration relies on these instead of checking for an existing user first
+            "CREATE CONSTRAINT user_id_unique IF NOT EXISTS FOR (u:User) REQUIRE u.id IS UNIQUE",
+            "CREATE CONSTRAINT user_email_unique IF NOT EXISTS FOR (u:User) REQUIRE u.email IS UNIQUE",
+            "CREATE CONSTRAINT user_username_unique IF NOT EXISTS FOR (u:User) REQUIRE u.username IS UNIQUE",
+            # Legacy stored verification tokens are still looked up by value
+            "CREATE INDEX user_verification_token IF NOT EXISTS FOR (u:User) ON (u.verification_token)",
+            # Typeahead: terms are pre-normalised (app.core.text_search), so split on whitespace only
+            """
+            CREATE FULLTEXT INDEX user_search IF NOT EXISTS
+            FOR (u:User) ON EACH [u.search_text]
+            OPTIONS {indexConfig: {`fulltext.analyzer`: 'whitespace'}}
+            """,
+            # People directory orders
+            "CREATE INDEX user_created_at IF NOT EXISTS FOR (u:User) ON (u.created_at)",
+            "CREATE INDEX user_followers_count IF NOT EXISTS FOR (u:User) ON (u.followers_count)",
+            # Post search; Lucene keeps it current on every post/comment write
+            """
+            CREATE FULLTEXT INDEX content_search IF NOT EXISTS
+            FOR (n:Post|Comment) ON EACH [n.content]
+            OPTIONS {indexConfig: {`fulltext.analyzer`: 'standard-folding'}}
+            """,
+            # People you may know: same-program candidates, stored lists and their refresh queue
+            "CREATE INDEX user_program IF NOT EXISTS FOR (u:User) ON (u.program)",
+            """
+            CREATE CONSTRAINT user_recommendations_unique IF NOT EXISTS
+            FOR (r:UserRecommendations) REQUIRE r.user_id IS UNIQUE
+            """,
+            "CREATE INDEX user_recommendations_stale IF NOT EXISTS FOR (r:UserRecommendations) ON (r.stale)",
+            # Time-ordered reads and time windows (DATETIME values, see app.core.timestamps)
+            "CREATE INDEX post_created_at IF NOT EXISTS FOR (p:Post) ON (p.created_at)",
+            "CREATE INDEX comment_created_at IF NOT EXISTS FOR (c:Comment) ON (c.created_at)",
+            "CREATE INDEX message_timestamp IF NOT EXISTS FOR (m:Message) ON (m.timestamp)",
+            # Deleted posts/comments awaiting their purge job
+            "CREATE INDEX deleted_post_id IF NOT EXISTS FOR (p:DeletedPost) ON (p.id)",
+            "CREATE INDEX deleted_comment_id IF NOT EXISTS FOR (c:DeletedComment) ON (c.id)",
+            # Background jobs (app.services.jobs)
+            "CREATE CONSTRAINT job_id_unique IF NOT EXISTS FOR (j:Job) REQUIRE j.id IS UNIQUE",
+            "CREATE INDEX job_status IF NOT EXISTS FOR (j:Job) ON (j.status, j.created_at)",
+            # Entity ids double as page cursors (app.core.ids), so look them up by index
+            "CREATE CONSTRAINT post_id_unique IF NOT EXISTS FOR (p:Post) REQUIRE p.id IS UNIQUE",
+            "CREATE CONSTRAINT comment_id_unique IF NOT EXISTS FOR (c:Comment) REQUIRE c.id IS UNIQUE",
+            "CREATE CONSTRAINT message_id_unique IF NOT EXISTS FOR (m:Message) REQUIRE m.id IS UNIQUE",
+            # Bucketed message storage (MESSAGE_BUCKETS): a conversation's buckets by
+            # position, and the bucket a time cursor falls in
+            """
+            CREATE CONSTRAINT message_bucket_key IF NOT EXISTS
+            FOR (b:MessageBucket) REQUIRE (b.conversation_id, b.seq) IS UNIQUE
+            """,
+            "CREATE INDEX message_bucket_first_at IF NOT EXISTS FOR (b:MessageBucket) ON (b.conversation_id, b.first_at)",
+            "CREATE CONSTRAINT email_outbox_id_unique IF NOT EXISTS FOR (e:EmailOutbox) REQUIRE e.id IS UNIQUE",
+            "CREATE INDEX email_outbox_due IF NOT EXISTS FOR (e:EmailOutbox) ON (e.status, e.next_attempt_at)",
+            # Revoked refresh tokens/sessions (app.core.security), pruned once expired
+            "CREATE CONSTRAINT revoked_token_key IF NOT EXISTS FOR (r:RevokedToken) REQUIRE r.key IS UNIQUE",
+            "CREATE INDEX revoked_token_expires_at IF NOT EXISTS FOR (r:RevokedToken) ON (r.expires_at)",
+            """
+            CREATE CONSTRAINT conversation_id_unique IF NOT EXISTS
+            FOR (c:Conversation)
+            REQUIRE c.id IS UNIQUE
+            """,
+        ]
+        for cypher in statements:
+            try:
+                with db.get_session() as session:
+                    session.run(cypher).consume()
+            except Exception as e:
+                # e.g. existing duplicate emails/usernames block a uniqueness constraint
+                logger.warning("schema statement failed: %s: %s", " ".join(cypher.split())[:80], e)
+        # Registration relies on these to reject duplicate accounts, so without
+        # them the API must not start; everything else above is best effort
+        with db.get_session() as session:
+            present = {
+                r["name"] for r in session.run(
+                    "// schema.required_constraints\nSHOW CONSTRAINTS YIELD name WHERE name IN $names RETURN name",
+                    names=list(REQUIRED_CONSTRAINTS),
+                )
+            }
+        missing = [name for name in REQUIRED_CONSTRAINTS if name not in present]
+        if missing:
+            raise RuntimeError(
+                f"missing uniqueness constraint(s) {', '.join(missing)}: resolve the duplicate "
+                "users that block them (see the warnings above) and restart"
+            )
@@ -1 +1 @@
-from . import auth, users, posts, chat, comments, messages
+from . import auth, users, posts, chat, comments, messages, admin
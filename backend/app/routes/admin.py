@@ -0,0 +1,37 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from app.core.config import settings
+from app.core.security import get_current_user
+from app.core import slow_queries
+from app.repositories import repos
+from app.services.jobs import job_to_json
+from app.routes.users import _is_admin
+
+router = APIRouter(prefix="/admin", tags=["Admin"])
+
+
+def require_admin(current_user: dict = Depends(get_current_user)) -> dict:
+    if not _is_admin(current_user):
+        raise HTTPException(status_code=403, detail="Admin privileges required")
+    return current_user
+
+
+@router.get("/slow-queries")
+def list_slow_queries(admin: dict = Depends(require_admin)):
+    """Recent slow queries (redacted params) and sampled PROFILE/EXPLAIN captures, newest first."""
+    return {
+        "threshold_ms": settings.SLOW_QUERY_MS,
+        "slow_queries": slow_queries.recent_slow_queries(),
+        "profiles": slow_queries.recent_profiles(),
+    }
+
+
+@router.delete("/slow-queries")
+def clear_slow_queries(admin: dict = Depends(require_admin)):
+    slow_queries.clear()
+    return {"detail": "Cleared"}
+
+
+@router.get("/jobs")
+def list_jobs(limit: int = Query(50, ge=1, le=200), admin: dict = Depends(require_admin)):
+    """Recent background jobs (deletions, maintenance), newest first."""
+    return [job_to_json(j) for j in repos.jobs.list_recent(limit)]
@@ -1,14 +1,26 @@
-from fastapi import APIRouter, HTTPException, Depends, status, Form, BackgroundTasks
+from fastapi import APIRouter, HTTPException, Depends, status, Form, Request
 from fastapi.responses import HTMLResponse 
 from pydantic import BaseModel, EmailStr
+from starlette.concurrency import run_in_threadpool
 from uuid import uuid4
-from app.core.database import db
-from app.core.security import get_password_hash, verify_password, create_access_token, get_current_user
+from app.repositories import DuplicateUserError, repos
+from app.core import hashing
+from app.core.rate_limit import client_ip, login_limiter
+from app.core.security import (
+    get_current_user_full,
+    issue_token_pair,
+    revoke_refresh_token,
+    rotate_refresh_token,
+)
 from fastapi.security import OAuth2PasswordBearer
-from app.core.email_verification import send_verification_email, generate_verification_token
-import datetime
+from app.core.email_verification import (
+    generate_verification_token,
+    is_signed_token,
+    queue_verification_email,
+    read_verification_token,
+)
+from app.core.timestamps import now_iso
 import logging
-import asyncio
 
 router = APIRouter(prefix="/auth", tags=["Auth"])
 
@@ -28,96 +40,54 @@ class LoginRequest(BaseModel):
 class VerifyEmailRequest(BaseModel):
     token: str
 
-async def send_verification_email_with_delay(email: str, verification_token: str):
-    await asyncio.sleep(2)
-    return await send_verification_email(email, verification_token)
+class RefreshRequest(BaseModel):
+    refresh_token: str
 
-    
 @router.post("/register")
-async def register(user: UserCreate, background_tasks: BackgroundTasks):
-    with db.get_session() as session:
-        existing = session.run(
-            "MATCH (u:User) WHERE u.email=$email OR u.username=$username RETURN u",
-            email=user.email,
-            username=user.username
-        ).single()
-
-        if existing:
-            raise HTTPException(status_code=400, detail="Email or username already registered")
-
-        user_id = str(uuid4())
-        hashed_pw = get_password_hash(user.password)
-        verification_token = generate_verification_token()
-        
-        session.run(
-            """
-            CREATE (u:User {
-                id: $id, 
-                username: $username, 
-                email: $email, 
-                student_number: $student_number,
-                program: $program,
-                password: $password,
-                email_verified: $email_verified,
-                verification_token: $verification_token,
-                created_at: $created_at
-            })
-            """,
-            id=user_id, 
-            username=user.username, 
-            email=user.email, 
-            student_number=user.student_number,
-            program=user.program,
-            password=hashed_pw,
-            email_verified=False,
-            verification_token=verification_token,
-            created_at=datetime.datetime.utcnow().isoformat()
-        )
+async def register(user: UserCreate):
+    user_id = str(uuid4())
+    # Hash before touching the database so no session is held while it runs
+    hashed_pw = await hashing.hash_password(user.password)
+    verification_token = generate_verification_token(user_id, user.email)
+
+    new_user = {
+        "id": user_id,
+        "username": user.username,
+        "email": user.email,
+        "student_number": user.student_number,
+        "program": user.program,
+        "password": hashed_pw,
+        "email_verified": False,
+        "created_at": now_iso(),
+    }
+    try:
+        # Single CREATE; the email/username uniqueness constraints reject duplicates
+        await run_in_threadpool(repos.users.create, new_user)
+    except DuplicateUserError:
+        raise HTTPException(status_code=400, detail="Email or username already registered")
 
-    background_tasks.add_task(send_verification_email_with_delay, user.email, verification_token)
+    # Outbox write only; delivery happens on the email worker
+    await run_in_threadpool(queue_verification_email, user.email, verification_token)
 
     return {
         "message": "Registration successful! Please check your email to verify your account.",
         "user_id": user_id
     }
 
-async def send_verification_email_with_logging(email: str, token: str):
-    import logging
-    logger = logging.getLogger(__name__)
-    
-    logger.info(f"🎯 Starting background email send to: {email}")
-    result = await send_verification_email(email, token)
-    
-    if result:
-        logger.info(f"✅ Background email sent successfully to: {email}")
-    else:
-        logger.error(f"❌ Background email failed to send to: {email}")
-    
-    return result
-
 @router.get("/verify-email")
 def verify_email(token: str):
-    with db.get_session() as session:
-        result = session.run(
-            "MATCH (u:User {verification_token: $token}) RETURN u",
-            token=token
-        ).single()
-
-        if not result:
+    if is_signed_token(token):
+        user_id, email = read_verification_token(token)
+    else:
+        # Links sent before tokens were signed carry a token stored on the user
+        user_data = repos.users.get_by_verification_token(token)
+        if not user_data:
             raise HTTPException(status_code=400, detail="Invalid verification token")
+        user_id, email = user_data["id"], user_data["email"]
 
-        user_data = result["u"]
-        
-        session.run(
-            """
-            MATCH (u:User {verification_token: $token})
-            SET u.email_verified = true,
-                u.verification_token = null,
-                u.verified_at = $verified_at
-            """,
-            token=token,
-            verified_at=datetime.datetime.utcnow().isoformat()
-        )
+    # One update by id; fails if the user is gone or the address has changed since
+    if not repos.users.mark_email_verified(user_id, email, now_iso()):
+        raise HTTPException(status_code=400, detail="Invalid verification token")
 
     html_content = """
     <!DOCTYPE html>
@@ -157,82 +127,75 @@ def verify_email(token: str):
 
     
 @router.post("/resend-verification")
-async def resend_verification(email: str, background_tasks: BackgroundTasks):
-    with db.get_session() as session:
-        result = session.run(
-            "MATCH (u:User {email: $email}) RETURN u",
-            email=email
-        ).single()
+def resend_verification(email: str):
+    user_data = repos.users.get_by_email(email)
+    if not user_data:
+        raise HTTPException(status_code=404, detail="User not found")
 
-        if not result:
-            raise HTTPException(status_code=404, detail="User not found")
+    if user_data.get("email_verified", False):
+        raise HTTPException(status_code=400, detail="Email is already verified")
 
-        user_data = result["u"]
-        
-        if user_data.get("email_verified", False):
-            raise HTTPException(status_code=400, detail="Email is already verified")
-
-        new_token = generate_verification_token()
-        
-        session.run(
-            "MATCH (u:User {email: $email}) SET u.verification_token = $token",
-            email=email,
-            token=new_token
-        )
-
-    background_tasks.add_task(send_verification_email, email, new_token)
+    # Nothing to store: the new token is signed, so old links stay valid until they expire
+    new_token = generate_verification_token(user_data["id"], email)
+    queue_verification_email(email, new_token)
 
     return {"message": "Verification email sent successfully!"}
 
-@router.post("/login")
-def login_form(username: str = Form(...), password: str = Form(...)):
-    with db.get_session() as session:
-        record = session.run(
-            "MATCH (u:User {username: $username}) RETURN u",
-            username=username
-        ).single()
-
-        if not record or not verify_password(password, record["u"]["password"]):
-            raise HTTPException(status_code=400, detail="Invalid username or password")
-
-        user_data = record["u"]
-        
-        if not user_data.get("email_verified", False):
-            raise HTTPException(
-                status_code=403, 
-                detail="Please verify your email before logging in"
-            )
+async def _authenticate(request: Request, username: str, password: str) -> dict:
+    """Check credentials; the hash runs on the hashing pool and legacy
+    (bcrypt) hashes are upgraded to Argon2 on success. Throttled IPs and
+    usernames are rejected before any lookup or hash."""
+    ip = client_ip(request)
+    login_limiter.check(ip, username)
+
+    user_data = await run_in_threadpool(repos.users.get_by_username, username)
+    if not user_data or not user_data.get("password"):
+        login_limiter.record_failure(ip, username)
+        raise HTTPException(status_code=400, detail="Invalid username or password")
+
+    valid, new_hash = await hashing.verify_password(password, user_data["password"])
+    if not valid:
+        login_limiter.record_failure(ip, username)
+        raise HTTPException(status_code=400, detail="Invalid username or password")
+    login_limiter.record_success(ip, username)
+    if new_hash:
+        await run_in_threadpool(repos.users.update, user_data["id"], {"password": new_hash})
+
+    if not user_data.get("email_verified", False):
+        raise HTTPException(
+            status_code=403, 
+            detail="Please verify your email before logging in"
+        )
+    return user_data
 
-        token = create_access_token({"sub": username})
-        return {"access_token": token, "token_type": "bearer"}
+@router.post("/login")
+async def login_form(request: Request, username: str = Form(...), password: str = Form(...)):
+    user_data = await _authenticate(request, username, password)
+    return issue_token_pair(user_data)
 
 @router.post("/login-with-username")
-def login_json(payload: LoginRequest):
-    username = payload.username
-    password = payload.password
-
-    with db.get_session() as session:
-        record = session.run(
-            "MATCH (u:User {username: $username}) RETURN u",
-            username=username
-        ).single()
-
-        if not record or not verify_password(password, record["u"]["password"]):
-            raise HTTPException(status_code=400, detail="Invalid username or password")
-
-        user_data = record["u"]
-        
-        if not user_data.get("email_verified", False):
-            raise HTTPException(
-                status_code=403, 
-                detail="Please verify your email before logging in"
-            )
-
-        token = create_access_token({"sub": username})
-        return {"access_token": token, "token_type": "bearer"}
+async def login_json(request: Request, payload: LoginRequest):
+    user_data = await _authenticate(request, payload.username, payload.password)
+    return issue_token_pair(user_data)
+
+@router.post("/refresh")
+def refresh_tokens(payload: RefreshRequest):
+    """Trade a refresh token for a new pair. Each refresh token works once;
+    the user is re-read so role changes and deletions take effect here."""
+    claims = rotate_refresh_token(payload.refresh_token)
+    user_data = repos.users.get_by_id(claims["sub"])
+    if not user_data:
+        raise HTTPException(status_code=401, detail="Could not validate credentials")
+    return issue_token_pair(user_data, family=claims["fam"])
+
+@router.post("/logout")
+def logout(payload: RefreshRequest):
+    """Revoke the session: the refresh token and every access token issued with it."""
+    revoke_refresh_token(payload.refresh_token)
+    return {"message": "Logged out"}
 
 @router.get("/users/me")
-def current_user(current_user: dict = Depends(get_current_user)):
+def current_user(current_user: dict = Depends(get_current_user_full)):
     current_user.pop("password", None)
     return current_user
 
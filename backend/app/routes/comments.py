@@ -1,9 +1,11 @@
-from fastapi import APIRouter, Depends, HTTPException
-from uuid import uuid4
-from datetime import datetime
-from app.core.database import db
-from app.core.security import get_current_user
+from fastapi import APIRouter, Depends, HTTPException, Query
+from typing import Optional
+from app.core.ids import new_timed_id
+from app.repositories import repos
+from app.core.security import get_current_user, get_current_user_full
+from app.core.timestamps import now_iso
 from app.schemas.comment_schema import CommentCreate, CommentUpdate
+from app.services.jobs import enqueue_job
 
 # ✅ Only one prefix — no need to repeat "/posts" later
 router = APIRouter(prefix="/posts", tags=["Comments"])
@@ -15,40 +17,22 @@ router = APIRouter(prefix="/posts", tags=["Comments"])
 def create_comment(
     post_id: str,
     payload: CommentCreate,
-    current_user: dict = Depends(get_current_user)
+    current_user: dict = Depends(get_current_user_full)
 ):
-    comment_id = str(uuid4())
-    created_at = datetime.utcnow().isoformat() + "Z"
-
-    with db.get_session() as session:
-        # Check if post exists first
-        exists = session.run("MATCH (p:Post {id: $id}) RETURN p", id=post_id).single()
-        if not exists:
-            raise HTTPException(status_code=404, detail="Post not found")
-
-        # ✅ FIXED QUERY: Added WITH between MERGE and MATCH
-        session.run(
-            """
-            MERGE (u:User {id: $uid})
-            WITH u
-            MATCH (p:Post {id: $pid})
-            CREATE (c:Comment {
-                id: $id,
-                content: $content,
-                created_at: $created_at
-            })
-            MERGE (u)-[:AUTHORED]->(c)
-            MERGE (c)-[:ON_POST]->(p)
-            """,
-            uid=current_user["id"],
-            pid=post_id,
-            id=comment_id,
-            content=payload.content,
-            created_at=created_at,
-        )
-
-        user_data = current_user.copy()
-        user_data.pop("password", None)
+    comment_id, created_at = new_timed_id()
+
+    # Check if post exists first
+    if not repos.posts.exists(post_id):
+        raise HTTPException(status_code=404, detail="Post not found")
+
+    repos.comments.create(current_user["id"], post_id, {
+        "id": comment_id,
+        "content": payload.content,
+        "created_at": created_at,
+    })
+
+    user_data = current_user.copy()
+    user_data.pop("password", None)
 
     return {
         "id": comment_id,
@@ -63,26 +47,13 @@ def create_comment(
 # GET COMMENTS FOR A POST
 # -----------------------------
 @router.get("/{post_id}/comments")
-def get_comments_for_post(post_id: str):
-    with db.get_session() as session:
-        results = session.run(
-            """
-            MATCH (u:User)-[:AUTHORED]->(c:Comment)-[:ON_POST]->(p:Post {id: $pid})
-            RETURN c, u
-            ORDER BY c.created_at ASC
-            """,
-            pid=post_id,
-        )
-
-        comments = []
-        for record in results:
-            comment = dict(record["c"])
-            user = dict(record["u"])
-            user.pop("password", None)
-            comment["user"] = user
-            comments.append(comment)
-
-    return comments
+def get_comments_for_post(
+    post_id: str,
+    limit: Optional[int] = Query(None, ge=1, le=200),
+    after: Optional[str] = None,
+):
+    """Oldest first. With `limit`, one page: pass the last comment's `id` as `after` for the next."""
+    return repos.comments.list_for_post(post_id, limit, after)
 
 
 # -----------------------------
@@ -94,31 +65,12 @@ def update_comment(
     payload: CommentUpdate,
     current_user: dict = Depends(get_current_user)
 ):
-    updated_at = datetime.utcnow().isoformat() + "Z"
-
-    with db.get_session() as session:
-        record = session.run(
-            """
-            MATCH (u:User {id: $uid})-[:AUTHORED]->(c:Comment {id: $cid})
-            RETURN c
-            """,
-            uid=current_user["id"],
-            cid=comment_id,
-        ).single()
-
-        if not record:
-            raise HTTPException(status_code=403, detail="You can only edit your own comments.")
-
-        session.run(
-            """
-            MATCH (c:Comment {id: $cid})
-            SET c.content = $content,
-                c.updated_at = $updated_at
-            """,
-            cid=comment_id,
-            content=payload.content,
-            updated_at=updated_at,
-        )
+    updated_at = now_iso()
+
+    if not repos.comments.is_author(current_user["id"], comment_id):
+        raise HTTPException(status_code=403, detail="You can only edit your own comments.")
+
+    repos.comments.update(comment_id, payload.content, updated_at)
 
     return {"message": "Comment updated successfully", "updated_at": updated_at}
 
@@ -131,26 +83,11 @@ def delete_comment(
     comment_id: str,
     current_user: dict = Depends(get_current_user)
 ):
-    with db.get_session() as session:
-        record = session.run(
-            """
-            MATCH (u:User {id: $uid})-[:AUTHORED]->(c:Comment {id: $cid})
-            RETURN c
-            """,
-            uid=current_user["id"],
-            cid=comment_id,
-        ).single()
-
-        if not record:
-            raise HTTPException(status_code=403, detail="You can only delete your own comments.")
-
-        session.run(
-            """
-            MATCH (c:Comment {id: $cid})
-            DETACH DELETE c
-            """,
-            cid=comment_id,
-        )
+    if not repos.comments.is_author(current_user["id"], comment_id):
+        raise HTTPException(status_code=403, detail="You can only delete your own comments.")
+
+    repos.comments.delete(comment_id)
+    enqueue_job("purge_comment", {"comment_id": comment_id}, created_by=current_user["id"])
 
     return {"message": "Comment deleted successfully"}
 
@@ -0,0 +1,16 @@
+from fastapi import APIRouter, Depends, HTTPException
+from app.core.security import get_current_user
+from app.repositories import repos
+from app.routes.users import _is_admin
+from app.services.jobs import job_to_json
+
+router = APIRouter(prefix="/jobs", tags=["Jobs"])
+
+
+@router.get("/{job_id}")
+def get_job(job_id: str, current_user: dict = Depends(get_current_user)):
+    """Status and progress of a background job; visible to whoever queued it and to admins."""
+    job = repos.jobs.get(job_id)
+    if not job or (job.get("created_by") != current_user["id"] and not _is_admin(current_user)):
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job_to_json(job)
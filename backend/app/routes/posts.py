@@ -1,10 +1,16 @@
-from fastapi import APIRouter, UploadFile, File, Form, HTTPException, Depends, Request
-from app.core.database import db
-from app.core.security import get_current_user
-from uuid import uuid4
-from datetime import datetime
+from fastapi import APIRouter, UploadFile, File, Form, HTTPException, Depends, Query, Request
+from app.core.cache import profile_cache
+from app.core.security import get_current_user, get_current_user_full
+from app.core.fields import parse_fields
+from app.core.ids import new_timed_id
+from app.core.pagination import decode_cursor, encode_cursor
+from app.core.text_search import highlight, tokenize
+from app.repositories import repos
+from app.repositories.base import POST_LIST_FIELDS
+from app.services.jobs import enqueue_job
 from typing import Optional
 import os
+import time
 import cloudinary.uploader
 from fastapi import status
 import logging
@@ -50,37 +56,20 @@ async def upload_to_cloudinary(file: UploadFile, folder: str = "posts") -> str:
 async def create_post(
     content: str = Form(...),
     image: Optional[UploadFile] = File(None),
-    current_user: dict = Depends(get_current_user),
+    current_user: dict = Depends(get_current_user_full),
 ):
-    post_id = str(uuid4())
-    created_at = datetime.utcnow().isoformat() + "Z"
+    post_id, created_at = new_timed_id()
 
     image_url = None
     if image is not None:
         image_url = await upload_to_cloudinary(image, folder="posts")
 
-    with db.get_session() as session:
-        session.run(
-            """
-            MERGE (u:User {id: $author_id})
-            ON CREATE SET u.name = $name, u.username = $username, u.avatar_url = $avatar_url
-            CREATE (p:Post {
-                id: $id,
-                content: $content,
-                image_url: $image_url,
-                created_at: $created_at
-            })
-            MERGE (u)-[:AUTHORED]->(p)
-            """,
-            author_id=current_user["id"],
-            name=current_user.get("name"),
-            username=current_user.get("username"),
-            avatar_url=current_user.get("avatar_url"),
-            id=post_id,
-            content=content,
-            image_url=image_url,
-            created_at=created_at,
-        )
+    repos.posts.create(current_user, {
+        "id": post_id,
+        "content": content,
+        "image_url": image_url,
+        "created_at": created_at,
+    })
 
     return {
         "id": post_id,
@@ -97,68 +86,57 @@ async def create_post(
 
 
 @router.get("/")
-def get_posts(user_id: Optional[str] = None):
-    with db.get_session() as session:
-        if user_id:
-            results = session.run(
-                """
-                MATCH (u:User {id: $uid})-[:AUTHORED]->(p:Post)
-                OPTIONAL MATCH (p)<-[:LIKED]-(l:User)
-                OPTIONAL MATCH (c:Comment)-[:ON_POST]->(p)
-                RETURN p, u,
-                       count(DISTINCT l) as likes_count,
-                       count(DISTINCT c) as comments_count
-                ORDER BY p.created_at DESC
-                """,
-                uid=user_id,
-            )
-        else:
-            results = session.run(
-                """
-                MATCH (u:User)-[:AUTHORED]->(p:Post)
-                OPTIONAL MATCH (p)<-[:LIKED]-(l:User)
-                OPTIONAL MATCH (c:Comment)-[:ON_POST]->(p)
-                RETURN p, u,
-                       count(DISTINCT l) as likes_count,
-                       count(DISTINCT c) as comments_count
-                ORDER BY p.created_at DESC
-                """
-            )
-
-        posts = []
-        for record in results:
-            p = dict(record["p"])
-            u = dict(record["u"])
-            p["user"] = u
-            p["likes_count"] = record["likes_count"]
-            p["comments_count"] = record["comments_count"]
-            posts.append(p)
-        return posts
+def get_posts(
+    user_id: Optional[str] = None,
+    fields: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=100),
+    before: Optional[str] = None,
+):
+    """Posts newest first. `fields` (comma separated) limits the projection;
+    like/comment counts are only computed when requested. With `limit`, one
+    page: pass the last post's `id` as `before` for the next."""
+    selected = parse_fields(fields, POST_LIST_FIELDS)
+    if limit and "id" not in selected:
+        selected = ["id", *selected]
+    return repos.posts.list_posts(selected, user_id, limit, before)
+
+
+@router.get("/search")
+def search_posts(
+    q: str,
+    limit: int = Query(20, ge=1, le=50),
+    cursor: Optional[str] = None,
+):
+    """Full-text search over post content and comments, ranked by relevance
+    discounted by age. Each post carries `highlights` (HTML-escaped snippets
+    with <mark> around matches). Pass `next_cursor` back as `cursor`."""
+    # (rank, post id, clock of the first page)
+    after = decode_cursor(cursor, 3, (float, str, float))
+    # Later pages rank against the first page's clock so the order stays put
+    as_of = after[2] if after else time.time()
+    rows = repos.posts.search(q, as_of, limit + 1, (after[0], after[1]) if after else None)
+    page = rows[:limit]
+    tokens = tokenize(q)
+    for post in page:
+        post["highlights"] = {
+            "content": highlight(post.get("content"), tokens),
+            "comments": [
+                {"id": c["id"], "snippet": highlight(c.get("content"), tokens)}
+                for c in post.pop("matched_comments")
+            ],
+        }
+    next_cursor = encode_cursor(page[-1]["rank"], page[-1]["id"], as_of) if len(rows) > limit else None
+    for post in page:
+        post.pop("rank")
+    return {"results": page, "next_cursor": next_cursor}
 
 
 @router.get("/{post_id}")
 def get_post(post_id: str):
-    with db.get_session() as session:
-        rec = session.run(
-            """
-            MATCH (u:User)-[:AUTHORED]->(p:Post {id: $id})
-            OPTIONAL MATCH (p)<-[:LIKED]-(l:User)
-            OPTIONAL MATCH (c:Comment)-[:ON_POST]->(p)
-            RETURN p, u,
-                   count(DISTINCT l) as likes_count,
-                   count(DISTINCT c) as comments_count
-            """,
-            id=post_id,
-        ).single()
-
-        if not rec:
-            raise HTTPException(status_code=404, detail="Post not found")
-
-        p = dict(rec["p"])
-        p["user"] = dict(rec["u"])
-        p["likes_count"] = rec["likes_count"]
-        p["comments_count"] = rec["comments_count"]
-        return p
+    p = repos.posts.get(post_id)
+    if not p:
+        raise HTTPException(status_code=404, detail="Post not found")
+    return p
 
 
 @router.put("/{post_id}")
@@ -170,13 +148,8 @@ async def update_post(
     current_user: dict = Depends(get_current_user),
 ):
     # Ensure ownership
-    with db.get_session() as session:
-        rel = session.run(
-            "MATCH (u:User {id: $uid})-[:AUTHORED]->(p:Post {id: $pid}) RETURN p",
-            uid=current_user["id"], pid=post_id,
-        ).single()
-        if not rel:
-            raise HTTPException(status_code=403, detail="Not authorized")
+    if not repos.posts.is_author(current_user["id"], post_id):
+        raise HTTPException(status_code=403, detail="Not authorized")
 
     # Determine payload source
     ct = request.headers.get("content-type", "").lower()
@@ -199,101 +172,54 @@ async def update_post(
         new_content = content
         new_image = image
 
-    # Update post
-    with db.get_session() as session:
-        # If new image is provided, update it
-        if new_image:
-            try:
-                image_url = await upload_to_cloudinary(new_image, folder="posts")
-                
-                session.run(
-                    """
-                    MATCH (p:Post {id: $id})
-                    SET p.image_url = $image_url
-                    RETURN p
-                    """,
-                    id=post_id,
-                    image_url=image_url
-                )
-            except HTTPException as he:
-                raise he
-            except Exception as e:
-                logger.error(f"Error updating post image: {str(e)}")
-                raise HTTPException(
-                    status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                    detail=f"Failed to update image: {str(e)}"
-                )
+    updates = {}
+    # If new image is provided, update it
+    if new_image:
+        try:
+            updates["image_url"] = await upload_to_cloudinary(new_image, folder="posts")
+        except HTTPException as he:
+            raise he
+        except Exception as e:
+            logger.error(f"Error updating post image: {str(e)}")
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"Failed to update image: {str(e)}"
+            )
 
     # Apply content updates if any
-    updates = {}
     if new_content is not None:
         updates["content"] = new_content
-    
-    # If we have updates, apply them
-    with db.get_session() as session:
-        if updates:
-            session.run("""
-                MATCH (p:Post {id: $id})
-                SET p += $updates
-            """, id=post_id, updates=updates)
-
-        # Get the updated post with all relationships
-        rec = session.run(
-            """
-            MATCH (u:User)-[:AUTHORED]->(p:Post {id: $id})
-            OPTIONAL MATCH (p)<-[:LIKED]-(l:User)
-            OPTIONAL MATCH (c:Comment)-[:ON_POST]->(p)
-            RETURN p, u,
-                   count(DISTINCT l) as likes_count,
-                   count(DISTINCT c) as comments_count
-            """,
-            id=post_id,
-        ).single()
 
-        if not rec:
-            return {"id": post_id, **updates}
+    # If we have updates, apply them (image and content in one write)
+    if updates:
+        repos.posts.update(post_id, updates)
+        # Pinned posts are embedded in the author's cached profile
+        profile_cache.invalidate(current_user["id"])
 
-        p = dict(rec["p"])
-        p["user"] = dict(rec["u"])
-        p["likes_count"] = rec["likes_count"]
-        p["comments_count"] = rec["comments_count"]
-        return p
+    # Get the updated post with all relationships
+    p = repos.posts.get(post_id)
+    if not p:
+        return {"id": post_id, **updates}
+    return p
 
 
 @router.delete("/{post_id}")
 def delete_post(post_id: str, current_user: dict = Depends(get_current_user)):
-    with db.get_session() as session:
-        rel = session.run(
-            "MATCH (u:User {id: $uid})-[:AUTHORED]->(p:Post {id: $pid}) RETURN p",
-            uid=current_user["id"], pid=post_id,
-        ).single()
-        if not rel:
-            raise HTTPException(status_code=403, detail="Not authorized")
+    if not repos.posts.is_author(current_user["id"], post_id):
+        raise HTTPException(status_code=403, detail="Not authorized")
 
-        session.run("MATCH (p:Post {id: $id}) DETACH DELETE p", id=post_id)
+    repos.posts.delete(post_id)
+    profile_cache.invalidate(current_user["id"])
+    # Comments and likes go in the background; the post is already hidden
+    enqueue_job("purge_post", {"post_id": post_id}, created_by=current_user["id"])
 
     return {"detail": "Post deleted"}
 
 
 @router.post("/{post_id}/like")
 def like_post(post_id: str, current_user: dict = Depends(get_current_user)):
-    with db.get_session() as session:
-        exists = session.run("MATCH (p:Post {id: $id}) RETURN p", id=post_id).single()
-        if not exists:
-            raise HTTPException(status_code=404, detail="Post not found")
-
-        session.run(
-            """
-            MATCH (u:User {id: $uid}), (p:Post {id: $pid})
-            MERGE (u)-[:LIKED]->(p)
-            """,
-            uid=current_user["id"],
-            pid=post_id,
-        )
-
-        count_rec = session.run(
-            "MATCH (:User)-[:LIKED]->(p:Post {id: $pid}) RETURN count(*) as likes",
-            pid=post_id,
-        ).single()
+    if not repos.posts.exists(post_id):
+        raise HTTPException(status_code=404, detail="Post not found")
 
-        return {"post_id": post_id, "likes": count_rec["likes"]}
+    likes = repos.posts.like(current_user["id"], post_id)
+    return {"post_id": post_id, "likes": likes}
@@ -1,7 +1,14 @@
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, Form, File, status
-from app.core.database import db
+from fastapi import APIRouter, Depends, HTTPException, Query, UploadFile, Form, File, status
+from app.core.cache import profile_cache
+from app.core.config import settings
 from app.core.security import get_current_user
-from app.schemas.user_schema import UserUpdate
+from app.core.fields import parse_fields
+from app.core.pagination import decode_cursor, encode_cursor
+from app.repositories import DuplicateUserError, repos
+from app.repositories.base import USER_LIST_FIELDS, USER_PROFILE_FIELDS, USER_SORTS
+from app.schemas.user_schema import RelationshipsRequest, UserUpdate
+from app.services.jobs import enqueue_job, job_to_json
+from app.services.recommendations import neighbourhood_changed, recommendations_for
 import os
 from uuid import uuid4
 import cloudinary.uploader
@@ -26,124 +33,115 @@ def _is_admin(user: dict | None) -> bool:
     role = str(user.get("role") or "").lower()
     return role in {"admin", "superadmin"}
 
-@router.get("/")
-def list_users(me: str | None = None):
-    """Return a list of users with counts and is_following relative to optional me.
-    profile_pic is a full URL.
-    """
-    with db.get_session() as session:
-        results = session.run(
-            """
-            MATCH (u:User)
-            OPTIONAL MATCH (u)<-[:FOLLOWS]-(f)
-            WITH u, count(f) AS followers_count
-            OPTIONAL MATCH (u)-[:FOLLOWS]->(g)
-            WITH u, followers_count, count(g) AS following_count
-            RETURN u, followers_count, following_count
-            LIMIT 500
-            """
-        )
-        # Pre-compute following set for 'me' if provided
-        my_following: set[str] = set()
-        if me:
-            q = session.run(
-                "MATCH (:User {id: $me})-[:FOLLOWS]->(x:User) RETURN x.id AS id",
-                me=me,
-            )
-            my_following = {rec["id"] for rec in q}
-
-        out = []
-        for r in results:
-            u = dict(r["u"])
-            u.pop("password", None)
-            out.append({
-                "id": u.get("id"),
-                "username": u.get("username"),
-                "bio": u.get("bio"),
-                "followers_count": r["followers_count"] or 0,
-                "following_count": r["following_count"] or 0,
-                "is_following": (u.get("id") in my_following) if me else False,
-                # Return FULL URL per requirement
-                "profile_pic": _full_profile_pic(u.get("avatar_url")),
-            })
-        return out
+def _user_row_to_json(r, fields: list[str]) -> dict:
+    out = {}
+    for f in fields:
+        value = r[f]
+        if f.endswith("_count"):
+            value = value or 0
+        elif f == "is_following":
+            value = bool(value)
+        elif f == "profile_pic":
+            value = _full_profile_pic(value)
+        elif f == "pinned_posts":
+            value = value or []
+        out[f] = value
+    return out
 
 
-@router.delete("/{user_id}")
+@router.get("/")
+def list_users(
+    me: str | None = None,
+    fields: str | None = None,
+    sort: str = "newest",
+    limit: int = Query(24, ge=1, le=100),
+    cursor: str | None = None,
+):
+    """One page of users with counts and is_following relative to optional me,
+    newest first or most followed first (`sort`). profile_pic is a full URL.
+    `fields` (comma separated) limits the projection. Pass `next_cursor`
+    back as `cursor` for the next page.
+    """
+    if sort not in USER_SORTS:
+        raise HTTPException(status_code=400, detail=f"Unknown sort. Allowed: {', '.join(USER_SORTS)}")
+    selected = parse_fields(fields, USER_LIST_FIELDS)
+    after = decode_cursor(cursor, 2)
+    rows = repos.users.list_users(selected, me, limit + 1, sort, tuple(after) if after else None)
+    page = rows[:limit]
+    next_cursor = encode_cursor(page[-1]["_key"], page[-1]["_id"]) if len(rows) > limit else None
+    return {"results": [_user_row_to_json(r, selected) for r in page], "next_cursor": next_cursor}
+
+
+def _search_row_to_json(r: dict) -> dict:
+    return {
+        "id": r["id"],
+        "username": r.get("username"),
+        "name": r.get("name"),
+        "bio": r.get("bio"),
+        "profile_pic": _full_profile_pic(r.get("profile_pic")),
+        "followers_count": r.get("followers_count") or 0,
+        "mutual_count": r.get("mutual_count") or 0,
+    }
+
+
+@router.get("/search")
+def search_users_typeahead(
+    q: str,
+    me: str | None = None,
+    limit: int = Query(10, ge=1, le=50),
+    cursor: str | None = None,
+):
+    """Typeahead: prefix/fuzzy match on username and display name, best
+    matches first, then by mutual connections with `me` and follower count.
+    Pass `next_cursor` back as `cursor` for the next page."""
+    after = decode_cursor(cursor, 2, (float, str))
+    rows = repos.users.search(q, me, limit + 1, tuple(after) if after else None)
+    page = rows[:limit]
+    next_cursor = encode_cursor(page[-1]["rank"], page[-1]["id"]) if len(rows) > limit else None
+    return {"results": [_search_row_to_json(r) for r in page], "next_cursor": next_cursor}
+
+
+@router.post("/relationships")
+def get_relationships(body: RelationshipsRequest, current_user: dict = Depends(get_current_user)):
+    """Follow status between the caller and each of `ids`, in one query:
+    { "results": { user_id: { "following": bool, "followed_by": bool } } }.
+    Unknown ids are left out."""
+    ids = list(dict.fromkeys(body.ids))
+    if len(ids) > settings.RELATIONSHIP_BATCH_MAX:
+        raise HTTPException(status_code=400, detail=f"At most {settings.RELATIONSHIP_BATCH_MAX} ids per request")
+    return {"results": repos.follows.follow_status(current_user["id"], ids)}
+
+
+@router.delete("/{user_id}", status_code=status.HTTP_202_ACCEPTED)
 def delete_user_admin(user_id: str, current_user: dict = Depends(get_current_user)):
-    """Admin-only: delete a user node and all their messages.
-    Also prunes conversations that become empty after deletion.
+    """Admin-only: queue deletion of a user node and all their messages.
+    Also prunes the user's conversations that become empty. Runs as a
+    background job in batches: poll GET /jobs/{id} for progress.
 
-    Returns: { "success": true, "deleted_user": user_id, "deleted_messages": X }
+    Returns: { "success": true, "job": {...} }
     """
     if not _is_admin(current_user):
         raise HTTPException(status_code=403, detail="Admin privileges required")
 
-    with db.get_session() as session:
-        # Validate user exists
-        rec = session.run("MATCH (u:User {id:$id}) RETURN u.id as id", id=user_id).single()
-        if not rec:
-            raise HTTPException(status_code=404, detail="User not found")
+    # Validate user exists
+    if not repos.users.get_by_id(user_id):
+        raise HTTPException(status_code=404, detail="User not found")
 
-        # Count messages sent by user
-        count_rec = session.run(
-            """
-            MATCH (:User {id:$uid})-[:SENT]->(m:Message)
-            RETURN count(m) as cnt
-            """,
-            uid=user_id,
-        ).single()
-        deleted_messages = int(count_rec["cnt"] or 0) if count_rec else 0
-
-        # Delete messages sent by user
-        session.run(
-            """
-            MATCH (:User {id:$uid})-[:SENT]->(m:Message)
-            DETACH DELETE m
-            """,
-            uid=user_id,
-        )
-
-        # Delete the user node and all its relationships
-        session.run("MATCH (u:User {id:$id}) DETACH DELETE u", id=user_id)
-
-        # Prune empty conversations
-        session.run(
-            """
-            MATCH (c:Conversation)
-            WHERE NOT (c)-[:HAS_MESSAGE]->()
-            DETACH DELETE c
-            """
-        )
-
-    return {"success": True, "deleted_user": user_id, "deleted_messages": deleted_messages}
+    job = enqueue_job("delete_user", {"user_id": user_id}, created_by=current_user["id"])
+    return {"success": True, "job": job_to_json(job)}
 
 @router.get("/me")
 def get_me(current_user: dict = Depends(get_current_user)):
-    # Fetch pinned posts and follow relationships
-    with db.get_session() as session:
-        pinned = session.run(
-            "MATCH (u:User {id: $id})-[:PINNED]->(p:Post) RETURN p", id=current_user["id"]
-        )
-        pinned_posts = [dict(r["p"]) for r in pinned]
-
-        rels = session.run(
-            """
-            MATCH (me:User {id: $id})
-            OPTIONAL MATCH (me)-[:FOLLOWS]->(f:User)
-            WITH me, collect(f.id) AS following_ids
-            OPTIONAL MATCH (f2:User)-[:FOLLOWS]->(me)
-            RETURN following_ids, collect(f2.id) AS followers_ids
-            """,
-            id=current_user["id"],
-        ).single()
-
-    user = current_user.copy()
-    user["pinned_posts"] = pinned_posts
-    user["following_ids"] = rels["following_ids"] or []
-    user["followers_ids"] = rels["followers_ids"] or []
-    # Add full URL for profile_pic
-    user["profile_pic"] = _full_profile_pic(user.get("avatar_url"))
+    # One query for the user, counts and pins; cached briefly per user
+    key = ("me", current_user["id"])
+    user = profile_cache.get(key)
+    if user is None:
+        user = repos.users.get_own_profile(current_user["id"])
+        if not user:
+            raise HTTPException(status_code=404, detail="User not found")
+        # Add full URL for profile_pic
+        user["profile_pic"] = _full_profile_pic(user.get("avatar_url"))
+        profile_cache.set(key, user, tags=[current_user["id"]])
     return user
 
 @router.put("/me")
@@ -195,20 +193,16 @@ async def update_me(
     if not updates:
         return current_user
 
-    with db.get_session() as session:
-        session.run(
-            "MATCH (u:User {id: $id}) SET u += $updates RETURN u",
-            id=current_user["id"],
-            updates=updates,
-        )
-        rec = session.run("MATCH (u:User {id: $id}) RETURN u", id=current_user["id"]).single()
-        if not rec:
-            raise HTTPException(status_code=404, detail="User not found")
-        u = dict(rec["u"])
-        u.pop("password", None)
-        # Return full URL for profile_pic
-        u["profile_pic"] = _full_profile_pic(u.get("avatar_url"))
-        return u
+    try:
+        u = repos.users.update(current_user["id"], updates)
+    except DuplicateUserError:
+        raise HTTPException(status_code=400, detail="Username already taken")
+    if not u:
+        raise HTTPException(status_code=404, detail="User not found")
+    profile_cache.invalidate(current_user["id"])
+    # Return full URL for profile_pic
+    u["profile_pic"] = _full_profile_pic(u.get("avatar_url"))
+    return u
 
 @router.put("/{user_id}")
 async def update_user_by_id(
@@ -229,146 +223,98 @@ async def update_user_by_id(
     return await update_me(username=username, bio=bio, avatar=avatar, current_user=current_user, file=file)
 
 @router.get("/{user_id}")
-def get_user_by_id(user_id: str, me: str | None = None):
-    with db.get_session() as session:
-        rec = session.run("MATCH (u:User {id: $id}) RETURN u", id=user_id).single()
+def get_user_by_id(user_id: str, me: str | None = None, fields: str | None = None):
+    selected = parse_fields(fields, USER_PROFILE_FIELDS)
+    key = ("profile", user_id, me, tuple(selected))
+    profile = profile_cache.get(key)
+    if profile is None:
+        rec = repos.users.get_profile(user_id, selected, me)
         if not rec:
             raise HTTPException(status_code=404, detail="User not found")
-        u = dict(rec["u"])
-        u.pop("password", None)
-
-        # Counts
-        counts = session.run(
-            """
-            MATCH (u:User {id: $id})
-            OPTIONAL MATCH (u)<-[:FOLLOWS]-(f)
-            WITH u, count(f) AS followers_count
-            OPTIONAL MATCH (u)-[:FOLLOWS]->(g)
-            RETURN followers_count, count(g) AS following_count
-            """,
-            id=user_id,
-        ).single()
-        followers_count = counts["followers_count"] or 0
-        following_count = counts["following_count"] or 0
-
-        # is_following relative to me
-        following_bool = False
-        if me:
-            chk = session.run(
-                "MATCH (:User {id: $me})-[:FOLLOWS]->(:User {id: $id}) RETURN 1 AS ok",
-                me=me,
-                id=user_id,
-            ).single()
-            following_bool = bool(chk)
-
-        # Include pinned posts
-        pinned = session.run(
-            "MATCH (u:User {id: $id})-[:PINNED]->(p:Post) RETURN p", id=user_id
-        )
-        result = {
-            "id": u.get("id"),
-            "username": u.get("username"),
-            "bio": u.get("bio"),
-            "followers_count": followers_count,
-            "following_count": following_count,
-            "is_following": following_bool,
-            "profile_pic": _full_profile_pic(u.get("avatar_url")),
-            "pinned_posts": [dict(r["p"]) for r in pinned],
-        }
-        return result
+        profile = _user_row_to_json(rec, selected)
+        profile_cache.set(key, profile, tags=[user_id])
+    return profile
 
 
 @router.post("/{user_id}/follow")
 def follow_user(user_id: str, current_user: dict = Depends(get_current_user)):
-    with db.get_session() as session:
-        session.run(
-            "MATCH (me:User {id: $me}), (u:User {id: $uid}) MERGE (me)-[:FOLLOWS]->(u)",
-            me=current_user["id"], uid=user_id
-        )
+    repos.follows.follow(current_user["id"], user_id)
+    profile_cache.invalidate(current_user["id"], user_id)
+    neighbourhood_changed(current_user["id"])
     return {"detail": "Followed"}
 
 
 @router.post("/{user_id}/unfollow")
 def unfollow_user(user_id: str, current_user: dict = Depends(get_current_user)):
-    with db.get_session() as session:
-        session.run(
-            "MATCH (me:User {id: $me})-[r:FOLLOWS]->(u:User {id: $uid}) DELETE r",
-            me=current_user["id"], uid=user_id
-        )
+    repos.follows.unfollow(current_user["id"], user_id)
+    profile_cache.invalidate(current_user["id"], user_id)
+    neighbourhood_changed(current_user["id"])
     return {"detail": "Unfollowed"}
 
-@router.get("/{user_id}/followers")
-def list_followers(user_id: str):
-    with db.get_session() as session:
-        recs = session.run(
-            "MATCH (:User {id: $id})<-[:FOLLOWS]-(f:User) RETURN f",
-            id=user_id,
-        )
-        out = []
-        for r in recs:
-            u = dict(r["f"])
-            u.pop("password", None)
-            out.append({
+def _follow_page(rows: list[dict], limit: int) -> dict:
+    page = rows[:limit]
+    next_cursor = encode_cursor(page[-1]["_key"], page[-1]["_id"]) if len(rows) > limit else None
+    return {
+        "results": [
+            {
                 "id": u.get("id"),
                 "username": u.get("username"),
                 "bio": u.get("bio"),
                 "profile_pic": _full_profile_pic(u.get("avatar_url")),
-            })
-        return out
+            }
+            for u in page
+        ],
+        "next_cursor": next_cursor,
+    }
+
+@router.get("/{user_id}/followers")
+def list_followers(user_id: str, limit: int = Query(50, ge=1, le=200), cursor: str | None = None):
+    """Most recent followers first; pass `next_cursor` back as `cursor`."""
+    after = decode_cursor(cursor, 2)
+    return _follow_page(repos.follows.followers(user_id, limit + 1, tuple(after) if after else None), limit)
 
 @router.get("/{user_id}/following")
-def list_following(user_id: str):
-    with db.get_session() as session:
-        recs = session.run(
-            "MATCH (:User {id: $id})-[:FOLLOWS]->(f:User) RETURN f",
-            id=user_id,
-        )
-        out = []
-        for r in recs:
-            u = dict(r["f"])
-            u.pop("password", None)
-            out.append({
-                "id": u.get("id"),
-                "username": u.get("username"),
-                "bio": u.get("bio"),
-                "profile_pic": _full_profile_pic(u.get("avatar_url")),
-            })
-        return out
+def list_following(user_id: str, limit: int = Query(50, ge=1, le=200), cursor: str | None = None):
+    """Most recently followed first; pass `next_cursor` back as `cursor`."""
+    after = decode_cursor(cursor, 2)
+    return _follow_page(repos.follows.following(user_id, limit + 1, tuple(after) if after else None), limit)
 
 
+@router.get("/me/recommendations")
+def get_my_recommendations(
+    limit: int = Query(20, ge=1, le=50),
+    current_user: dict = Depends(get_current_user),
+):
+    """People you may know: friends of friends and people in the same
+    program, best first. `mutual_count` is how many people you follow
+    follow them. Lists are precomputed and refreshed after follows."""
+    rows = recommendations_for(current_user["id"], limit)
+    return {
+        "results": [
+            {
+                "id": r["id"],
+                "username": r.get("username"),
+                "name": r.get("name"),
+                "bio": r.get("bio"),
+                "profile_pic": _full_profile_pic(r.get("profile_pic")),
+                "followers_count": r.get("followers_count") or 0,
+                "mutual_count": r.get("mutual_count") or 0,
+                "same_program": bool(r.get("same_program")),
+                "is_following": False,
+            }
+            for r in rows
+        ]
+    }
+
 @router.get("/me/feed")
 def get_my_feed(current_user: dict = Depends(get_current_user)):
-    with db.get_session() as session:
-        results = session.run(
-            """
-            MATCH (me:User {id: $me})-[:FOLLOWS]->(u:User)-[:AUTHORED]->(p:Post)
-            RETURN p ORDER BY p.created_at DESC
-            """,
-            me=current_user["id"]
-        )
-        posts = [dict(r["p"]) for r in results]
-        # Include pinned posts
-        pinned = session.run(
-            "MATCH (me:User {id: $me})-[:PINNED]->(p:Post) RETURN p", me=current_user["id"]
-        )
-        pinned_posts = [dict(r["p"]) for r in pinned]
-        return {"posts": posts, "pinned_posts": pinned_posts}
+    posts = repos.posts.feed_for(current_user["id"])
+    # Include pinned posts
+    pinned_posts = repos.users.pinned_posts(current_user["id"])
+    return {"posts": posts, "pinned_posts": pinned_posts}
 
 
 @router.get("/search/{query}")
-def search_users(query: str):
-    with db.get_session() as session:
-        results = session.run(
-            """
-            MATCH (u:User)
-            WHERE toLower(u.username) CONTAINS toLower($q) OR toLower(u.email) CONTAINS toLower($q)
-            RETURN u LIMIT 50
-            """,
-            q=query
-        )
-        out = []
-        for r in results:
-            u = dict(r["u"])
-            u.pop("password", None)
-            out.append(u)
-        return out
+def search_users(query: str, me: str | None = None):
+    """Older full-page search; same index and ranking as GET /users/search."""
+    return [_search_row_to_json(r) for r in repos.users.search(query, me, limit=50)]
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, EmailStr 
-from typing import Optional
+from typing import List, Optional
 
 class UserCreate(BaseModel):
     username: str
@@ -20,6 +20,9 @@ class UserResponse(BaseModel):
     class Config:
         from_attributes = True
 
+class RelationshipsRequest(BaseModel):
+    ids: List[str]
+
 class UserUpdate(BaseModel):
     bio: Optional[str] = None
     profile_pic: Optional[str] = None
@@ -0,0 +1,223 @@
+"""Email outbox worker.
+
+Request handlers only `queue_email(...)`, which writes the message to the
+persistent outbox (repos.outbox) and wakes the worker. The worker runs on
+the event loop but does all delivery on its own small thread pool:
+
+- claims up to EMAIL_BATCH_SIZE due messages per round (with a lease, so a
+  crashed worker's messages are picked up again);
+- splits them over EMAIL_CONCURRENCY sender threads, each reusing one
+  transport connection for its chunk;
+- removes delivered messages in one write, and reschedules failures with
+  exponential backoff until EMAIL_MAX_ATTEMPTS, after which they are kept
+  as "dead" for inspection.
+
+EMAIL_TRANSPORT picks the delivery: "sendgrid", "smtp" (e.g. a local
+MailHog/Mailpit) or "file" (writes .eml files to EMAIL_FILE_DIR, for
+development and tests).
+"""
+import asyncio
+import logging
+import os
+import random
+import smtplib
+import time
+import uuid
+from abc import ABC, abstractmethod
+from email.message import EmailMessage
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.core.config import settings
+from app.core.metrics import email_outbox_results
+from app.core.timestamps import now_iso
+from app.repositories import repos
+from app.services.worker import PollingWorker
+
+logger = logging.getLogger(__name__)
+
+# A claimed message not completed within this long is considered abandoned
+LEASE_SECONDS = 300.0
+
+Email = Dict[str, Any]
+# (email id, error message or None on success)
+SendResult = Tuple[str, Optional[str]]
+
+
+class EmailTransport(ABC):
+    @abstractmethod
+    def send_batch(self, emails: List[Email]) -> List[SendResult]:
+        """Blocking; called from the worker's sender threads. Failures,
+        including ones that sink the whole batch, are reported per email."""
+
+
+def _mime(email: Email) -> EmailMessage:
+    msg = EmailMessage()
+    msg["From"] = settings.MAIL_FROM
+    msg["To"] = email["to"]
+    msg["Subject"] = email["subject"]
+    msg["Message-ID"] = f"<{email['id']}@outbox>"
+    msg.set_content(email.get("text") or "")
+    if email.get("html"):
+        msg.add_alternative(email["html"], subtype="html")
+    return msg
+
+
+class SendGridTransport(EmailTransport):
+    def send_batch(self, emails):
+        try:
+            from sendgrid import SendGridAPIClient
+            from sendgrid.helpers.mail import Mail
+        except ImportError as exc:
+            return [(e["id"], f"sendgrid not installed: {exc}") for e in emails]
+
+        if not settings.SENDGRID_API_KEY:
+            return [(e["id"], "SENDGRID_API_KEY not configured") for e in emails]
+        client = SendGridAPIClient(settings.SENDGRID_API_KEY)
+        results = []
+        for e in emails:
+            try:
+                response = client.send(Mail(
+                    from_email=settings.MAIL_FROM,
+                    to_emails=e["to"],
+                    subject=e["subject"],
+                    html_content=e.get("html"),
+                    plain_text_content=e.get("text"),
+                ))
+                ok = response.status_code in (200, 202)
+                results.append((e["id"], None if ok else f"SendGrid status {response.status_code}: {response.body}"))
+            except Exception as exc:
+                results.append((e["id"], f"{exc} {getattr(exc, 'body', '')}".strip()))
+        return results
+
+
+class SmtpTransport(EmailTransport):
+    def send_batch(self, emails):
+        try:
+            server = smtplib.SMTP(settings.SMTP_HOST, settings.SMTP_PORT, timeout=30)
+        except OSError as exc:
+            return [(e["id"], f"SMTP connect failed: {exc}") for e in emails]
+        results = []
+        with server:
+            try:
+                if settings.SMTP_STARTTLS:
+                    server.starttls()
+                if settings.SMTP_USER:
+                    server.login(settings.SMTP_USER, settings.SMTP_PASSWORD or "")
+            except (smtplib.SMTPException, OSError) as exc:
+                return [(e["id"], f"SMTP session setup failed: {exc}") for e in emails]
+            for e in emails:
+                try:
+                    server.send_message(_mime(e))
+                    results.append((e["id"], None))
+                except (smtplib.SMTPException, OSError) as exc:
+                    results.append((e["id"], str(exc)))
+        return results
+
+
+class FileTransport(EmailTransport):
+    def send_batch(self, emails):
+        os.makedirs(settings.EMAIL_FILE_DIR, exist_ok=True)
+        results = []
+        for e in emails:
+            path = os.path.join(settings.EMAIL_FILE_DIR, f"{int(time.time() * 1000)}-{e['id']}.eml")
+            try:
+                with open(path, "wb") as f:
+                    f.write(bytes(_mime(e)))
+                results.append((e["id"], None))
+            except OSError as exc:
+                results.append((e["id"], str(exc)))
+        return results
+
+
+TRANSPORTS = {"sendgrid": SendGridTransport, "smtp": SmtpTransport, "file": FileTransport}
+
+
+def _send_chunk(transport: EmailTransport, chunk: List[Email]) -> List[SendResult]:
+    """send_batch, with anything it lets escape charged to every email in the
+    chunk, so the round still records the attempt instead of failing and
+    leaving the batch 'sending' until its lease runs out."""
+    try:
+        return transport.send_batch(chunk)
+    except Exception as exc:
+        logger.exception("email transport failed on a batch of %d", len(chunk))
+        return [(e["id"], f"{type(exc).__name__}: {exc}") for e in chunk]
+
+
+def _backoff(attempts: int) -> float:
+    delay = min(settings.EMAIL_RETRY_MAX_SECONDS, settings.EMAIL_RETRY_BASE_SECONDS * 2 ** (attempts - 1))
+    return delay * random.uniform(0.8, 1.2)
+
+
+class EmailOutboxWorker(PollingWorker):
+    name = "email"
+
+    def __init__(self, transport: Optional[EmailTransport] = None):
+        super().__init__()
+        self.transport = transport
+
+    @property
+    def poll_seconds(self) -> float:
+        return settings.EMAIL_POLL_SECONDS
+
+    @property
+    def threads(self) -> int:
+        return settings.EMAIL_CONCURRENCY
+
+    def start(self) -> None:
+        if self.transport is None:
+            self.transport = TRANSPORTS[settings.EMAIL_TRANSPORT.lower()]()
+        super().start()
+
+    async def run_once(self) -> int:
+        """One claim/send/record round; returns the number of messages handled."""
+        loop = asyncio.get_running_loop()
+        batch = await loop.run_in_executor(
+            self._executor, repos.outbox.claim, time.time(), settings.EMAIL_BATCH_SIZE, LEASE_SECONDS
+        )
+        if not batch:
+            return 0
+        chunks = [batch[i::settings.EMAIL_CONCURRENCY] for i in range(settings.EMAIL_CONCURRENCY)]
+        results = await asyncio.gather(*(
+            loop.run_in_executor(self._executor, _send_chunk, self.transport, chunk) for chunk in chunks if chunk
+        ))
+        by_id = {e["id"]: e for e in batch}
+        delivered = []
+        for email_id, error in (r for chunk in results for r in chunk):
+            if error is None:
+                delivered.append(email_id)
+                continue
+            attempts = int(by_id[email_id].get("attempts") or 0) + 1
+            if attempts >= settings.EMAIL_MAX_ATTEMPTS:
+                logger.error("email %s to %s failed permanently: %s", email_id, by_id[email_id]["to"], error)
+                email_outbox_results.inc(result="dead")
+                await loop.run_in_executor(self._executor, repos.outbox.fail, email_id, attempts, error)
+            else:
+                logger.warning("email %s failed (attempt %d): %s", email_id, attempts, error)
+                email_outbox_results.inc(result="retry")
+                await loop.run_in_executor(
+                    self._executor, repos.outbox.retry, email_id, attempts, time.time() + _backoff(attempts), error
+                )
+        if delivered:
+            email_outbox_results.inc(len(delivered), result="sent")
+            await loop.run_in_executor(self._executor, repos.outbox.complete, delivered)
+        return len(batch)
+
+
+outbox_worker = EmailOutboxWorker()
+
+
+def queue_email(to: str, subject: str, html: str, text: str) -> str:
+    """Persist an email for the outbox worker and return its id. Blocking (one write)."""
+    email_id = str(uuid.uuid4())
+    repos.outbox.enqueue({
+        "id": email_id,
+        "to": to,
+        "subject": subject,
+        "html": html,
+        "text": text,
+        "created_at": now_iso(),
+        "attempts": 0,
+        "next_attempt_at": time.time(),
+    })
+    outbox_worker.wake()
+    return email_id
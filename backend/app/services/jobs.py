@@ -0,0 +1,271 @@
+"""Background jobs: persisted, resumable, with progress.
+
+Request handlers call `enqueue_job(kind, params, created_by)`, which
+stores the job (repos.jobs) and wakes the worker; the client polls
+GET /jobs/{id}. The worker runs one job at a time on its own thread:
+
+- it leases the oldest queued job (a job whose worker died is picked up
+  again once its lease runs out);
+- the handler for the job's kind works in small transactions and calls
+  `ctx.checkpoint(...)` after each one, which stores its resume point and
+  progress and extends the lease;
+- an attempt that raises is requeued and resumes from the last checkpoint,
+  until JOB_MAX_ATTEMPTS, after which the job is marked failed;
+- every write carries the claim's lease token, so a worker that stalled
+  past its lease (and lost the job to another) stops at its next
+  checkpoint instead of overwriting the new attempt.
+
+Handlers must therefore be safe to re-run from any checkpoint.
+
+Deletes that users wait on (posts, comments, a conversation's messages)
+only tombstone their data in the request; the purge_* jobs remove it.
+"""
+import asyncio
+import logging
+import time
+import uuid
+from typing import Any, Callable, Dict, Optional
+
+from app.core.cache import profile_cache
+from app.core.config import settings
+from app.core.metrics import job_attempt_failures, jobs_finished
+from app.core.timestamps import now_iso
+from app.repositories import repos
+from app.services.worker import PollingWorker
+
+logger = logging.getLogger(__name__)
+
+Job = Dict[str, Any]
+
+
+class LeaseLost(Exception):
+    """The job was claimed by another worker after this one's lease ran out."""
+
+
+class JobContext:
+    def __init__(self, job: Job):
+        self.id = job["id"]
+        self.lease_token: str = job["lease_token"]
+        self.params: Dict[str, Any] = job.get("params") or {}
+        # Resume point of a previous attempt, if any
+        self.state: Dict[str, Any] = job.get("state") or {}
+        self.progress: Dict[str, Any] = job.get("progress") or {}
+
+    def checkpoint(self, **progress: Any) -> None:
+        """Persist `self.state` and the updated progress; blocking (one write).
+        Raises LeaseLost if another worker has taken the job over."""
+        self.progress.update(progress)
+        lease_until = time.time() + settings.JOB_LEASE_SECONDS
+        if not repos.jobs.checkpoint(self.id, self.lease_token, self.state, self.progress, lease_until):
+            raise LeaseLost(self.id)
+
+
+JobHandler = Callable[[JobContext], Dict[str, Any]]
+HANDLERS: Dict[str, JobHandler] = {}
+
+
+def job_handler(kind: str) -> Callable[[JobHandler], JobHandler]:
+    def register(fn: JobHandler) -> JobHandler:
+        HANDLERS[kind] = fn
+        return fn
+    return register
+
+
+def enqueue_job(kind: str, params: Dict[str, Any], created_by: Optional[str]) -> Job:
+    """Persist a job for the worker and return it. Blocking (one write)."""
+    if kind not in HANDLERS:
+        raise ValueError(f"Unknown job kind: {kind!r}")
+    job = {
+        "id": str(uuid.uuid4()),
+        "kind": kind,
+        "params": params,
+        "status": "queued",
+        "progress": {},
+        "attempts": 0,
+        "created_by": created_by,
+        "created_at": now_iso(),
+    }
+    repos.jobs.create(job)
+    job_worker.wake()
+    return job
+
+
+def job_to_json(job: Job) -> Dict[str, Any]:
+    """API shape: everything but the handler's resume state and the lease."""
+    return {
+        "id": job["id"],
+        "kind": job["kind"],
+        "status": job["status"],
+        "params": job.get("params") or {},
+        "progress": job.get("progress") or {},
+        "result": job.get("result"),
+        "error": job.get("error"),
+        "attempts": job.get("attempts") or 0,
+        "created_by": job.get("created_by"),
+        "created_at": job.get("created_at"),
+        "started_at": job.get("started_at"),
+        "finished_at": job.get("finished_at"),
+    }
+
+
+def run_job(job: Job) -> None:
+    """One attempt at a claimed job. Blocking; runs on the worker thread."""
+    kind = job["kind"]
+    token = job["lease_token"]
+    handler = HANDLERS.get(kind)
+    if handler is None:
+        repos.jobs.finish(job["id"], token, "failed", None, f"Unknown job kind: {kind!r}", now_iso())
+        jobs_finished.inc(kind=kind, status="failed")
+        return
+    try:
+        result = handler(JobContext(job))
+    except LeaseLost:
+        # The new owner carries on from our last checkpoint; leave the job alone
+        logger.warning("job %s (%s) lost its lease, abandoning attempt %s", job["id"], kind, job.get("attempts"))
+        return
+    except Exception as exc:
+        job_attempt_failures.inc(kind=kind)
+        error = f"{type(exc).__name__}: {exc}"
+        if (job.get("attempts") or 0) >= settings.JOB_MAX_ATTEMPTS:
+            logger.exception("job %s (%s) failed permanently", job["id"], kind)
+            repos.jobs.finish(job["id"], token, "failed", None, error, now_iso())
+            jobs_finished.inc(kind=kind, status="failed")
+        else:
+            logger.warning("job %s (%s) attempt %s failed: %s", job["id"], kind, job.get("attempts"), error)
+            repos.jobs.release(job["id"], token, error)
+        return
+    repos.jobs.finish(job["id"], token, "succeeded", result, None, now_iso())
+    jobs_finished.inc(kind=kind, status="succeeded")
+
+
+class JobWorker(PollingWorker):
+    name = "jobs"
+
+    @property
+    def poll_seconds(self) -> float:
+        return settings.JOB_POLL_SECONDS
+
+    async def run_once(self) -> bool:
+        """Claim and run one job; returns whether there was one."""
+        loop = asyncio.get_running_loop()
+        job = await loop.run_in_executor(self._executor, repos.jobs.claim, time.time(), settings.JOB_LEASE_SECONDS)
+        if job is None:
+            return False
+        await loop.run_in_executor(self._executor, run_job, job)
+        return True
+
+
+job_worker = JobWorker()
+
+
+# ---- Job kinds ----
+def _delete_sent_messages(ctx: JobContext, user_id: str) -> None:
+    """Delete the user's messages JOB_BATCH_SIZE per transaction, remembering
+    which conversations lost messages."""
+    touched = set(ctx.state.get("conversations", []))
+    deleted = ctx.progress.get("deleted_messages", 0)
+    while True:
+        count, conversation_ids = repos.messages.delete_sent_batch(user_id, settings.JOB_BATCH_SIZE)
+        if not count:
+            break
+        deleted += count
+        touched.update(conversation_ids)
+        ctx.state["conversations"] = sorted(touched)
+        ctx.checkpoint(deleted_messages=deleted)
+    ctx.checkpoint(deleted_messages=deleted)
+
+
+def _prune_conversations(ctx: JobContext) -> None:
+    """Delete the now-empty conversations among those the user touched."""
+    conversation_ids = ctx.state.get("conversations", [])
+    pruned = ctx.progress.get("pruned_conversations", 0)
+    start = ctx.state.get("pruned_upto", 0)
+    for i in range(start, len(conversation_ids), settings.JOB_BATCH_SIZE):
+        pruned += repos.messages.prune_empty_conversations(conversation_ids[i:i + settings.JOB_BATCH_SIZE])
+        ctx.state["pruned_upto"] = i + settings.JOB_BATCH_SIZE
+        ctx.checkpoint(pruned_conversations=pruned)
+    ctx.checkpoint(pruned_conversations=pruned)
+
+
+@job_handler("delete_user_messages")
+def delete_user_messages(ctx: JobContext) -> Dict[str, Any]:
+    user_id = ctx.params["user_id"]
+    if ctx.state.get("phase") in (None, "messages"):
+        ctx.state["phase"] = "messages"
+        _delete_sent_messages(ctx, user_id)
+        ctx.state["phase"] = "prune"
+    _prune_conversations(ctx)
+    return {
+        "deleted_messages": ctx.progress.get("deleted_messages", 0),
+        "pruned_conversations": ctx.progress.get("pruned_conversations", 0),
+    }
+
+
+@job_handler("delete_user")
+def delete_user(ctx: JobContext) -> Dict[str, Any]:
+    user_id = ctx.params["user_id"]
+    phase = ctx.state.get("phase")
+    if phase is None:
+        # The user's memberships go with the user node, so note them first
+        ctx.state["conversations"] = sorted(repos.messages.conversation_ids_for(user_id))
+        ctx.state["phase"] = phase = "messages"
+        ctx.checkpoint(phase=phase)
+    if phase == "messages":
+        _delete_sent_messages(ctx, user_id)
+        ctx.state["phase"] = phase = "follows"
+        ctx.checkpoint(phase=phase)
+    if phase == "follows":
+        removed = ctx.progress.get("removed_follows", 0)
+        while True:
+            count = repos.users.detach_follows(user_id, settings.JOB_BATCH_SIZE)
+            if not count:
+                break
+            removed += count
+            ctx.checkpoint(removed_follows=removed)
+        ctx.state["phase"] = phase = "user"
+        ctx.checkpoint(phase=phase, removed_follows=removed)
+    if phase == "user":
+        repos.users.delete(user_id)
+        # Every cached profile that embedded or counted this user is affected
+        profile_cache.clear()
+        ctx.state["phase"] = phase = "prune"
+        ctx.checkpoint(phase=phase)
+    _prune_conversations(ctx)
+    ctx.checkpoint(phase="done")
+    return {
+        "deleted_user": user_id,
+        "deleted_messages": ctx.progress.get("deleted_messages", 0),
+        "removed_follows": ctx.progress.get("removed_follows", 0),
+        "pruned_conversations": ctx.progress.get("pruned_conversations", 0),
+    }
+
+
+@job_handler("purge_post")
+def purge_post(ctx: JobContext) -> Dict[str, Any]:
+    removed = ctx.progress.get("removed", 0)
+    while True:
+        count = repos.posts.purge_batch(ctx.params["post_id"], settings.JOB_BATCH_SIZE)
+        if not count:
+            break
+        removed += count
+        ctx.checkpoint(removed=removed)
+    return {"removed": removed}
+
+
+@job_handler("purge_comment")
+def purge_comment(ctx: JobContext) -> Dict[str, Any]:
+    return {"removed": repos.comments.purge(ctx.params["comment_id"])}
+
+
+@job_handler("purge_conversation")
+def purge_conversation(ctx: JobContext) -> Dict[str, Any]:
+    conversation_id = ctx.params["conversation_id"]
+    deleted = ctx.progress.get("deleted_messages", 0)
+    while True:
+        count = repos.messages.purge_cleared_batch(conversation_id, settings.JOB_BATCH_SIZE)
+        if not count:
+            break
+        deleted += count
+        ctx.checkpoint(deleted_messages=deleted)
+    pruned = repos.messages.prune_empty_conversations([conversation_id])
+    return {"deleted_messages": deleted, "pruned_conversations": pruned}
@@ -0,0 +1,65 @@
+"""People you may know: precomputed per user, refreshed in the background.
+
+Each user's ranked list (app.core.ranking) is stored by
+repos.recommendations, so serving it is one indexed read. A follow or
+unfollow changes the friends-of-friends of the follower and of the people
+following them; `neighbourhood_changed` queues those users and wakes the
+worker, which recomputes up to RECS_BATCH_SIZE queued lists per round on
+its own thread. A user whose list was never computed gets it computed on
+first request.
+"""
+import asyncio
+import logging
+from typing import Any, Dict, List
+
+from app.core.config import settings
+from app.core.metrics import recommendation_refreshes
+from app.repositories import repos
+from app.services.worker import PollingWorker
+
+logger = logging.getLogger(__name__)
+
+
+def _refresh(user_id: str) -> int:
+    return repos.recommendations.refresh(user_id, settings.RECS_PER_USER, settings.RECS_CANDIDATES)
+
+
+class RecommendationWorker(PollingWorker):
+    name = "recs"
+
+    @property
+    def poll_seconds(self) -> float:
+        return settings.RECS_POLL_SECONDS
+
+    async def run_once(self) -> int:
+        """Recompute one batch of queued lists; returns how many were taken."""
+        loop = asyncio.get_running_loop()
+        user_ids = await loop.run_in_executor(
+            self._executor, repos.recommendations.claim_stale, settings.RECS_BATCH_SIZE
+        )
+        for user_id in user_ids:
+            try:
+                await loop.run_in_executor(self._executor, _refresh, user_id)
+                recommendation_refreshes.inc(trigger="queued")
+            except Exception:
+                logger.exception("recommendation refresh failed for user %s", user_id)
+        return len(user_ids)
+
+
+recommendation_worker = RecommendationWorker()
+
+
+def neighbourhood_changed(user_id: str) -> None:
+    """`user_id` followed or unfollowed someone. Blocking (one write)."""
+    repos.recommendations.mark_stale(user_id, settings.RECS_FANOUT)
+    recommendation_worker.wake()
+
+
+def recommendations_for(user_id: str, limit: int) -> List[Dict[str, Any]]:
+    """Blocking; the stored list, computed now if the user has none yet."""
+    rows = repos.recommendations.get(user_id, limit)
+    if rows is None:
+        _refresh(user_id)
+        recommendation_refreshes.inc(trigger="on_demand")
+        rows = repos.recommendations.get(user_id, limit) or []
+    return rows
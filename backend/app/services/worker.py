@@ -0,0 +1,81 @@
+"""The background loop shared by the outbox, job and recommendation workers.
+
+A worker runs on the app's event loop, started and stopped by the app's
+startup/shutdown hooks. It calls `run_once` back to back while that
+finds work, then sleeps until `wake()` (thread-safe, called by whoever
+queued something) or its poll interval, whichever comes first. A round
+that raises is logged and counts as an idle one. Blocking work goes to
+the worker's own threads via `self._executor`.
+"""
+import asyncio
+import logging
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+
+class PollingWorker(ABC):
+    # Names the worker's threads and its log lines
+    name: str = "worker"
+
+    def __init__(self):
+        self._task: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wake: Optional[asyncio.Event] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    @property
+    @abstractmethod
+    def poll_seconds(self) -> float:
+        """Idle wait between rounds when nobody calls `wake()`."""
+
+    @property
+    def threads(self) -> int:
+        return 1
+
+    @abstractmethod
+    async def run_once(self) -> int:
+        """One round; truthy if it found work (so there may be more)."""
+
+    def start(self) -> None:
+        if self._task is not None:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._wake = asyncio.Event()
+        self._executor = ThreadPoolExecutor(max_workers=self.threads, thread_name_prefix=self.name)
+        self._task = self._loop.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        self._executor.shutdown(wait=False)
+
+    def wake(self) -> None:
+        """Thread-safe: run a round now instead of at the next poll."""
+        if self._loop is not None and self._wake is not None:
+            self._loop.call_soon_threadsafe(self._wake.set)
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                busy = await self.run_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("%s worker round failed", self.name)
+                busy = 0
+            if busy:
+                continue  # more may be waiting
+            self._wake.clear()
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.poll_seconds)
+            except asyncio.TimeoutError:
+                pass
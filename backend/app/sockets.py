@@ -1,4 +1,6 @@
+import time
 import socketio
+from app.core.metrics import register_rooms_callback, socketio_connected_clients, socketio_emit_duration
 
 # Socket.IO Async server with permissive CORS for local dev
 sio = socketio.AsyncServer(
@@ -12,14 +14,34 @@ sio = socketio.AsyncServer(
 # preventing "Expected ASGI message 'websocket.accept'..." errors.
 socket_app = socketio.ASGIApp(sio, socketio_path="")
 
+
+def _conversation_room_count() -> int:
+    # Every sid also sits in a private room named after itself and in the `None` room
+    rooms = sio.manager.rooms.get("/", {})
+    sids = rooms.get(None, {})
+    return sum(1 for r in rooms if r is not None and r not in sids)
+
+
+register_rooms_callback(_conversation_room_count)
+
+
+async def emit(event: str, data, room=None):
+    """sio.emit with latency recorded per event."""
+    start = time.perf_counter()
+    try:
+        await sio.emit(event, data, room=room)
+    finally:
+        socketio_emit_duration.observe(time.perf_counter() - start, event=event)
+
+
 # Optional: room helpers to scope messages by conversation id
 @sio.event
 async def connect(sid, environ):
-    pass
+    socketio_connected_clients.inc()
 
 @sio.event
 async def disconnect(sid):
-    pass
+    socketio_connected_clients.dec()
 
 @sio.event
 async def join_conversation(sid, data):
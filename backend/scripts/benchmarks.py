@@ -0,0 +1,295 @@
+"""Micro-benchmarks for the per-request Python work (no database needed).
+
+Covers JWT encode/decode and claims-based auth, password hash/verify, request-body validation,
+the repositories' row conversion (Neo4j DATETIMEs, user rows, the memory
+backend's conversation list and message pages) and serialization of
+large feed responses.
+Each benchmark reports ops/sec (best of --repeat timed runs, each sized
+to about --min-time seconds) and the bytes allocated per call (tracemalloc
+peak above the starting level, averaged over a few calls).
+
+    python -m scripts.benchmarks                           # run all
+    python -m scripts.benchmarks -k jwt -k message         # name filters
+    python -m scripts.benchmarks --save-baseline bench-baseline.json
+    python -m scripts.benchmarks --baseline bench-baseline.json   # exit 1 on regression
+
+Fixtures are built from a fixed seed so runs are comparable; compare
+baselines recorded on the same machine.
+"""
+import os
+
+# Imported app modules only need settings; never connect to Neo4j from here
+os.environ.setdefault("STORAGE_BACKEND", "memory")
+
+import argparse
+import json
+import random
+import sys
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, Tuple
+
+FEED_SIZE = 500
+CONVERSATIONS = 100
+LONG_THREAD = 5000
+MESSAGE_PAGE = 50
+USER_PAGE = 24
+PASSWORD = "correct horse battery staple"
+
+
+def _feed(rng: random.Random, size: int) -> List[Dict[str, Any]]:
+    """Posts in the shape GET /posts/ returns."""
+    return [
+        {
+            "id": f"{rng.getrandbits(128):032x}",
+            "content": " ".join(rng.choice(("exam", "library", "coffee", "deadline", "campus")) for _ in range(30)),
+            "image_url": f"https://res.cloudinary.com/demo/image/upload/posts/{i}.jpg" if i % 3 == 0 else None,
+            "created_at": f"2024-0{1 + i % 9}-1{i % 10}T10:{i % 60:02d}:00.000000Z",
+            "user": {"id": f"{rng.getrandbits(128):032x}", "username": f"user{i % 97}", "avatar_url": None},
+            "likes_count": rng.randrange(500),
+            "comments_count": rng.randrange(50),
+        }
+        for i in range(size)
+    ]
+
+
+def _neo4j_message_rows(rng: random.Random, size: int) -> List[Dict[str, Any]]:
+    """Message rows as the Neo4j driver returns them (native DATETIMEs)."""
+    from datetime import datetime, timedelta, timezone
+
+    from neo4j.time import DateTime
+
+    start = datetime(2024, 3, 1, 10, tzinfo=timezone.utc)
+    return [
+        {
+            "id": f"{rng.getrandbits(128):032x}",
+            "content": "see you at the library after class",
+            "timestamp": DateTime.from_native(start + timedelta(seconds=i)),
+            "sender_id": f"{rng.getrandbits(128):032x}",
+        }
+        for i in range(size)
+    ]
+
+
+def _memory_repos(rng: random.Random):
+    """Memory backend with CONVERSATIONS conversations for "me" and one long thread."""
+    from app.core.ids import new_timed_id
+    from app.repositories.memory_repo import MemoryRepositories
+
+    repos = MemoryRepositories()
+    for i in range(CONVERSATIONS + 1):
+        repos.users.create({
+            "id": f"u{i}", "username": f"user{i}", "email": f"user{i}@example.edu",
+            "created_at": f"2024-01-01T00:00:{i % 60:02d}.000000Z", "bio": "hi", "program": "CS",
+        })
+    for i in range(1, CONVERSATIONS + 1):
+        cid = f"convo:u0:u{i}"
+        repos.messages.ensure_conversation(cid, "u0", f"u{i}", "2024-01-01T00:00:00.000000Z")
+        for j in range(LONG_THREAD if i == 1 else 3):
+            mid, at = new_timed_id()
+            sender, receiver = ("u0", f"u{i}") if j % 2 else (f"u{i}", "u0")
+            repos.messages.create_message(cid, {
+                "id": mid, "sender_id": sender, "receiver_id": receiver,
+                "content": f"message {j} {rng.random():.3f}", "timestamp": at,
+            })
+    return repos
+
+
+# name -> factory building the benchmark's fixtures and returning the timed call;
+# only the selected benchmarks are built, so one broken fixture can't stop -k runs
+Benchmark = Tuple[str, Callable[[], Callable[[], Any]]]
+
+
+def build_benchmarks() -> List[Benchmark]:
+    rng = random.Random(1234)
+
+    def jwt_claims() -> Dict[str, Any]:
+        return {"sub": "user42", "id": f"{rng.getrandbits(128):032x}", "username": "user42", "role": "student",
+                "typ": "access", "fam": f"{rng.getrandbits(128):032x}", "jti": f"{rng.getrandbits(128):032x}"}
+
+    def jwt_encode():
+        from app.core.security import create_access_token
+        claims = jwt_claims()
+        return lambda: create_access_token(claims)
+
+    def jwt_decode():
+        from jose import jwt
+
+        from app.core.config import settings
+        from app.core.security import create_access_token
+        token = create_access_token(jwt_claims(), expires_delta=60 * 24 * 365)
+        return lambda: jwt.decode(token, settings.jwt_secret_value, algorithms=[settings.JWT_ALGORITHM])
+
+    def current_user():
+        from app.core.security import create_access_token, get_current_user
+        token = create_access_token(jwt_claims(), expires_delta=60 * 24 * 365)
+        return lambda: get_current_user(token)
+
+    def token_pair():
+        from app.core.security import issue_token_pair
+        identity = {"id": f"{rng.getrandbits(128):032x}", "username": "user42", "role": "student"}
+        return lambda: issue_token_pair(identity)
+
+    def password_hash():
+        from app.core.hashing import pwd_context
+        return lambda: pwd_context.hash(PASSWORD)
+
+    def password_verify(scheme: str):
+        def build():
+            from app.core.hashing import pwd_context
+            hashed = pwd_context.handler(scheme).hash(PASSWORD)
+            return lambda: pwd_context.verify(PASSWORD, hashed)
+        return build
+
+    def send_validate():
+        from app.routes.messages import SendMessageRequest
+        body = {"conversation_id": "convo:a:b", "content": "hello there, are you coming to the lab?"}
+        return lambda: SendMessageRequest.model_validate(body)
+
+    def neo4j_plain():
+        from app.repositories.neo4j_repo import _plain
+        rows = _neo4j_message_rows(rng, MESSAGE_PAGE)
+        return lambda: [_plain(r) for r in rows]
+
+    def user_rows():
+        from app.routes.users import USER_LIST_FIELDS, _user_row_to_json
+        repos = _memory_repos(rng)
+        fields = list(USER_LIST_FIELDS)
+        rows = repos.users.list_users(fields, "u0", USER_PAGE)
+        return lambda: [_user_row_to_json(r, fields) for r in rows]
+
+    def memory_conversations():
+        repos = _memory_repos(rng)
+        return lambda: repos.messages.list_conversations("u0", CONVERSATIONS, 0)
+
+    def memory_messages():
+        repos = _memory_repos(rng)
+        middle = repos.messages.list_messages("convo:u0:u1", LONG_THREAD // 2)[0]["id"]
+        return lambda: repos.messages.list_messages("convo:u0:u1", MESSAGE_PAGE, middle)
+
+    def feed_dumps():
+        feed = _feed(rng, FEED_SIZE)
+        return lambda: json.dumps(feed)
+
+    def feed_render():
+        from fastapi.encoders import jsonable_encoder
+        from fastapi.responses import JSONResponse
+        feed = _feed(rng, FEED_SIZE)
+        return lambda: JSONResponse(jsonable_encoder(feed)).body
+
+    return [
+        ("jwt.encode", jwt_encode),
+        ("jwt.decode", jwt_decode),
+        ("get_current_user (claims)", current_user),
+        ("issue_token_pair", token_pair),
+        ("password.hash argon2", password_hash),
+        ("password.verify argon2", password_verify("argon2")),
+        ("password.verify bcrypt", password_verify("bcrypt")),
+        ("SendMessageRequest.validate", send_validate),
+        (f"neo4j _plain message rows x{MESSAGE_PAGE}", neo4j_plain),
+        (f"_user_row_to_json x{USER_PAGE}", user_rows),
+        (f"memory list_conversations x{CONVERSATIONS}", memory_conversations),
+        (f"memory list_messages x{MESSAGE_PAGE}", memory_messages),
+        (f"feed json.dumps x{FEED_SIZE}", feed_dumps),
+        (f"feed jsonable_encoder+render x{FEED_SIZE}", feed_render),
+    ]
+
+
+def _time_per_op(fn: Callable[[], Any], min_time: float, repeat: int) -> float:
+    # Size the loop so one run takes about min_time, then keep the best run
+    loops = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(loops):
+            fn()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time / 5 or loops >= 1 << 24:
+            break
+        loops *= 2
+    loops = max(1, int(loops * min_time / max(elapsed, 1e-9)))
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(loops):
+            fn()
+        best = min(best, (time.perf_counter() - start) / loops)
+    return best
+
+
+def _alloc_per_call(fn: Callable[[], Any], calls: int = 5) -> int:
+    tracemalloc.start()
+    try:
+        fn()  # warm caches so one-off allocations don't count
+        total = 0
+        for _ in range(calls):
+            tracemalloc.reset_peak()
+            base, _ = tracemalloc.get_traced_memory()
+            fn()
+            _, peak = tracemalloc.get_traced_memory()
+            total += peak - base
+        return total // calls
+    finally:
+        tracemalloc.stop()
+
+
+def run(filters: List[str], min_time: float, repeat: int) -> Dict[str, Dict[str, float]]:
+    results = {}
+    for name, build in build_benchmarks():
+        if filters and not any(f.lower() in name.lower() for f in filters):
+            continue
+        fn = build()
+        per_op = _time_per_op(fn, min_time, repeat)
+        results[name] = {
+            "ops_per_sec": round(1.0 / per_op, 1),
+            "us_per_op": round(per_op * 1e6, 2),
+            "alloc_bytes": _alloc_per_call(fn),
+        }
+        row = results[name]
+        print(f"{name:<40} {row['ops_per_sec']:>14,.1f} ops/s {row['us_per_op']:>12,.2f} us {row['alloc_bytes']:>12,} B",
+              flush=True)
+    return results
+
+
+def compare(results: Dict[str, Dict[str, float]], baseline: Dict[str, Dict[str, float]],
+            tolerance: float, min_alloc: int) -> List[str]:
+    """Benchmarks that got slower, or allocate more, than `tolerance` allows."""
+    regressions = []
+    for name, row in results.items():
+        base = baseline.get(name)
+        if not base:
+            continue
+        if row["ops_per_sec"] < base["ops_per_sec"] * (1 - tolerance):
+            regressions.append(f"{name}: {base['ops_per_sec']:,.1f} -> {row['ops_per_sec']:,.1f} ops/s")
+        grew = row["alloc_bytes"] - base["alloc_bytes"]
+        if grew > min_alloc and row["alloc_bytes"] > base["alloc_bytes"] * (1 + tolerance):
+            regressions.append(f"{name}: {base['alloc_bytes']:,} -> {row['alloc_bytes']:,} bytes/call")
+    return regressions
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("-k", dest="filters", action="append", default=[], help="only run benchmarks matching this")
+    parser.add_argument("--min-time", type=float, default=0.2, help="seconds per timed run")
+    parser.add_argument("--repeat", type=int, default=5, help="timed runs per benchmark (best is kept)")
+    parser.add_argument("--baseline", help="compare against this saved result")
+    parser.add_argument("--save-baseline", help="save this run as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown / allocation growth")
+    parser.add_argument("--min-alloc", type=int, default=1024, help="ignore allocation growth below this many bytes")
+    args = parser.parse_args(argv)
+
+    results = run(args.filters, args.min_time, args.repeat)
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as f:
+            json.dump(results, f, indent=2)
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.tolerance, args.min_alloc)
+        if regressions:
+            print("\nREGRESSIONS:\n  " + "\n  ".join(regressions), file=sys.stderr)
+            sys.exit(1)
+        print("\nno regressions against baseline")
+
+
+if __name__ == "__main__":
+    main()
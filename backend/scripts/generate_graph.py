@@ -0,0 +1,461 @@
+"""Synthetic social-graph generator and bulk loader.
+
+Writes users, follows, posts, likes, comments, conversations and
+messages with the same labels, relationship types and properties the
+API creates, so every endpoint works on the generated data:
+
+    (:User)-[:FOLLOWS]->(:User)
+    (:User)-[:AUTHORED]->(:Post)          (:User)-[:LIKED]->(:Post)
+    (:User)-[:AUTHORED]->(:Comment)-[:ON_POST]->(:Post)
+    (:User)-[:PARTICIPATES_IN]->(:Conversation)-[:HAS_MESSAGE]->(:Message)
+    (:User)-[:SENT]->(:Message)
+
+Shape of the data:
+- follower counts follow a power law (followees are drawn from a Zipf
+  distribution over users, so a few accounts get most followers);
+- posting is bursty (heavy-tailed posts per user, clustered in time);
+- a small set of heavy commenters writes most comments, and popular
+  accounts' posts collect most likes and comments;
+- DM thread lengths are heavy-tailed, so some threads are very long.
+
+The output is deterministic for a given --seed and scale: ids are
+derived from (seed, kind, index) and every draw comes from one seeded
+RNG. Rows are streamed in --batch-size chunks into `UNWIND` writes; only
+each post's timestamp and author rank are kept in memory.
+
+Usage (from backend/, Neo4j settings from .env):
+    python -m scripts.generate_graph --users 100000 --seed 42
+    python -m scripts.generate_graph --scale small --dry-run
+"""
+import argparse
+import bisect
+import hashlib
+import itertools
+import random
+import sys
+import time
+import uuid
+from array import array
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterator, List
+
+from app.core.text_search import user_search_text
+
+# Every generated user can log in with this password
+DEFAULT_PASSWORD = "password123"
+
+PROGRAMS = (
+    "BS Computer Science", "BS Information Technology", "BS Nursing",
+    "BS Accountancy", "BS Psychology", "BS Civil Engineering",
+    "BA Communication", "BS Biology", "BS Architecture", "BS Education",
+)
+WORDS = (
+    "exam", "library", "coffee", "project", "deadline", "lecture", "thesis",
+    "campus", "weekend", "group", "study", "notes", "lab", "game", "org",
+    "event", "today", "finally", "anyone", "help", "tomorrow", "quiz",
+    "canteen", "dorm", "prof", "class", "presentation", "report", "break",
+    "friends", "meeting", "schedule", "grades", "enrollment", "rain", "late",
+)
+
+SCALES = {
+    "small": dict(users=1_000),
+    "medium": dict(users=20_000),
+    "large": dict(users=100_000),
+    "xlarge": dict(users=250_000),
+}
+
+
+@dataclass
+class GraphConfig:
+    users: int = 1_000
+    seed: int = 42
+    avg_follows: float = 20.0
+    avg_posts: float = 4.0
+    avg_likes_per_post: float = 6.0
+    avg_comments_per_post: float = 1.5
+    conversations_per_user: float = 0.5
+    avg_messages_per_conversation: float = 12.0
+    max_messages_per_conversation: int = 2_000
+    # Zipf exponent for popularity (followees, liked/commented posts, commenters)
+    zipf_alpha: float = 1.1
+    days: int = 180
+    start: datetime = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+class ZipfSampler:
+    """Draws indexes in [0, n) with P(i) ~ 1 / (i + 1) ** alpha."""
+
+    def __init__(self, n: int, alpha: float, rng: random.Random):
+        self.rng = rng
+        self.cum = list(itertools.accumulate(1.0 / (i + 1) ** alpha for i in range(n)))
+        self.total = self.cum[-1]
+
+    def __call__(self) -> int:
+        return bisect.bisect_left(self.cum, self.rng.random() * self.total)
+
+
+def _pareto_count(rng: random.Random, mean: float, cap: int, shape: float = 1.5) -> int:
+    """Heavy-tailed non-negative count with roughly the given mean."""
+    if mean <= 0:
+        return 0
+    scale = mean * (shape - 1) / shape
+    return min(cap, int(scale * rng.paretovariate(shape)))
+
+
+class GraphGenerator:
+    """Streams rows for each kind of node/relationship, in load order."""
+
+    def __init__(self, config: GraphConfig, password_hash: str):
+        self.config = config
+        self.password_hash = password_hash
+        self.rng = random.Random(config.seed)
+        self.span = config.days * 86400.0
+        self.popular = ZipfSampler(config.users, config.zipf_alpha, self.rng)
+        # Creation time (seconds from start) and author rank, indexed by post number
+        self.post_times = array("d")
+        self.post_authors = array("l")
+
+    # ---- ids, times, text ----
+    def id_for(self, kind: str, index: int) -> str:
+        digest = hashlib.blake2b(f"{self.config.seed}:{kind}:{index}".encode(), digest_size=16).digest()
+        return str(uuid.UUID(bytes=digest, version=4))
+
+    def user_id(self, index: int) -> str:
+        return self.id_for("user", index)
+
+    def post_id(self, index: int) -> str:
+        return self.id_for("post", index)
+
+    def _at(self, seconds: float) -> datetime:
+        return self.config.start + timedelta(seconds=min(seconds, self.span))
+
+    def _text(self, low: int, high: int) -> str:
+        return " ".join(self.rng.choices(WORDS, k=self.rng.randint(low, high)))
+
+    def _boost(self, rank: int) -> float:
+        """Popularity of user `rank` relative to the average user (mean 1)."""
+        return self.config.users / ((rank + 1) ** self.config.zipf_alpha * self.popular.total)
+
+    def _other_user(self, me: int) -> int:
+        other = self.popular()
+        return other if other != me else (me + 1) % self.config.users
+
+    # ---- rows ----
+    def users(self) -> Iterator[Dict[str, Any]]:
+        for i in range(self.config.users):
+            joined = self._at(self.rng.random() * self.span * 0.5)
+            yield {
+                "id": self.user_id(i),
+                "username": f"user{i}",
+                "email": f"user{i}@example.edu",
+                "student_number": f"{2020 + i % 5}-{i:07d}",
+                "program": PROGRAMS[self.rng.randrange(len(PROGRAMS))],
+                "password": self.password_hash,
+                "email_verified": True,
+                "created_at": joined,
+                "bio": self._text(3, 10) if self.rng.random() < 0.6 else None,
+                "profile_pic": "",
+                "search_text": user_search_text(f"user{i}"),
+                "followers_count": 0,
+                "following_count": 0,
+            }
+
+    def follows(self) -> Iterator[Dict[str, Any]]:
+        cap = max(1, self.config.users - 1)
+        for i in range(self.config.users):
+            count = _pareto_count(self.rng, self.config.avg_follows, cap)
+            targets = {self._other_user(i) for _ in range(count)}
+            me = self.user_id(i)
+            for t in targets:
+                at = self._at(self.rng.random() * self.span)
+                yield {"from": me, "to": self.user_id(t), "created_at": at}
+
+    def posts(self) -> Iterator[Dict[str, Any]]:
+        n = 0
+        for i in range(self.config.users):
+            count = _pareto_count(self.rng, self.config.avg_posts, 2_000)
+            if not count:
+                continue
+            # A few bursts per author; posts cluster a couple of hours around each
+            bursts = [self.rng.random() * self.span for _ in range(1 + count // 10)]
+            author = self.user_id(i)
+            for _ in range(count):
+                t = self.rng.choice(bursts) + self.rng.expovariate(1 / 7200.0)
+                self.post_times.append(t)
+                self.post_authors.append(i)
+                yield {
+                    "author_id": author,
+                    "id": self.post_id(n),
+                    "content": self._text(4, 40),
+                    "image_url": None,
+                    "created_at": self._at(t),
+                }
+                n += 1
+
+    def likes(self) -> Iterator[Dict[str, Any]]:
+        # Popular accounts' posts collect more likes
+        cap = self.config.users - 1
+        for n, author in enumerate(self.post_authors):
+            mean = self.config.avg_likes_per_post * self._boost(author)
+            count = _pareto_count(self.rng, mean, cap)
+            post = self.post_id(n)
+            for liker in self.rng.sample(range(self.config.users), count):
+                yield {"user_id": self.user_id(liker), "post_id": post}
+
+    def comments(self) -> Iterator[Dict[str, Any]]:
+        # A separate, steeper distribution over users: heavy commenters
+        commenters = ZipfSampler(self.config.users, self.config.zipf_alpha + 0.4, self.rng)
+        c = 0
+        for n, author in enumerate(self.post_authors):
+            mean = self.config.avg_comments_per_post * self._boost(author)
+            post = self.post_id(n)
+            t = self.post_times[n]
+            for _ in range(_pareto_count(self.rng, mean, 5_000)):
+                t += self.rng.expovariate(1 / 3600.0)
+                yield {
+                    "user_id": self.user_id(commenters()),
+                    "post_id": post,
+                    "id": self.id_for("comment", c),
+                    "content": self._text(1, 20),
+                    "created_at": self._at(t),
+                }
+                c += 1
+
+    def conversations(self) -> Iterator[Dict[str, Any]]:
+        """Conversation rows, each carrying its messages under `messages`."""
+        if self.config.users < 2:
+            return
+        total = int(self.config.users * self.config.conversations_per_user)
+        seen = set()
+        m = 0
+        for _ in range(total):
+            a = self.rng.randrange(self.config.users)
+            b = self._other_user(a)
+            u1, u2 = sorted((self.user_id(a), self.user_id(b)))
+            cid = f"convo:{u1}:{u2}"
+            if cid in seen:
+                continue
+            seen.add(cid)
+            t = self.rng.random() * self.span
+            started = self._at(t)
+            messages = []
+            count = max(1, _pareto_count(self.rng, self.config.avg_messages_per_conversation,
+                                         self.config.max_messages_per_conversation))
+            sender = self.rng.randrange(2)
+            for _ in range(count):
+                # Mostly quick replies, with occasional gaps of a day or so
+                t += self.rng.expovariate(1 / 60.0) if self.rng.random() < 0.9 else self.rng.expovariate(1 / 86400.0)
+                if self.rng.random() < 0.4:
+                    sender ^= 1
+                at = self._at(t)
+                messages.append({
+                    "id": self.id_for("message", m),
+                    "content": self._text(1, 25),
+                    "timestamp": at,
+                    "sender_id": (u1, u2)[sender],
+                    "receiver_id": (u2, u1)[sender],
+                })
+                m += 1
+            yield {"id": cid, "created_at": started, "a": u1, "b": u2, "messages": messages}
+
+
+def _hash_password(password: str) -> str:
+    from app.core.security import get_password_hash
+    return get_password_hash(password)
+
+
+# ---- loader ----
+CONSTRAINTS = [
+    "CREATE CONSTRAINT user_id_unique IF NOT EXISTS FOR (u:User) REQUIRE u.id IS UNIQUE",
+    "CREATE CONSTRAINT user_email_unique IF NOT EXISTS FOR (u:User) REQUIRE u.email IS UNIQUE",
+    "CREATE CONSTRAINT user_username_unique IF NOT EXISTS FOR (u:User) REQUIRE u.username IS UNIQUE",
+    "CREATE CONSTRAINT post_id_unique IF NOT EXISTS FOR (p:Post) REQUIRE p.id IS UNIQUE",
+    "CREATE CONSTRAINT comment_id_unique IF NOT EXISTS FOR (c:Comment) REQUIRE c.id IS UNIQUE",
+    "CREATE CONSTRAINT message_id_unique IF NOT EXISTS FOR (m:Message) REQUIRE m.id IS UNIQUE",
+    "CREATE CONSTRAINT conversation_id_unique IF NOT EXISTS FOR (c:Conversation) REQUIRE c.id IS UNIQUE",
+    "CREATE INDEX user_created_at IF NOT EXISTS FOR (u:User) ON (u.created_at)",
+    "CREATE INDEX post_created_at IF NOT EXISTS FOR (p:Post) ON (p.created_at)",
+    "CREATE INDEX comment_created_at IF NOT EXISTS FOR (c:Comment) ON (c.created_at)",
+    "CREATE INDEX message_timestamp IF NOT EXISTS FOR (m:Message) ON (m.timestamp)",
+    "CREATE INDEX user_followers_count IF NOT EXISTS FOR (u:User) ON (u.followers_count)",
+    "CREATE INDEX user_program IF NOT EXISTS FOR (u:User) ON (u.program)",
+    "CREATE FULLTEXT INDEX user_search IF NOT EXISTS FOR (u:User) ON EACH [u.search_text] "
+    "OPTIONS {indexConfig: {`fulltext.analyzer`: 'whitespace'}}",
+]
+
+LOAD_USERS = """
+// graphgen.users
+UNWIND $rows AS row
+CREATE (u:User)
+SET u = row
+"""
+
+LOAD_FOLLOWS = """
+// graphgen.follows
+UNWIND $rows AS row
+MATCH (a:User {id: row.from}), (b:User {id: row.to})
+CREATE (a)-[:FOLLOWS {created_at: row.created_at}]->(b)
+SET a.following_count = a.following_count + 1, b.followers_count = b.followers_count + 1
+"""
+
+LOAD_POSTS = """
+// graphgen.posts
+UNWIND $rows AS row
+MATCH (u:User {id: row.author_id})
+CREATE (p:Post {id: row.id, content: row.content, image_url: row.image_url, created_at: row.created_at})
+CREATE (u)-[:AUTHORED]->(p)
+"""
+
+LOAD_LIKES = """
+// graphgen.likes
+UNWIND $rows AS row
+MATCH (u:User {id: row.user_id}), (p:Post {id: row.post_id})
+CREATE (u)-[:LIKED]->(p)
+"""
+
+LOAD_COMMENTS = """
+// graphgen.comments
+UNWIND $rows AS row
+MATCH (u:User {id: row.user_id}), (p:Post {id: row.post_id})
+CREATE (c:Comment {id: row.id, content: row.content, created_at: row.created_at})
+CREATE (u)-[:AUTHORED]->(c)
+CREATE (c)-[:ON_POST]->(p)
+"""
+
+LOAD_CONVERSATIONS = """
+// graphgen.conversations
+UNWIND $rows AS row
+MATCH (a:User {id: row.a}), (b:User {id: row.b})
+CREATE (c:Conversation {id: row.id, created_at: row.created_at})
+CREATE (a)-[:PARTICIPATES_IN]->(c)
+CREATE (b)-[:PARTICIPATES_IN]->(c)
+"""
+
+LOAD_MESSAGES = """
+// graphgen.messages
+UNWIND $rows AS row
+MATCH (c:Conversation {id: row.conversation_id}), (s:User {id: row.sender_id})
+CREATE (m:Message {id: row.id, content: row.content, timestamp: row.timestamp, created_at: row.timestamp,
+                   sender_id: row.sender_id, receiver_id: row.receiver_id})
+CREATE (s)-[:SENT]->(m)
+CREATE (c)-[:HAS_MESSAGE]->(m)
+"""
+
+
+def _batches(rows: Iterator[Dict[str, Any]], size: int) -> Iterator[List[Dict[str, Any]]]:
+    it = iter(rows)
+    while True:
+        batch = list(itertools.islice(it, size))
+        if not batch:
+            return
+        yield batch
+
+
+class Loader:
+    """Sends batches to Neo4j (or only counts them with dry_run)."""
+
+    def __init__(self, batch_size: int, dry_run: bool):
+        self.batch_size = batch_size
+        self.dry_run = dry_run
+        self.session = None
+        self.counts: Dict[str, int] = {}
+
+    def __enter__(self):
+        if not self.dry_run:
+            from app.core.config import settings
+            from app.core.database import db
+            self.session = db.driver.session(database=settings.NEO4J_DATABASE)
+        return self
+
+    def __exit__(self, *exc):
+        if self.session is not None:
+            self.session.close()
+
+    def run(self, cypher: str) -> None:
+        if self.session is not None:
+            self.session.run(cypher).consume()
+
+    def wipe(self) -> None:
+        # Batched so a large graph doesn't need one huge transaction
+        while self.session is not None:
+            rec = self.session.run(
+                "// graphgen.wipe\nMATCH (n) WITH n LIMIT 10000 DETACH DELETE n RETURN count(*) AS deleted"
+            ).single()
+            if not rec["deleted"]:
+                return
+
+    def load(self, kind: str, cypher: str, rows: Iterator[Dict[str, Any]]) -> None:
+        started = time.perf_counter()
+        total = 0
+        for batch in _batches(rows, self.batch_size):
+            if self.session is not None:
+                self.session.execute_write(lambda tx: tx.run(cypher, rows=batch).consume())
+            total += len(batch)
+        elapsed = time.perf_counter() - started
+        self.counts[kind] = self.counts.get(kind, 0) + total
+        rate = total / elapsed if elapsed > 0 else float("inf")
+        print(f"{kind:<14} {total:>10,} rows  {elapsed:8.1f}s  {rate:>10,.0f} rows/s", file=sys.stderr)
+
+
+def load_graph(generator: GraphGenerator, loader: Loader) -> Dict[str, int]:
+    for cypher in CONSTRAINTS:
+        loader.run(cypher)
+    loader.load("users", LOAD_USERS, generator.users())
+    loader.load("follows", LOAD_FOLLOWS, generator.follows())
+    loader.load("posts", LOAD_POSTS, generator.posts())
+    loader.load("likes", LOAD_LIKES, generator.likes())
+    loader.load("comments", LOAD_COMMENTS, generator.comments())
+
+    # Conversations carry their messages; load each batch's messages right after it
+    for batch in _batches(generator.conversations(), loader.batch_size):
+        loader.load("conversations", LOAD_CONVERSATIONS, ({k: c[k] for k in ("id", "created_at", "a", "b")} for c in batch))
+        loader.load("messages", LOAD_MESSAGES, (
+            {"conversation_id": c["id"], **m} for c in batch for m in c["messages"]
+        ))
+    return loader.counts
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--scale", choices=sorted(SCALES), help="preset user count")
+    parser.add_argument("--users", type=int, help="number of users (overrides --scale)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--avg-follows", type=float, default=GraphConfig.avg_follows)
+    parser.add_argument("--avg-posts", type=float, default=GraphConfig.avg_posts)
+    parser.add_argument("--avg-likes", type=float, default=GraphConfig.avg_likes_per_post, help="likes per post")
+    parser.add_argument("--avg-comments", type=float, default=GraphConfig.avg_comments_per_post, help="comments per post")
+    parser.add_argument("--conversations-per-user", type=float, default=GraphConfig.conversations_per_user)
+    parser.add_argument("--avg-messages", type=float, default=GraphConfig.avg_messages_per_conversation,
+                        help="messages per conversation")
+    parser.add_argument("--days", type=int, default=GraphConfig.days, help="time span of the activity")
+    parser.add_argument("--batch-size", type=int, default=10_000)
+    parser.add_argument("--wipe", action="store_true", help="DELETE ALL existing nodes first")
+    parser.add_argument("--dry-run", action="store_true", help="generate and count rows without writing")
+    args = parser.parse_args(argv)
+
+    users = args.users or SCALES.get(args.scale or "small")["users"]
+    config = GraphConfig(
+        users=users,
+        seed=args.seed,
+        avg_follows=args.avg_follows,
+        avg_posts=args.avg_posts,
+        avg_likes_per_post=args.avg_likes,
+        avg_comments_per_post=args.avg_comments,
+        conversations_per_user=args.conversations_per_user,
+        avg_messages_per_conversation=args.avg_messages,
+        days=args.days,
+    )
+    started = time.perf_counter()
+    with Loader(args.batch_size, args.dry_run) as loader:
+        if args.wipe:
+            loader.wipe()
+        password_hash = "" if args.dry_run else _hash_password(DEFAULT_PASSWORD)
+        counts = load_graph(GraphGenerator(config, password_hash), loader)
+    elapsed = time.perf_counter() - started
+    print(f"done in {elapsed:.1f}s: " + ", ".join(f"{k}={v:,}" for k, v in counts.items()), file=sys.stderr)
+    print(f"all users can log in with password {DEFAULT_PASSWORD!r}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
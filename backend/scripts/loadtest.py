@@ -0,0 +1,311 @@
+"""End-to-end load test: HTTP endpoint mix plus Socket.IO message delivery.
+
+Each virtual user logs in, opens a Socket.IO connection, pairs up with
+another virtual user for DMs and then loops over a weighted scenario mix
+(feed scroll, like, comment, DM send, inbox poll, people search) with
+exponential think times. The report has p50/p95/p99 per endpoint and the
+end-to-end delivery latency of DMs (POST /messages/send until the
+partner's socket receives `message:new`).
+
+Runs against a server seeded with scripts.generate_graph, whose users
+are `user0`, `user1`, ... with password `password123`:
+
+    python -m scripts.loadtest --base-url http://localhost:8000 --users 50 --duration 120
+    python -m scripts.loadtest ... --save-baseline loadtest-baseline.json
+    python -m scripts.loadtest ... --baseline loadtest-baseline.json   # exit 1 on regression
+
+Needs `httpx` and `aiohttp` (the python-socketio async client) on top of
+requirements.txt; they are only used here.
+"""
+import argparse
+import asyncio
+import json
+import math
+import random
+import sys
+import time
+import uuid
+from collections import defaultdict
+from typing import Any, Dict, List, Optional
+
+import httpx
+import socketio
+
+DELIVERY = "socket message:new delivery"
+PERCENTILES = (50, 95, 99)
+
+# (name, weight) of the actions a virtual user picks from between think times
+SCENARIO = (
+    ("scroll_posts", 30),
+    ("scroll_feed", 20),
+    ("like", 12),
+    ("comment", 6),
+    ("send_dm", 12),
+    ("poll_inbox", 12),
+    ("search", 8),
+)
+SEARCH_TERMS = ("user1", "user2", "user", "user10", "user3", "user42")
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    k = max(0, min(len(sorted_values) - 1, math.ceil(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[k]
+
+
+class Stats:
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+
+    def record(self, name: str, seconds: float, ok: bool = True) -> None:
+        self.latencies[name].append(seconds * 1000)
+        if not ok:
+            self.errors[name] += 1
+
+    def summary(self, elapsed: float) -> Dict[str, Dict[str, Any]]:
+        out = {}
+        for name, values in sorted(self.latencies.items()):
+            values.sort()
+            row = {
+                "count": len(values),
+                "errors": self.errors.get(name, 0),
+                "rps": round(len(values) / elapsed, 2) if elapsed else 0.0,
+            }
+            for p in PERCENTILES:
+                row[f"p{p}"] = round(percentile(values, p), 1)
+            out[name] = row
+        return out
+
+
+class VirtualUser:
+    def __init__(self, index: int, args, http: httpx.AsyncClient, stats: Stats, pending: Dict[str, float]):
+        self.index = index
+        self.args = args
+        self.http = http
+        self.stats = stats
+        self.pending = pending
+        self.rng = random.Random(args.seed * 100_003 + index)
+        self.username = f"{args.user_prefix}{index}"
+        self.headers: Dict[str, str] = {}
+        self.id: Optional[str] = None
+        self.partner_id: Optional[str] = None
+        self.conversation_id: Optional[str] = None
+        self.post_ids: List[str] = []
+        self.sio = socketio.AsyncClient(reconnection=False)
+
+    async def request(self, method: str, name: str, url: str, **kwargs) -> Optional[httpx.Response]:
+        start = time.perf_counter()
+        try:
+            resp = await self.http.request(method, url, headers=self.headers, **kwargs)
+        except httpx.HTTPError:
+            self.stats.record(name, time.perf_counter() - start, ok=False)
+            return None
+        self.stats.record(name, time.perf_counter() - start, ok=resp.status_code < 400)
+        return resp if resp.status_code < 400 else None
+
+    # ---- setup ----
+    async def login(self) -> bool:
+        resp = await self.request("POST", "POST /auth/login-with-username", "/auth/login-with-username",
+                                  json={"username": self.username, "password": self.args.password})
+        if resp is None:
+            return False
+        self.headers = {"Authorization": f"Bearer {resp.json()['access_token']}"}
+        me = await self.request("GET", "GET /users/me", "/users/me")
+        if me is None:
+            return False
+        self.id = str(me.json()["id"])
+        return True
+
+    async def connect_socket(self) -> None:
+        @self.sio.on("message:new")
+        async def on_message(data):
+            message = (data or {}).get("message") or {}
+            if str(message.get("sender_id")) == self.id:
+                return
+            sent_at = self.pending.pop(message.get("content", ""), None)
+            if sent_at is not None:
+                self.stats.record(DELIVERY, time.perf_counter() - sent_at)
+
+        start = time.perf_counter()
+        try:
+            await self.sio.connect(self.args.base_url, transports=["websocket"], socketio_path="socket.io")
+            self.stats.record("SOCKET connect", time.perf_counter() - start)
+        except Exception:
+            self.stats.record("SOCKET connect", time.perf_counter() - start, ok=False)
+
+    async def open_conversation(self) -> None:
+        if not self.partner_id:
+            return
+        resp = await self.request("POST", "POST /messages/start", "/messages/start", json={"user_id": self.partner_id})
+        if resp is None:
+            return
+        self.conversation_id = resp.json()["conversation_id"]
+        if self.sio.connected:
+            await self.sio.emit("join_conversation", {"conversation_id": self.conversation_id})
+
+    # ---- actions ----
+    async def scroll_posts(self) -> None:
+        resp = await self.request("GET", "GET /posts/", "/posts/")
+        if resp is not None:
+            self.post_ids = [p["id"] for p in resp.json()[:200] if p.get("id")]
+
+    async def scroll_feed(self) -> None:
+        await self.request("GET", "GET /users/me/feed", "/users/me/feed")
+
+    async def like(self) -> None:
+        if self.post_ids:
+            post_id = self.rng.choice(self.post_ids)
+            await self.request("POST", "POST /posts/{post_id}/like", f"/posts/{post_id}/like")
+
+    async def comment(self) -> None:
+        if self.post_ids:
+            post_id = self.rng.choice(self.post_ids)
+            await self.request("POST", "POST /posts/{post_id}/comments", f"/posts/{post_id}/comments",
+                               json={"content": f"load test comment {self.rng.randrange(10**6)}"})
+
+    async def send_dm(self) -> None:
+        if not self.conversation_id:
+            return
+        # Unique content lets the partner's socket handler match the send time
+        content = f"lt:{uuid.uuid4()}"
+        self.pending[content] = time.perf_counter()
+        resp = await self.request("POST", "POST /messages/send", "/messages/send",
+                                  json={"conversation_id": self.conversation_id, "content": content})
+        if resp is None:
+            self.pending.pop(content, None)
+
+    async def poll_inbox(self) -> None:
+        await self.request("GET", "GET /messages/conversations", "/messages/conversations")
+
+    async def search(self) -> None:
+        # Typeahead: one request per keystroke
+        term = self.rng.choice(SEARCH_TERMS)
+        for i in range(1, len(term) + 1):
+            await self.request("GET", "GET /users/search", "/users/search", params={"q": term[:i], "limit": 10})
+
+    async def run(self, deadline: float) -> None:
+        names = [name for name, _ in SCENARIO]
+        weights = [w for _, w in SCENARIO]
+        while time.perf_counter() < deadline:
+            await getattr(self, self.rng.choices(names, weights)[0])()
+            await asyncio.sleep(self.rng.expovariate(1000.0 / self.args.think_ms) if self.args.think_ms > 0 else 0)
+
+    async def close(self) -> None:
+        if self.sio.connected:
+            await self.sio.disconnect()
+
+
+async def run_load(args) -> Dict[str, Any]:
+    stats = Stats()
+    pending: Dict[str, float] = {}
+    limits = httpx.Limits(max_connections=args.users, max_keepalive_connections=args.users)
+    async with httpx.AsyncClient(base_url=args.base_url, limits=limits, timeout=args.timeout) as http:
+        vus = [VirtualUser(args.first_user + i, args, http, stats, pending) for i in range(args.users)]
+
+        # Ramp up: spread logins and socket connects over --ramp-up seconds
+        async def setup(vu: VirtualUser, delay: float) -> None:
+            await asyncio.sleep(delay)
+            if await vu.login():
+                await vu.connect_socket()
+
+        step = args.ramp_up / max(1, len(vus))
+        await asyncio.gather(*(setup(vu, i * step) for i, vu in enumerate(vus)))
+        ready = [vu for vu in vus if vu.id]
+        if not ready:
+            raise SystemExit("no virtual user could log in; is the database seeded (scripts.generate_graph)?")
+
+        # Pair users up for DMs: 0<->1, 2<->3, ...
+        for a, b in zip(ready[0::2], ready[1::2]):
+            a.partner_id, b.partner_id = b.id, a.id
+        await asyncio.gather(*(vu.open_conversation() for vu in ready))
+
+        started = time.perf_counter()
+        await asyncio.gather(*(vu.run(started + args.duration) for vu in ready))
+        elapsed = time.perf_counter() - started
+        # Give in-flight socket deliveries a moment before disconnecting
+        await asyncio.sleep(1.0)
+        await asyncio.gather(*(vu.close() for vu in vus))
+
+    return {
+        "base_url": args.base_url,
+        "users": len(ready),
+        "duration_s": round(elapsed, 1),
+        "think_ms": args.think_ms,
+        "endpoints": stats.summary(elapsed),
+        "undelivered_messages": len(pending),
+    }
+
+
+def compare(result: Dict[str, Any], baseline: Dict[str, Any], tolerance: float, min_ms: float) -> List[str]:
+    """Endpoints whose p95/p99 grew more than `tolerance` over the baseline.
+    Differences under `min_ms` are ignored as noise."""
+    regressions = []
+    for name, row in result["endpoints"].items():
+        base = baseline.get("endpoints", {}).get(name)
+        if not base:
+            continue
+        for key in ("p95", "p99"):
+            old, new = base[key], row[key]
+            if new - old > min_ms and new > old * (1 + tolerance):
+                regressions.append(f"{name} {key}: {old:.1f}ms -> {new:.1f}ms (+{(new / old - 1) * 100 if old else 100:.0f}%)")
+    return regressions
+
+
+def print_report(result: Dict[str, Any], baseline: Optional[Dict[str, Any]]) -> None:
+    print(f"{result['users']} users, {result['duration_s']}s, think {result['think_ms']}ms")
+    print(f"{'endpoint':<34} {'count':>7} {'err':>5} {'rps':>7} {'p50':>8} {'p95':>8} {'p99':>8}" +
+          ("  p95 vs baseline" if baseline else ""))
+    for name, row in result["endpoints"].items():
+        line = (f"{name:<34} {row['count']:>7} {row['errors']:>5} {row['rps']:>7.1f} "
+                f"{row['p50']:>8.1f} {row['p95']:>8.1f} {row['p99']:>8.1f}")
+        base = (baseline or {}).get("endpoints", {}).get(name)
+        if base and base["p95"]:
+            line += f"  {(row['p95'] / base['p95'] - 1) * 100:+.0f}%"
+        print(line)
+    if result["undelivered_messages"]:
+        print(f"{result['undelivered_messages']} DMs were not delivered over Socket.IO")
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--users", type=int, default=20, help="concurrent virtual users")
+    parser.add_argument("--first-user", type=int, default=0, help="index of the first account (user<N>)")
+    parser.add_argument("--user-prefix", default="user")
+    parser.add_argument("--password", default="password123")
+    parser.add_argument("--duration", type=float, default=60.0, help="seconds of steady load")
+    parser.add_argument("--ramp-up", type=float, default=10.0, help="seconds to spread logins over")
+    parser.add_argument("--think-ms", type=float, default=1000.0, help="mean think time between actions")
+    parser.add_argument("--timeout", type=float, default=30.0, help="HTTP timeout in seconds")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--out", help="write the JSON result here")
+    parser.add_argument("--baseline", help="compare against this saved result")
+    parser.add_argument("--save-baseline", help="save this run as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.20, help="allowed p95/p99 growth (0.20 = 20%%)")
+    parser.add_argument("--min-ms", type=float, default=5.0, help="ignore regressions smaller than this")
+    args = parser.parse_args(argv)
+
+    result = asyncio.run(run_load(args))
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    print_report(result, baseline)
+
+    for path in filter(None, (args.out, args.save_baseline)):
+        with open(path, "w") as f:
+            json.dump(result, f, indent=2)
+
+    if baseline:
+        regressions = compare(result, baseline, args.tolerance, args.min_ms)
+        if regressions:
+            print("\nREGRESSIONS:\n  " + "\n  ".join(regressions), file=sys.stderr)
+            sys.exit(1)
+        print("\nno regressions against baseline")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,203 @@
+"""Data migrations for an existing Neo4j database.
+
+The API only creates its constraints and indexes at startup; every
+whole-graph rewrite and backfill is here. Every migration is idempotent
+and writes in batches (`CALL { ... } IN TRANSACTIONS`, or batched from
+Python where the values are computed there), so it can be interrupted
+and re-run.
+
+    python -m scripts.migrate --list
+    python -m scripts.migrate follow_counters
+    python -m scripts.migrate user_defaults
+    python -m scripts.migrate user_search
+    python -m scripts.migrate native_datetimes
+    python -m scripts.migrate message_buckets   # before setting MESSAGE_BUCKETS
+"""
+import argparse
+import sys
+import time
+from typing import Any, Callable, Dict, List, Tuple, Union
+
+# (pattern, variable, properties) stored as ISO strings before app.core.timestamps
+STRING_TIMESTAMPS = [
+    ("(n:User)", "n", ("created_at", "verified_at")),
+    ("(n:Post)", "n", ("created_at", "updated_at")),
+    ("(n:DeletedPost)", "n", ("created_at", "updated_at", "deleted_at")),
+    ("(n:Comment)", "n", ("created_at", "updated_at")),
+    ("(n:DeletedComment)", "n", ("created_at", "updated_at", "deleted_at")),
+    ("(n:Conversation)", "n", ("created_at", "cleared_at")),
+    ("(n:Message)", "n", ("timestamp", "created_at")),
+    ("(n:UserRecommendations)", "n", ("computed_at",)),
+    ("(n:Job)", "n", ("created_at", "started_at", "finished_at")),
+    ("(n:EmailOutbox)", "n", ("created_at",)),
+    ("()-[r:FOLLOWS]->()", "r", ("created_at",)),
+]
+
+
+def _to_datetime(pattern: str, var: str, prop: str) -> str:
+    # datetime() reads Z, offsets and zone-less values (as UTC); empty strings are dropped
+    return f"""
+    // migrate.native_datetimes
+    MATCH {pattern}
+    WHERE {var}.{prop} IS :: STRING
+    CALL {{
+        WITH {var}
+        SET {var}.{prop} = CASE WHEN trim({var}.{prop}) = '' THEN null ELSE datetime({var}.{prop}) END
+    }} IN TRANSACTIONS OF 10000 ROWS
+    """
+
+
+def _user_search(session, params: Dict[str, Any], batch_size: int = 1000) -> int:
+    """Write the typeahead text (app.core.text_search) of users that have none:
+    users from before the index, or created outside the API."""
+    from app.core.text_search import user_search_text
+
+    total = 0
+    while True:
+        rows = session.run(
+            """
+            // migrate.user_search_pending
+            MATCH (u:User) WHERE u.search_text IS NULL AND u.id IS NOT NULL
+            RETURN u.id AS id, u.username AS username, u.name AS name
+            LIMIT $limit
+            """,
+            limit=batch_size,
+        ).data()
+        if not rows:
+            return total
+        session.run(
+            """
+            // migrate.user_search
+            UNWIND $rows AS row
+            MATCH (u:User {id: row.id})
+            SET u.search_text = row.text
+            """,
+            rows=[{"id": r["id"], "text": user_search_text(r["username"], r["name"])} for r in rows],
+        ).consume()
+        total += len(rows)
+
+
+# A step is Cypher, or a function(session, params) returning the properties it set
+Step = Union[str, Callable[..., int]]
+
+# name -> (description, steps run in order)
+MIGRATIONS: Dict[str, Tuple[str, List[Step]]] = {
+    "follow_counters": (
+        "count User.followers_count / following_count from the FOLLOWS relationships",
+        [
+            """
+            // migrate.follow_counters
+            MATCH (u:User)
+            CALL {
+                WITH u
+                SET u.followers_count = COUNT { (u)<-[:FOLLOWS]-(:User) },
+                    u.following_count = COUNT { (u)-[:FOLLOWS]->(:User) }
+            } IN TRANSACTIONS OF 1000 ROWS
+            """,
+        ],
+    ),
+    "user_defaults": (
+        "give users without one an empty profile_pic (avoids unknown-property warnings)",
+        [
+            """
+            // migrate.user_defaults
+            MATCH (u:User)
+            WHERE u.profile_pic IS NULL
+            CALL {
+                WITH u
+                SET u.profile_pic = ''
+            } IN TRANSACTIONS OF 10000 ROWS
+            """,
+        ],
+    ),
+    "user_search": (
+        "index users that have no search_text for the people typeahead",
+        [_user_search],
+    ),
+    "native_datetimes": (
+        "convert ISO-string timestamps (mixed Z/offset/zone-less formats) to native DATETIME",
+        [_to_datetime(pattern, var, prop) for pattern, var, props in STRING_TIMESTAMPS for prop in props],
+    ),
+    "message_buckets": (
+        "move HAS_MESSAGE messages into chained MessageBucket nodes (MESSAGE_BUCKETS storage)",
+        [
+            # Oldest first, MESSAGE_BUCKET_SIZE per bucket, chained after any buckets
+            # the conversation already has (so a re-run sweeps up stragglers); each
+            # conversation is moved in one transaction, locked like a send
+            """
+            // migrate.message_buckets
+            MATCH (c:Conversation)
+            WHERE EXISTS { (c)-[:HAS_MESSAGE]->() }
+            CALL {
+                WITH c
+                SET c._lock = true
+                WITH c
+                OPTIONAL MATCH (c)-[:LATEST_BUCKET]->(cur:MessageBucket)
+                WITH c, coalesce(cur.seq + 1, 0) AS base
+                MATCH (c)-[h:HAS_MESSAGE]->(m:Message)
+                WITH c, base, h, m ORDER BY coalesce(m.timestamp, m.created_at), m.id
+                WITH c, base, collect(m) AS msgs, collect(h) AS links
+                FOREACH (h IN links | DELETE h)
+                UNWIND range(0, size(msgs) - 1) AS i
+                WITH c, base, base + i / $bucket_size AS seq, msgs[i] AS m
+                WITH c, base, seq, m, coalesce(m.timestamp, m.created_at) AS ts
+                MERGE (b:MessageBucket {conversation_id: c.id, seq: seq})
+                  ON CREATE SET b.first_at = ts, b.count = 0
+                SET b.count = b.count + 1,
+                    b.last_at = CASE WHEN b.last_at IS NULL OR ts > b.last_at THEN ts ELSE b.last_at END
+                CREATE (b)-[:HOLDS]->(m)
+                WITH c, base, max(seq) AS top
+                UNWIND range(base, top) AS s
+                MATCH (nb:MessageBucket {conversation_id: c.id, seq: s})
+                OPTIONAL MATCH (pb:MessageBucket {conversation_id: c.id, seq: s - 1})
+                FOREACH (prev IN CASE WHEN pb IS NULL THEN [] ELSE [pb] END | MERGE (nb)-[:PREV_BUCKET]->(prev))
+                WITH c, s, top, nb WHERE s = top
+                OPTIONAL MATCH (c)-[old:LATEST_BUCKET]->()
+                DELETE old
+                CREATE (c)-[:LATEST_BUCKET]->(nb)
+                REMOVE c._lock
+            } IN TRANSACTIONS OF 10 ROWS
+            """,
+        ],
+    ),
+}
+
+
+def run_migration(name: str) -> None:
+    from app.core.config import settings
+    from app.core.database import db
+
+    description, statements = MIGRATIONS[name]
+    print(f"{name}: {description}", file=sys.stderr)
+    started = time.perf_counter()
+    params = {"bucket_size": settings.MESSAGE_BUCKET_SIZE}
+    with db.driver.session(database=settings.NEO4J_DATABASE) as session:
+        for step in statements:
+            if callable(step):
+                properties_set = step(session, params)
+            else:
+                properties_set = session.run(step, params).consume().counters.properties_set
+            print(f"  {properties_set:,} properties set", file=sys.stderr)
+    print(f"  done in {time.perf_counter() - started:.1f}s", file=sys.stderr)
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("names", nargs="*", metavar="migration",
+                        help=f"one or more of: {', '.join(sorted(MIGRATIONS))}")
+    parser.add_argument("--list", action="store_true", help="list the migrations and exit")
+    args = parser.parse_args(argv)
+    unknown = [n for n in args.names if n not in MIGRATIONS]
+    if unknown:
+        parser.error(f"unknown migration(s): {', '.join(unknown)}")
+
+    if args.list or not args.names:
+        for name, (description, _) in sorted(MIGRATIONS.items()):
+            print(f"{name:<20} {description}")
+        return
+    for name in args.names:
+        run_migration(name)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""The API on the memory backend (STORAGE_BACKEND=memory), fresh state per test.
+
+The TestClient is used without its context manager, so the startup hooks
+(hashing pool warm-up, outbox/job/recommendation workers) don't run; jobs
+enqueued by a request just stay queued.
+"""
+import os
+
+os.environ["STORAGE_BACKEND"] = "memory"
+os.environ.setdefault("JWT_SECRET", "test-secret")
+
+from typing import Any, Dict
+from uuid import uuid4
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core import security
+from app.core.cache import profile_cache
+from app.core.hashing import pwd_context
+from app.core.rate_limit import MemoryLimiterStore, login_limiter
+from app.core.security import issue_token_pair
+from app.core.timestamps import now_iso
+from app.main import app
+from app.repositories import repos
+from app.repositories.memory_repo import MemoryRepositories
+
+PASSWORD = "correct horse battery staple"
+# Hashed once: Argon2 is slow on purpose
+PASSWORD_HASH = pwd_context.hash(PASSWORD)
+
+
+def reset_repos() -> None:
+    """Swap fresh memory repositories into the shared `repos` object the routes use."""
+    repos.__dict__.update(MemoryRepositories().__dict__)
+
+
+@pytest.fixture(autouse=True)
+def fresh_state(monkeypatch):
+    reset_repos()
+    monkeypatch.setattr(login_limiter, "store", MemoryLimiterStore())
+    monkeypatch.setattr(security, "revocations", security.RevocationList())
+    profile_cache.clear()
+
+
+@pytest.fixture
+def client() -> TestClient:
+    return TestClient(app)
+
+
+@pytest.fixture
+def make_user():
+    """Create a verified user directly in the repositories."""
+    def make(username: str, **extra: Any) -> Dict[str, Any]:
+        user = {
+            "id": str(uuid4()),
+            "username": username,
+            "email": f"{username}@example.edu",
+            "password": PASSWORD_HASH,
+            "email_verified": True,
+            "program": "CS",
+            "created_at": now_iso(),
+            **extra,
+        }
+        repos.users.create(user)
+        return user
+    return make
+
+
+@pytest.fixture
+def auth():
+    """Authorization header for a user, as after a login."""
+    def headers(user: Dict[str, Any]) -> Dict[str, str]:
+        return {"Authorization": f"Bearer {issue_token_pair(user)['access_token']}"}
+    return headers
@@ -0,0 +1,85 @@
+"""Login throttling and refresh-token rotation."""
+from app.core import security
+from app.core.config import settings
+
+from conftest import PASSWORD
+
+
+def _login(client, username, password):
+    return client.post("/auth/login-with-username", json={"username": username, "password": password})
+
+
+def test_login_and_wrong_password(client, make_user):
+    make_user("alice")
+    assert _login(client, "alice", "nope").status_code == 400
+    tokens = _login(client, "alice", PASSWORD).json()
+    assert client.get("/users/me", headers={"Authorization": f"Bearer {tokens['access_token']}"}).status_code == 200
+
+
+def test_username_blocked_after_too_many_failures(client, make_user):
+    make_user("alice")
+    for _ in range(settings.LOGIN_MAX_FAILURES_PER_USERNAME - 1):
+        assert _login(client, "alice", "nope").status_code == 400
+    # The failure that reaches the limit is still answered normally...
+    assert _login(client, "alice", "nope").status_code == 400
+    # ...then even the right password is turned away until the block ends
+    blocked = _login(client, "alice", PASSWORD)
+    assert blocked.status_code == 429
+    assert int(blocked.headers["Retry-After"]) > 0
+
+
+def test_success_resets_the_failure_count(client, make_user):
+    make_user("alice")
+    for _ in range(settings.LOGIN_MAX_FAILURES_PER_USERNAME - 1):
+        _login(client, "alice", "nope")
+    assert _login(client, "alice", PASSWORD).status_code == 200
+    assert _login(client, "alice", "nope").status_code == 400
+
+
+def test_refresh_rotates_and_detects_reuse(client, make_user):
+    make_user("alice")
+    first = _login(client, "alice", PASSWORD).json()
+
+    second = client.post("/auth/refresh", json={"refresh_token": first["refresh_token"]})
+    assert second.status_code == 200
+    second = second.json()
+    assert second["refresh_token"] != first["refresh_token"]
+
+    # Replaying the spent token revokes the whole family...
+    reuse = client.post("/auth/refresh", json={"refresh_token": first["refresh_token"]})
+    assert reuse.status_code == 401
+    assert "reuse" in reuse.json()["detail"]
+    # ...including the pair it was exchanged for
+    assert client.post("/auth/refresh", json={"refresh_token": second["refresh_token"]}).status_code == 401
+    me = client.get("/users/me", headers={"Authorization": f"Bearer {second['access_token']}"})
+    assert me.status_code == 401
+
+
+def test_logout_revokes_the_session(client, make_user):
+    make_user("alice")
+    tokens = _login(client, "alice", PASSWORD).json()
+    assert client.post("/auth/logout", json={"refresh_token": tokens["refresh_token"]}).status_code == 200
+    assert client.post("/auth/refresh", json={"refresh_token": tokens["refresh_token"]}).status_code == 401
+    assert client.get("/users/me", headers={"Authorization": f"Bearer {tokens['access_token']}"}).status_code == 401
+
+
+def test_access_token_is_not_a_refresh_token(client, make_user):
+    make_user("alice")
+    tokens = _login(client, "alice", PASSWORD).json()
+    assert client.post("/auth/refresh", json={"refresh_token": tokens["access_token"]}).status_code == 401
+
+
+def test_refresh_revocations_survive_a_restart(client, make_user, monkeypatch):
+    make_user("alice")
+    logged_out = _login(client, "alice", PASSWORD).json()["refresh_token"]
+    spent = _login(client, "alice", PASSWORD).json()["refresh_token"]
+    client.post("/auth/logout", json={"refresh_token": logged_out})
+    client.post("/auth/refresh", json={"refresh_token": spent})
+
+    # A restart empties the in-memory list; the repository still knows
+    monkeypatch.setattr(security, "revocations", security.RevocationList())
+
+    assert client.post("/auth/refresh", json={"refresh_token": logged_out}).status_code == 401
+    reuse = client.post("/auth/refresh", json={"refresh_token": spent})
+    assert reuse.status_code == 401
+    assert "reuse" in reuse.json()["detail"]
@@ -0,0 +1,57 @@
+"""Deleted posts, comments and cleared conversations disappear from reads at once."""
+from app.repositories import repos
+
+
+def _post(client, headers, content):
+    return client.post("/posts/", data={"content": content}, headers=headers).json()["id"]
+
+
+def test_deleted_post_is_gone_from_reads(client, make_user, auth):
+    alice = make_user("alice")
+    keep, gone = _post(client, auth(alice), "keep"), _post(client, auth(alice), "gone")
+    client.post(f"/posts/{gone}/comments", json={"content": "a comment"}, headers=auth(alice))
+
+    assert client.delete(f"/posts/{gone}", headers=auth(alice)).status_code == 200
+
+    assert [p["id"] for p in client.get("/posts/").json()] == [keep]
+    assert client.get(f"/posts/{gone}").status_code == 404
+    assert client.get(f"/posts/{gone}/comments").json() == []
+    assert client.get("/posts/search", params={"q": "gone"}).json()["results"] == []
+    # The rest of the delete is left to a background job
+    assert [j["kind"] for j in repos.jobs.list_recent(10)] == ["purge_post"]
+
+
+def test_only_the_author_can_delete(client, make_user, auth):
+    alice, bob = make_user("alice"), make_user("bob")
+    pid = _post(client, auth(alice), "mine")
+    assert client.delete(f"/posts/{pid}", headers=auth(bob)).status_code == 403
+    assert client.get(f"/posts/{pid}").status_code == 200
+
+
+def test_deleted_comment_is_hidden(client, make_user, auth):
+    alice = make_user("alice")
+    pid = _post(client, auth(alice), "hello")
+    ids = [
+        client.post(f"/posts/{pid}/comments", json={"content": f"c{i}"}, headers=auth(alice)).json()["id"]
+        for i in range(3)
+    ]
+    assert client.delete(f"/posts/comments/{ids[1]}", headers=auth(alice)).status_code == 200
+    assert [c["id"] for c in client.get(f"/posts/{pid}/comments").json()] == [ids[0], ids[2]]
+    feed = client.get("/posts/", params={"fields": "id,comments_count"}).json()
+    assert feed == [{"id": pid, "comments_count": 2}]
+
+
+def test_cleared_conversation_hides_its_messages(client, make_user, auth):
+    alice, bob = make_user("alice"), make_user("bob")
+    client.post("/messages/send", json={"user_id": bob["id"], "content": "old"}, headers=auth(alice))
+    cid = client.get(f"/messages/conversation/with/{bob['id']}", headers=auth(alice)).json()["conversation_id"]
+
+    res = client.delete(f"/messages/conversation/{cid}", headers=auth(alice))
+    assert res.status_code == 200
+    assert res.json()["deleted_messages"] == 1
+
+    assert client.get("/messages/conversations", headers=auth(bob)).json() == []
+    client.post("/messages/send", json={"user_id": alice["id"], "content": "new"}, headers=auth(bob))
+    cid = client.get(f"/messages/conversation/with/{alice['id']}", headers=auth(bob)).json()["conversation_id"]
+    assert [m["content"] for m in client.get("/messages", params={"conversation_id": cid}, headers=auth(alice)).json()] == ["new"]
+
@@ -0,0 +1,61 @@
+"""People directory (GET /users/): both sort orders across cursor pages, and
+the stored follow counters it serves."""
+
+
+def _pages(client, **params):
+    """Every page of the directory, following next_cursor; ids per page."""
+    pages, cursor = [], None
+    while True:
+        body = client.get("/users/", params={**params, **({"cursor": cursor} if cursor else {})}).json()
+        pages.append([u["id"] for u in body["results"]])
+        cursor = body["next_cursor"]
+        if not cursor:
+            return pages
+
+
+def _counts(client, user):
+    u = client.get(f"/users/{user['id']}", params={"fields": "followers_count,following_count"}).json()
+    return u["followers_count"], u["following_count"]
+
+
+def test_newest_first_across_pages(client, make_user):
+    users = [make_user(f"user{i}", created_at=f"2024-01-0{i + 1}T00:00:00.000Z") for i in range(5)]
+
+    pages = _pages(client, sort="newest", limit=2, fields="id")
+
+    assert pages == [[users[4]["id"], users[3]["id"]], [users[2]["id"], users[1]["id"]], [users[0]["id"]]]
+
+
+def test_most_followed_first_across_pages(client, make_user, auth):
+    users = [make_user(f"user{i}") for i in range(5)]
+    # user{i} is followed by i others
+    for i, user in enumerate(users):
+        for fan in users[:i]:
+            assert client.post(f"/users/{user['id']}/follow", headers=auth(fan)).status_code == 200
+
+    pages = _pages(client, sort="followers", limit=2, fields="id,followers_count")
+
+    assert [uid for page in pages for uid in page] == [u["id"] for u in reversed(users)]
+    assert [len(page) for page in pages] == [2, 2, 1]
+
+
+def test_unknown_sort_is_a_400(client):
+    assert client.get("/users/", params={"sort": "oldest"}).status_code == 400
+
+
+def test_counters_follow_and_unfollow(client, make_user, auth):
+    alice, bob, carol = make_user("alice"), make_user("bob"), make_user("carol")
+
+    client.post(f"/users/{bob['id']}/follow", headers=auth(alice))
+    client.post(f"/users/{bob['id']}/follow", headers=auth(carol))
+    client.post(f"/users/{bob['id']}/follow", headers=auth(alice))  # already following: no change
+    assert _counts(client, bob) == (2, 0)
+    assert _counts(client, alice) == (0, 1)
+
+    client.post(f"/users/{bob['id']}/unfollow", headers=auth(alice))
+    client.post(f"/users/{bob['id']}/unfollow", headers=auth(alice))  # not following: no change
+    assert _counts(client, bob) == (1, 0)
+    assert _counts(client, alice) == (0, 0)
+
+    listed = {u["id"]: u for u in client.get("/users/", params={"fields": "id,followers_count,following_count"}).json()["results"]}
+    assert (listed[bob["id"]]["followers_count"], listed[carol["id"]]["following_count"]) == (1, 1)
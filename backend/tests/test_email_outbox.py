@@ -0,0 +1,67 @@
+import asyncio
+import smtplib
+
+import pytest
+
+from app.core.config import settings
+from app.repositories import repos
+from app.services import email_service
+from app.services.email_service import EmailOutboxWorker, EmailTransport, SmtpTransport, queue_email
+
+
+class FakeSmtp:
+    """smtplib.SMTP whose login is rejected."""
+
+    def __init__(self, *args, **kwargs):
+        self.sent = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def starttls(self):
+        pass
+
+    def login(self, user, password):
+        raise smtplib.SMTPAuthenticationError(535, b"bad credentials")
+
+    def send_message(self, msg):
+        self.sent.append(msg)
+
+
+class BrokenTransport(EmailTransport):
+    def send_batch(self, emails):
+        raise RuntimeError("transport bug")
+
+
+def _queue(n):
+    return [queue_email(f"u{i}@example.edu", "Hi", "<p>hi</p>", "hi") for i in range(n)]
+
+
+def test_smtp_login_failure_is_reported_per_email(monkeypatch):
+    monkeypatch.setattr(email_service.smtplib, "SMTP", FakeSmtp)
+    monkeypatch.setattr(settings, "SMTP_USER", "mailer")
+    emails = [{"id": "a", "to": "a@example.edu", "subject": "s", "text": "t"},
+              {"id": "b", "to": "b@example.edu", "subject": "s", "text": "t"}]
+
+    results = SmtpTransport().send_batch(emails)
+
+    assert [r[0] for r in results] == ["a", "b"]
+    assert all(error and "SMTP session setup failed" in error for _, error in results)
+
+
+@pytest.mark.parametrize("max_attempts, status", [(8, "pending"), (1, "dead")])
+def test_transport_exception_counts_an_attempt(monkeypatch, max_attempts, status):
+    monkeypatch.setattr(settings, "EMAIL_MAX_ATTEMPTS", max_attempts)
+    ids = _queue(3)
+
+    handled = asyncio.run(EmailOutboxWorker(BrokenTransport()).run_once())
+
+    assert handled == 3
+    for email_id in ids:
+        e = repos.outbox.items[email_id]
+        assert e["status"] == status
+        assert e["attempts"] == 1
+        assert "transport bug" in e["last_error"]
@@ -0,0 +1,34 @@
+"""`?fields=` projections on the people directory, profiles and the feed."""
+
+
+def test_user_list_returns_only_requested_fields(client, make_user):
+    make_user("alice", bio="hi")
+    res = client.get("/users/", params={"fields": "id,username"})
+    assert res.status_code == 200
+    assert [set(u) for u in res.json()["results"]] == [{"id", "username"}]
+
+
+def test_profile_projection_and_default_shape(client, make_user):
+    alice = make_user("alice", bio="hi")
+    assert client.get(f"/users/{alice['id']}", params={"fields": "username,bio"}).json() == {
+        "username": "alice", "bio": "hi",
+    }
+    full = client.get(f"/users/{alice['id']}").json()
+    assert {"id", "username", "followers_count", "pinned_posts"} <= set(full)
+    assert "password" not in full
+
+
+def test_post_list_projection(client, make_user, auth):
+    alice = make_user("alice")
+    client.post("/posts/", data={"content": "hello"}, headers=auth(alice))
+    posts = client.get("/posts/", params={"fields": "content,likes_count"}).json()
+    assert posts == [{"content": "hello", "likes_count": 0}]
+    # A page needs the id for its cursor, so it is added when paging
+    paged = client.get("/posts/", params={"fields": "content", "limit": 5}).json()
+    assert set(paged[0]) == {"id", "content"}
+
+
+def test_unknown_field_is_rejected(client):
+    res = client.get("/users/", params={"fields": "id,password"})
+    assert res.status_code == 400
+    assert "password" in res.json()["detail"]
@@ -0,0 +1,61 @@
+import time
+
+import pytest
+
+from app.core.config import settings
+from app.repositories import repos
+from app.services import jobs
+from app.services.jobs import LeaseLost, enqueue_job, run_job
+
+
+@pytest.fixture
+def stalling_handler(monkeypatch):
+    """A job kind whose handler checkpoints once, then hands control to the test."""
+    calls = []
+
+    def handler(ctx):
+        calls.append(ctx)
+        ctx.state["step"] = len(calls)
+        ctx.checkpoint(step=len(calls))
+        return {"steps": len(calls)}
+
+    monkeypatch.setitem(jobs.HANDLERS, "test_stall", handler)
+    return calls
+
+
+def test_claim_leases_a_job_once():
+    job = enqueue_job("purge_post", {"post_id": "p1"}, None)
+    now = time.time()
+
+    claimed = repos.jobs.claim(now, settings.JOB_LEASE_SECONDS)
+    assert claimed["id"] == job["id"]
+    assert claimed["attempts"] == 1
+    assert repos.jobs.claim(now, settings.JOB_LEASE_SECONDS) is None
+
+
+def test_stale_worker_cannot_write_after_its_lease_is_taken(stalling_handler):
+    job = enqueue_job("test_stall", {}, None)
+    now = time.time()
+    first = repos.jobs.claim(now, 1)
+    # The first worker stalls past its lease; a second one takes the job over
+    second = repos.jobs.claim(now + 2, settings.JOB_LEASE_SECONDS)
+    assert second["id"] == job["id"]
+    assert second["lease_token"] != first["lease_token"]
+
+    assert not repos.jobs.checkpoint(job["id"], first["lease_token"], {}, {}, now + 10)
+    run_job(first)  # its first checkpoint finds the lease gone
+    assert repos.jobs.get(job["id"])["status"] == "running"
+
+    run_job(second)
+    done = repos.jobs.get(job["id"])
+    assert done["status"] == "succeeded"
+    assert done["attempts"] == 2
+    assert done["progress"] == {"step": 2}
+
+
+def test_lease_lost_is_raised_from_checkpoint(stalling_handler):
+    job = enqueue_job("test_stall", {}, None)
+    claimed = repos.jobs.claim(time.time(), settings.JOB_LEASE_SECONDS)
+    repos.jobs.release(job["id"], claimed["lease_token"], "gave up")
+    with pytest.raises(LeaseLost):
+        jobs.JobContext(claimed).checkpoint(step=1)
@@ -0,0 +1,104 @@
+"""MESSAGE_BUCKETS paging: pages read from the cursor's bucket and a few older ones."""
+import pytest
+
+from app.core.config import settings
+from app.repositories import repos
+from app.repositories.memory_repo import MemoryBucketedMessageRepository
+
+from conftest import reset_repos
+
+BUCKET = 4
+
+
+@pytest.fixture(autouse=True)
+def bucketed(monkeypatch):
+    monkeypatch.setattr(settings, "MESSAGE_BUCKETS", True)
+    monkeypatch.setattr(settings, "MESSAGE_BUCKET_SIZE", BUCKET)
+    reset_repos()
+    assert isinstance(repos.messages, MemoryBucketedMessageRepository)
+
+
+def _thread(client, auth, sender, receiver, count, prefix="m"):
+    ids = [
+        client.post("/messages/send", json={"user_id": receiver["id"], "content": f"{prefix}{i}"},
+                    headers=auth(sender)).json()["message"]["id"]
+        for i in range(count)
+    ]
+    cid = client.get(f"/messages/conversation/with/{receiver['id']}", headers=auth(sender)).json()["conversation_id"]
+    return cid, ids
+
+
+def _page(client, auth, user, cid, **params):
+    res = client.get("/messages", params={"conversation_id": cid, **params}, headers=auth(user))
+    assert res.status_code == 200, res.text
+    return [m["id"] for m in res.json()]
+
+
+@pytest.mark.parametrize("limit", [1, 3, BUCKET, BUCKET + 2, 3 * BUCKET])
+def test_paging_back_through_buckets_sees_every_message_once(client, make_user, auth, limit):
+    alice, bob = make_user("alice"), make_user("bob")
+    cid, ids = _thread(client, auth, alice, bob, 3 * BUCKET + 1)
+
+    seen, before = [], None
+    while True:
+        page = _page(client, auth, bob, cid, limit=limit, **({"before": before} if before else {}))
+        if not page:
+            break
+        assert len(page) <= limit
+        seen[:0] = page
+        before = page[0]
+    assert seen == ids
+    assert _page(client, auth, bob, cid) == ids
+
+
+def test_cursor_from_another_conversation_stays_in_this_one(client, make_user, auth):
+    alice, bob, carol = make_user("alice"), make_user("bob"), make_user("carol")
+    mine, my_ids = _thread(client, auth, alice, bob, 2 * BUCKET, prefix="ab")
+    _, foreign_ids = _thread(client, auth, alice, carol, 2 * BUCKET, prefix="ac")
+
+    # bob belongs to `mine` only; a cursor taken from alice and carol's thread
+    # may position the page by its time, but never return their messages
+    page = _page(client, auth, bob, mine, limit=BUCKET, before=foreign_ids[-1])
+    assert page == my_ids[-BUCKET:]
+    assert not set(page) & set(foreign_ids)
+    assert _page(client, auth, bob, mine, before=foreign_ids[0]) == my_ids
+
+
+def test_foreign_cursor_in_the_middle_of_the_thread(client, make_user, auth):
+    alice, bob, carol = make_user("alice"), make_user("bob"), make_user("carol")
+    mine, early = _thread(client, auth, alice, bob, BUCKET + 1, prefix="early")
+    _, foreign_ids = _thread(client, auth, alice, carol, 1, prefix="ac")
+    _, late = _thread(client, auth, alice, bob, BUCKET + 1, prefix="late")
+
+    assert _page(client, auth, bob, mine, limit=2, before=foreign_ids[0]) == early[-2:]
+    assert _page(client, auth, bob, mine, before=foreign_ids[0]) == early
+
+
+def test_other_participants_cannot_read_the_thread(client, make_user, auth):
+    alice, bob, carol = make_user("alice"), make_user("bob"), make_user("carol")
+    cid, _ = _thread(client, auth, alice, bob, 3)
+    res = client.get("/messages", params={"conversation_id": cid, "limit": 2}, headers=auth(carol))
+    assert res.status_code == 403
+
+
+def test_cleared_messages_leave_the_buckets(client, make_user, auth):
+    alice, bob = make_user("alice"), make_user("bob")
+    cid, _ = _thread(client, auth, alice, bob, BUCKET + 1)
+    assert client.delete(f"/messages/conversation/{cid}", headers=auth(alice)).status_code == 200
+    cid, ids = _thread(client, auth, bob, alice, 2, prefix="again")
+    assert _page(client, auth, alice, cid, limit=10) == ids
+
+
+def test_deleted_senders_messages_free_their_bucket_slots(client, make_user, auth):
+    alice, bob = make_user("alice"), make_user("bob")
+    cid, _ = _thread(client, auth, alice, bob, BUCKET - 1)
+    _, [bob_first] = _thread(client, auth, bob, alice, 1, prefix="b")
+
+    assert repos.messages.delete_sent_batch(alice["id"], 100) == (BUCKET - 1, [cid])
+    _, [bob_second] = _thread(client, auth, bob, alice, 1, prefix="b")
+
+    # The first bucket had room again, so no second one was started
+    [bucket] = repos.messages.g.message_buckets[cid]
+    assert bucket["count"] == 2
+    assert [mid for _, mid in bucket["keys"]] == [bob_first, bob_second]
+    assert _page(client, auth, bob, cid) == [bob_first, bob_second]
@@ -0,0 +1,61 @@
+"""Id cursors: posts (newest first), comments (oldest first), messages (latest N)."""
+
+
+def _post(client, headers, content):
+    res = client.post("/posts/", data={"content": content}, headers=headers)
+    assert res.status_code == 200, res.text
+    return res.json()["id"]
+
+
+def test_posts_page_by_id_cursor(client, make_user, auth):
+    alice = make_user("alice")
+    ids = [_post(client, auth(alice), f"post {i}") for i in range(5)]
+
+    first = client.get("/posts/", params={"limit": 2}).json()
+    assert [p["id"] for p in first] == ids[:-3:-1]
+    second = client.get("/posts/", params={"limit": 2, "before": first[-1]["id"]}).json()
+    assert [p["id"] for p in second] == [ids[2], ids[1]]
+    last = client.get("/posts/", params={"limit": 2, "before": second[-1]["id"]}).json()
+    assert [p["id"] for p in last] == [ids[0]]
+
+
+def test_deleted_post_still_works_as_cursor(client, make_user, auth):
+    alice = make_user("alice")
+    ids = [_post(client, auth(alice), f"post {i}") for i in range(4)]
+    assert client.delete(f"/posts/{ids[2]}", headers=auth(alice)).status_code == 200
+
+    page = client.get("/posts/", params={"limit": 10, "before": ids[2]}).json()
+    assert [p["id"] for p in page] == [ids[1], ids[0]]
+
+
+def test_comments_page_oldest_first(client, make_user, auth):
+    alice = make_user("alice")
+    pid = _post(client, auth(alice), "hello")
+    ids = [
+        client.post(f"/posts/{pid}/comments", json={"content": f"c{i}"}, headers=auth(alice)).json()["id"]
+        for i in range(5)
+    ]
+
+    first = client.get(f"/posts/{pid}/comments", params={"limit": 3}).json()
+    assert [c["id"] for c in first] == ids[:3]
+    rest = client.get(f"/posts/{pid}/comments", params={"limit": 3, "after": first[-1]["id"]}).json()
+    assert [c["id"] for c in rest] == ids[3:]
+
+
+def test_messages_latest_page_then_older(client, make_user, auth):
+    alice, bob = make_user("alice"), make_user("bob")
+    ids = []
+    for i in range(7):
+        res = client.post("/messages/send", json={"user_id": bob["id"], "content": f"m{i}"}, headers=auth(alice))
+        assert res.status_code == 200, res.text
+        ids.append(res.json()["message"]["id"])
+    cid = client.get(f"/messages/conversation/with/{bob['id']}", headers=auth(alice)).json()["conversation_id"]
+
+    latest = client.get("/messages", params={"conversation_id": cid, "limit": 3}, headers=auth(bob)).json()
+    assert [m["id"] for m in latest] == ids[4:]
+    older = client.get(
+        "/messages", params={"conversation_id": cid, "limit": 3, "before": latest[0]["id"]}, headers=auth(bob),
+    ).json()
+    assert [m["id"] for m in older] == ids[1:4]
+    everything = client.get("/messages", params={"conversation_id": cid}, headers=auth(bob)).json()
+    assert [m["id"] for m in everything] == ids
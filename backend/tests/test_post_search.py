@@ -0,0 +1,56 @@
+"""GET /posts/search: highlighting, cursor paging, malformed cursors."""
+import pytest
+
+from app.core.pagination import encode_cursor
+
+
+def _post(client, headers, content):
+    res = client.post("/posts/", data={"content": content}, headers=headers)
+    assert res.status_code == 200, res.text
+    return res.json()["id"]
+
+
+def test_matches_are_highlighted_and_escaped(client, make_user, auth):
+    alice = make_user("alice")
+    pid = _post(client, auth(alice), "<b>Kayaking</b> trip on saturday")
+    client.post(f"/posts/{pid}/comments", json={"content": "count me in for kayaking"}, headers=auth(alice))
+    _post(client, auth(alice), "nothing to see here")
+
+    res = client.get("/posts/search", params={"q": "kayak"})
+    assert res.status_code == 200
+    [hit] = res.json()["results"]
+    assert hit["id"] == pid
+    assert hit["highlights"]["content"] == "&lt;b&gt;<mark>Kayaking</mark>&lt;/b&gt; trip on saturday"
+    assert [c["snippet"] for c in hit["highlights"]["comments"]] == ["count me in for <mark>kayaking</mark>"]
+    assert "rank" not in hit and "matched_comments" not in hit
+
+
+def test_pages_through_results_once_each(client, make_user, auth):
+    alice = make_user("alice")
+    ids = {_post(client, auth(alice), f"climbing meetup {i}") for i in range(7)}
+
+    seen, cursor = [], None
+    while True:
+        params = {"q": "climbing", "limit": 3, **({"cursor": cursor} if cursor else {})}
+        body = client.get("/posts/search", params=params).json()
+        seen += [p["id"] for p in body["results"]]
+        cursor = body["next_cursor"]
+        if not cursor:
+            break
+    assert len(seen) == len(ids) and set(seen) == ids
+
+
+@pytest.mark.parametrize("cursor", [
+    "not-a-cursor",
+    encode_cursor(1.0, "p1"),
+    encode_cursor("high", "p1", 1700000000.0),
+    encode_cursor(1.0, "p1", None),
+    encode_cursor(1.0, 7, 1700000000.0),
+    encode_cursor(True, "p1", 1700000000.0),
+])
+def test_malformed_cursor_is_a_400(client, make_user, auth, cursor):
+    alice = make_user("alice")
+    _post(client, auth(alice), "climbing meetup")
+    res = client.get("/posts/search", params={"q": "climbing", "cursor": cursor})
+    assert res.status_code == 400
+    assert res.json()["detail"] == "Invalid cursor"
@@ -0,0 +1,35 @@
+"""Cached profiles (GET /users/me, /users/{id}) change as soon as a follow,
+unfollow or profile update lands, whatever PROFILE_CACHE_TTL_SECONDS is."""
+from app.core.cache import profile_cache
+
+
+def _followers(client, user):
+    return client.get(f"/users/{user['id']}").json()["followers_count"]
+
+
+def test_follow_and_unfollow_show_up_at_once(client, make_user, auth):
+    alice, bob = make_user("alice"), make_user("bob")
+    assert _followers(client, bob) == 0
+    assert client.get("/users/me", headers=auth(alice)).json()["following_count"] == 0
+    # Both reads are now cached
+    assert profile_cache.get(("me", alice["id"])) is not None
+
+    client.post(f"/users/{bob['id']}/follow", headers=auth(alice))
+    assert _followers(client, bob) == 1
+    assert client.get("/users/me", headers=auth(alice)).json()["following_count"] == 1
+
+    client.post(f"/users/{bob['id']}/unfollow", headers=auth(alice))
+    assert _followers(client, bob) == 0
+    assert client.get("/users/me", headers=auth(alice)).json()["following_count"] == 0
+
+
+def test_profile_update_shows_up_at_once(client, make_user, auth):
+    alice = make_user("alice", bio="old bio")
+    assert client.get("/users/me", headers=auth(alice)).json()["bio"] == "old bio"
+    assert client.get(f"/users/{alice['id']}").json()["bio"] == "old bio"
+
+    res = client.put("/users/me", data={"username": "alice", "bio": "new bio"}, headers=auth(alice))
+    assert res.status_code == 200, res.text
+
+    assert client.get("/users/me", headers=auth(alice)).json()["bio"] == "new bio"
+    assert client.get(f"/users/{alice['id']}").json()["bio"] == "new bio"
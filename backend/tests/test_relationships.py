@@ -0,0 +1,88 @@
+"""POST /users/relationships and the paged follower/following lists."""
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.core.config import settings
+from app.core.timestamps import format_ts
+from app.repositories import memory_repo
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Follows stamped a second apart, so list order doesn't hang on the wall clock."""
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    ticks = iter(range(10_000))
+    monkeypatch.setattr(memory_repo, "now_iso", lambda: format_ts(start + timedelta(seconds=next(ticks))))
+
+
+def _follow(client, auth, follower, user):
+    assert client.post(f"/users/{user['id']}/follow", headers=auth(follower)).status_code == 200
+
+
+def _all_pages(client, path, limit):
+    pages, cursor = [], None
+    while True:
+        body = client.get(path, params={"limit": limit, **({"cursor": cursor} if cursor else {})}).json()
+        pages.append([u["id"] for u in body["results"]])
+        cursor = body["next_cursor"]
+        if not cursor:
+            return pages
+
+
+def test_batch_status_both_ways(client, make_user, auth):
+    alice, bob, carol, dave = (make_user(n) for n in ("alice", "bob", "carol", "dave"))
+    _follow(client, auth, alice, bob)
+    _follow(client, auth, bob, alice)
+    _follow(client, auth, carol, alice)
+
+    res = client.post(
+        "/users/relationships",
+        json={"ids": [bob["id"], carol["id"], dave["id"], "no-such-user", bob["id"]]},
+        headers=auth(alice),
+    )
+
+    assert res.status_code == 200
+    assert res.json()["results"] == {
+        bob["id"]: {"following": True, "followed_by": True},
+        carol["id"]: {"following": False, "followed_by": True},
+        dave["id"]: {"following": False, "followed_by": False},
+    }
+
+
+def test_batch_needs_auth_and_is_capped(client, make_user, auth, monkeypatch):
+    alice = make_user("alice")
+    assert client.post("/users/relationships", json={"ids": []}).status_code == 401
+    monkeypatch.setattr(settings, "RELATIONSHIP_BATCH_MAX", 2)
+    res = client.post("/users/relationships", json={"ids": ["a", "b", "c"]}, headers=auth(alice))
+    assert res.status_code == 400
+
+
+def test_followers_and_following_page_newest_first(client, make_user, auth, clock):
+    star = make_user("star")
+    fans = [make_user(f"fan{i}") for i in range(5)]
+    for fan in fans:
+        _follow(client, auth, fan, star)
+    for fan in fans[:3]:
+        _follow(client, auth, star, fan)
+
+    followers = _all_pages(client, f"/users/{star['id']}/followers", limit=2)
+    assert followers == [[fans[4]["id"], fans[3]["id"]], [fans[2]["id"], fans[1]["id"]], [fans[0]["id"]]]
+    following = _all_pages(client, f"/users/{star['id']}/following", limit=2)
+    assert following == [[fans[2]["id"], fans[1]["id"]], [fans[0]["id"]]]
+
+
+def test_unfollowed_user_drops_out_of_the_list(client, make_user, auth, clock):
+    star = make_user("star")
+    fans = [make_user(f"fan{i}") for i in range(3)]
+    for fan in fans:
+        _follow(client, auth, fan, star)
+    client.post(f"/users/{star['id']}/unfollow", headers=auth(fans[1]))
+
+    assert _all_pages(client, f"/users/{star['id']}/followers", limit=1) == [[fans[2]["id"]], [fans[0]["id"]]]
+
+
+def test_malformed_follow_cursor_is_a_400(client, make_user):
+    star = make_user("star")
+    res = client.get(f"/users/{star['id']}/followers", params={"cursor": "garbage"})
+    assert res.status_code == 400
@@ -0,0 +1,75 @@
+"""GET /users/search (typeahead): match tiers, prefixes, paging, renames."""
+
+
+def _search(client, q, **params):
+    res = client.get("/users/search", params={"q": q, **params})
+    assert res.status_code == 200, res.text
+    return res.json()
+
+
+def _usernames(client, q, **params):
+    return [u["username"] for u in _search(client, q, **params)["results"]]
+
+
+def test_exact_then_prefix_then_term_then_fuzzy(client, make_user):
+    make_user("jo_sam")
+    make_user("samantha")
+    make_user("sam")
+    make_user("xyz", name="Sam Lee")
+    make_user("bob")
+
+    assert _usernames(client, "sam")[:2] == ["sam", "samantha"]
+    assert set(_usernames(client, "sam")[2:]) == {"jo_sam", "xyz"}
+    # One edit away from "samantha": a fuzzy match, after any real one
+    assert _usernames(client, "samanthx") == ["samantha"]
+
+
+def test_mutual_connections_break_ties(client, make_user, auth):
+    me, friend = make_user("me"), make_user("friend")
+    make_user("samx")
+    samy = make_user("samy")
+    client.post(f"/users/{friend['id']}/follow", headers=auth(me))
+    client.post(f"/users/{samy['id']}/follow", headers=auth(friend))
+
+    body = _search(client, "sam", me=me["id"])
+    assert [u["username"] for u in body["results"]] == ["samy", "samx"]
+    assert body["results"][0]["mutual_count"] == 1
+
+
+def test_prefixes_of_every_word_and_accents(client, make_user):
+    make_user("asmith", name="Alice Smith")
+    make_user("jose_r", name="José Ramírez")
+    make_user("alan", name="Alan Jones")
+
+    assert _usernames(client, "ali smi") == ["asmith"]
+    assert _usernames(client, "jose ram") == ["jose_r"]
+    assert _usernames(client, "JOSÉ") == ["jose_r"]
+    assert _usernames(client, "zzz") == []
+
+
+def test_pages_by_cursor(client, make_user):
+    for i in range(5):
+        make_user(f"sam{i}")
+
+    seen, cursor = [], None
+    while True:
+        body = _search(client, "sam", limit=2, **({"cursor": cursor} if cursor else {}))
+        seen += [u["username"] for u in body["results"]]
+        cursor = body["next_cursor"]
+        if not cursor:
+            break
+    assert sorted(seen) == [f"sam{i}" for i in range(5)]
+
+
+def test_rename_updates_the_index(client, make_user, auth):
+    alice = make_user("alice", name="Wendy Smith")
+    assert _usernames(client, "ali") == ["alice"]
+
+    res = client.put("/users/me", data={"username": "zelda"}, headers=auth(alice))
+    assert res.status_code == 200, res.text
+
+    assert _usernames(client, "ali") == []
+    assert _usernames(client, "zel") == ["zelda"]
+    # The display name it kept is still indexed alongside the new username
+    assert _usernames(client, "wendy smi") == ["zelda"]
+    assert _search(client, "zelda")["results"][0]["name"] == "Wendy Smith"
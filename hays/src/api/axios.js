@@ -18,14 +18,54 @@ api.interceptors.request.use((config) => {
 
 export default api;
 
-// Friendly network error interceptor (non-intrusive)
+// One refresh at a time: concurrent 401s wait for the same rotation,
+// since each refresh token can only be used once.
+let refreshing = null;
+
+export function refreshTokens() {
+  const refreshToken = localStorage.getItem("refresh_token");
+  if (!refreshToken) return Promise.reject(new Error("No refresh token"));
+  if (!refreshing) {
+    refreshing = axios
+      .post(`${API_BASE_URL}/auth/refresh`, { refresh_token: refreshToken }, { withCredentials: true })
+      .then(({ data }) => {
+        localStorage.setItem("token", data.access_token);
+        localStorage.setItem("refresh_token", data.refresh_token);
+        return data.access_token;
+      })
+      .catch((err) => {
+        localStorage.removeItem("token");
+        localStorage.removeItem("refresh_token");
+        throw err;
+      })
+      .finally(() => {
+        refreshing = null;
+      });
+  }
+  return refreshing;
+}
+
+// Friendly network error interceptor (non-intrusive); renews expired access tokens
 api.interceptors.response.use(
   (res) => res,
-  (error) => {
+  async (error) => {
     if (!error.response) {
       // Network error (backend down or wrong URL)
       console.warn("Cannot connect to server at", API_BASE_URL);
     }
+    const original = error.config;
+    const isAuthCall = /^\/auth\/(login|refresh|logout)/.test(original?.url || "");
+    if (error.response?.status === 401 && original && !original._retried && !isAuthCall
+        && localStorage.getItem("refresh_token")) {
+      original._retried = true;
+      try {
+        const token = await refreshTokens();
+        original.headers.Authorization = `Bearer ${token}`;
+        return api(original);
+      } catch {
+        // fall through with the original 401
+      }
+    }
     return Promise.reject(error);
   }
 );
\ No newline at end of file
@@ -6,3 +6,4 @@ export const likePost = (id) => api.post(`/posts/${id}/like`);
 export const getPost = (id) => api.get(`/posts/${id}`);
 export const updatePost = (id, data) => api.put(`/posts/${id}`, data);
 export const deletePost = (id) => api.delete(`/posts/${id}`);
+export const searchPosts = (q, cursor) => api.get('/posts/search', { params: { q, cursor } });
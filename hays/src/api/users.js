@@ -6,3 +6,8 @@ export const updateMe = (data) => api.put('/users/me', data);
 export const followUser = (id) => api.post(`/users/${id}/follow`);
 export const unfollowUser = (id) => api.post(`/users/${id}/unfollow`);
 export const searchUsers = (query) => api.get(`/users/search/${encodeURIComponent(query)}`);
+// Paged lists: { results, next_cursor }; pass next_cursor back for the next page
+export const getFollowers = (id, cursor) => api.get(`/users/${id}/followers`, { params: cursor ? { cursor } : {} });
+export const getFollowing = (id, cursor) => api.get(`/users/${id}/following`, { params: cursor ? { cursor } : {} });
+// { results: { [id]: { following, followed_by } } } for up to 100 ids
+export const getRelationships = (ids) => api.post('/users/relationships', { ids });
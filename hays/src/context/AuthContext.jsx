@@ -45,8 +45,9 @@ export function AuthProvider({ children }) {
           }
           if (!cancelled) toast.error('Cannot connect to server.');
         } else if (error.response.status === 401) {
-          // token invalid
+          // token invalid and could not be refreshed
           localStorage.removeItem('token');
+          localStorage.removeItem('refresh_token');
           setToken(null);
           setUser(null);
         }
@@ -89,6 +90,7 @@ export function AuthProvider({ children }) {
       }
 
       localStorage.setItem('token', newToken);
+      if (data.refresh_token) localStorage.setItem('refresh_token', data.refresh_token);
       setToken(newToken); // triggers background user fetch
       toast.success('Logged in successfully');
       return data; // caller will handle navigation
@@ -138,7 +140,13 @@ export function AuthProvider({ children }) {
   };
 
   const logout = () => {
+    const refreshToken = localStorage.getItem('refresh_token');
+    if (refreshToken) {
+      // Revoke the session server-side; local sign-out doesn't wait for it
+      api.post('/auth/logout', { refresh_token: refreshToken }).catch(() => {});
+    }
     localStorage.removeItem('token');
+    localStorage.removeItem('refresh_token');
     localStorage.removeItem('logged_in');
     setToken(null);
     setUser(null);
@@ -7,6 +7,9 @@ import api from '@/api/axios';
 import { getSocket } from '@/services/socket';
 import { useAuth } from '@/context/AuthContext';
 
+// Messages per history page; older ones load on demand
+const MESSAGE_PAGE = 50;
+
 export default function Chat() {
   const { id: paramId } = useParams();
   const navigate = useNavigate();
@@ -16,6 +19,8 @@ export default function Chat() {
   const [loadingConvos, setLoadingConvos] = useState(true);
   const [messages, setMessages] = useState([]);
   const [loadingMsgs, setLoadingMsgs] = useState(false);
+  const [hasOlder, setHasOlder] = useState(false);
+  const [loadingOlder, setLoadingOlder] = useState(false);
   const [input, setInput] = useState('');
   const [activeId, setActiveId] = useState(paramId || null);
   const [query, setQuery] = useState('');
@@ -26,6 +31,7 @@ export default function Chat() {
   const msgSeenRef = useRef(new Set());
   const sentMessageIdsRef = useRef(new Set());
   const readMarkedRef = useRef(new Set());
+  const keepScrollRef = useRef(false);
 
   const msgKey = (m) => String(m?.id || `${m?.timestamp || m?.created_at}-${m?.sender_id || ''}-${(m?.content || '').slice(0,16)}`);
 
@@ -194,11 +200,12 @@ export default function Chat() {
     (async () => {
       try {
         setLoadingMsgs(true);
-        // Expected backend: GET /messages?conversation_id=...
-        const res = await api.get('/messages', { params: { conversation_id: normalizeConvoId(activeId) } });
+        // Expected backend: GET /messages?conversation_id=...&limit=N -> latest N, oldest first
+        const res = await api.get('/messages', { params: { conversation_id: normalizeConvoId(activeId), limit: MESSAGE_PAGE } });
         if (!mounted) return;
         const list = res.data || [];
         setMessages(list);
+        setHasOlder(list.length === MESSAGE_PAGE);
         // Seed de-dup so socket echoes of history don't duplicate
         const next = new Set();
         for (const m of list) next.add(msgKey(m));
@@ -261,11 +268,35 @@ export default function Chat() {
     };
   }, [activeId]);
 
-  // Auto-scroll to bottom when messages change
+  // Auto-scroll to bottom when messages change (but not when older ones are prepended)
   useEffect(() => {
+    if (keepScrollRef.current) {
+      keepScrollRef.current = false;
+      return;
+    }
     bottomRef.current?.scrollIntoView({ behavior: 'smooth' });
   }, [messages]);
 
+  const loadOlder = async () => {
+    const oldest = messages[0];
+    if (!activeId || !oldest?.id || loadingOlder) return;
+    try {
+      setLoadingOlder(true);
+      const res = await api.get('/messages', {
+        params: { conversation_id: normalizeConvoId(activeId), limit: MESSAGE_PAGE, before: oldest.id },
+      });
+      const older = (res.data || []).filter((m) => !msgSeenRef.current.has(msgKey(m)));
+      for (const m of older) msgSeenRef.current.add(msgKey(m));
+      keepScrollRef.current = true;
+      setMessages((prev) => [...older, ...prev]);
+      setHasOlder((res.data || []).length === MESSAGE_PAGE);
+    } catch (e) {
+      console.error('Failed to load older messages', e);
+    } finally {
+      setLoadingOlder(false);
+    }
+  };
+
   const handleSend = async () => {
     const content = input.trim();
     if (!content || !activeId) return;
@@ -429,7 +460,19 @@ export default function Chat() {
                 ) : messages.length === 0 ? (
                   <div className="text-gray-600">No messages yet.</div>
                 ) : (
-                  messages.map((m) => {
+                  <>
+                  {hasOlder && (
+                    <div className="flex justify-center">
+                      <button
+                        onClick={loadOlder}
+                        disabled={loadingOlder}
+                        className="text-xs text-orca-navy/70 hover:text-orca-navy disabled:opacity-50"
+                      >
+                        {loadingOlder ? 'Loading...' : 'Load older messages'}
+                      </button>
+                    </div>
+                  )}
+                  {messages.map((m) => {
                     const mine = String(m.sender_id) === String(user?.id);
                     return (
                       <div key={m.id || `${m.timestamp || m.created_at}-${m.sender_id || ''}`} className={`flex items-end gap-2.5 ${mine ? 'justify-end' : ''}`}>
@@ -463,7 +506,8 @@ export default function Chat() {
                         )}
                       </div>
                     );
-                  })
+                  })}
+                  </>
                 )}
                 <div ref={bottomRef} />
               </div>
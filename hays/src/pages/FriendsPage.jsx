@@ -2,34 +2,42 @@ import { useEffect, useMemo, useState } from 'react';
 import { useNavigate } from 'react-router-dom';
 import { FaUserPlus, FaUserTimes, FaSearch } from 'react-icons/fa';
 import api from '@/api/axios';
+import { getFollowers, getRelationships } from '@/api/users';
 import Sidebar from '@/components/Sidebar';
 
 export default function FollowersPage() {
   const [users, setUsers] = useState([]);
   const [loading, setLoading] = useState(true);
+  const [loadingMore, setLoadingMore] = useState(false);
+  const [myId, setMyId] = useState(null);
+  const [nextCursor, setNextCursor] = useState(null);
   const [followingSet, setFollowingSet] = useState(new Set());
-  const [followersSet, setFollowersSet] = useState(new Set());
   const [query, setQuery] = useState('');
   const navigate = useNavigate();
 
+  // One page of followers, plus whether I follow each of them back (one batched lookup)
+  const fetchPage = async (id, cursor = null) => {
+    const { data } = await getFollowers(id, cursor);
+    const page = (data?.results || []).filter((u) => String(u.id) !== String(id));
+    if (page.length) {
+      const { data: rel } = await getRelationships(page.map((u) => u.id));
+      const statuses = rel?.results || {};
+      setFollowingSet((prev) => {
+        const next = new Set(prev);
+        page.forEach((u) => { if (statuses[u.id]?.following) next.add(u.id); });
+        return next;
+      });
+    }
+    setUsers((prev) => (cursor ? [...prev, ...page] : page));
+    setNextCursor(data?.next_cursor || null);
+  };
+
   const fetchData = async () => {
     setLoading(true);
     try {
-      const [usersRes, meRes] = await Promise.all([
-        api.get('/users'),
-        api.get('/users/me'),
-      ]);
-
-      const all = Array.isArray(usersRes.data) ? usersRes.data : [];
-      const mine = meRes.data;
-
-      const following = new Set(mine.following_ids || []);
-      const followers = new Set(mine.followers_ids || []);
-      setFollowingSet(following);
-      setFollowersSet(followers);
-
-      // Show only followers, exclude self
-      setUsers(all.filter((u) => String(u.id) !== String(mine.id) && followers.has(u.id)));
+      const { data: mine } = await api.get('/users/me');
+      setMyId(mine.id);
+      await fetchPage(mine.id);
     } catch (e) {
       console.error('Failed to load followers', e);
     } finally {
@@ -37,6 +45,18 @@ export default function FollowersPage() {
     }
   };
 
+  const loadMore = async () => {
+    if (!myId || !nextCursor) return;
+    setLoadingMore(true);
+    try {
+      await fetchPage(myId, nextCursor);
+    } catch (e) {
+      console.error('Failed to load more followers', e);
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   useEffect(() => {
     fetchData();
   }, []);
@@ -132,6 +152,17 @@ export default function FollowersPage() {
                 })}
               </div>
             )}
+
+            {!loading && nextCursor && (
+              <button
+                type="button"
+                onClick={loadMore}
+                disabled={loadingMore}
+                className="mt-4 w-full py-2 rounded-full text-sm font-medium border bg-white text-purple-700 border-purple-300 hover:bg-purple-50 disabled:opacity-60"
+              >
+                {loadingMore ? 'Loading...' : 'Load more'}
+              </button>
+            )}
           </div>
         </div>
       </div>
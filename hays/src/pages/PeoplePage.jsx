@@ -12,34 +12,53 @@ export default function PeoplePage() {
   const [query, setQuery] = useState("");
   const [loading, setLoading] = useState(true);
   const [busyIds, setBusyIds] = useState(new Set());
+  const [sort, setSort] = useState("newest");
+  const [nextCursor, setNextCursor] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
 
-  const fetchUsers = async () => {
-    setLoading(true);
+  // Pages come from the server (keyset cursor); append them as the user asks for more
+  const fetchUsers = async (cursor = null) => {
+    if (cursor) setLoadingMore(true);
+    else setLoading(true);
     try {
       const meId = me?.id;
-      const res = await api.get("/users", { params: meId ? { me: meId } : {} });
-      const raw = Array.isArray(res.data) ? res.data : [];
-      // Exclude self and dedupe by id to ensure only user profiles, no duplicates
-      const deduped = [];
-      const seen = new Set();
-      for (const u of raw) {
-        if (!u || !u.id) continue;
-        if (meId && u.id === meId) continue;
-        if (seen.has(u.id)) continue;
-        seen.add(u.id);
-        deduped.push(u);
+      let res;
+      if (sort === "suggested") {
+        // Precomputed "people you may know"; one page, no cursor
+        res = await api.get("/users/me/recommendations", { params: { limit: 50 } });
+      } else {
+        const params = { sort, limit: 24 };
+        if (meId) params.me = meId;
+        if (cursor) params.cursor = cursor;
+        res = await api.get("/users/", { params });
       }
-      setUsers(deduped);
+      const raw = Array.isArray(res.data?.results) ? res.data.results : [];
+      setUsers((prev) => {
+        // Exclude self and dedupe by id to ensure only user profiles, no duplicates
+        const base = cursor ? prev : [];
+        const seen = new Set(base.map((u) => u.id));
+        const merged = [...base];
+        for (const u of raw) {
+          if (!u || !u.id) continue;
+          if (meId && u.id === meId) continue;
+          if (seen.has(u.id)) continue;
+          seen.add(u.id);
+          merged.push(u);
+        }
+        return merged;
+      });
+      setNextCursor(res.data?.next_cursor || null);
     } catch (e) {
       console.error("Failed to fetch users", e);
     } finally {
       setLoading(false);
+      setLoadingMore(false);
     }
   };
 
   useEffect(() => {
     fetchUsers();
-  }, [me?.id]);
+  }, [me?.id, sort]);
 
   const filtered = useMemo(() => {
     const q = query.trim().toLowerCase();
@@ -103,6 +122,19 @@ export default function PeoplePage() {
           />
         </div>
 
+        <div className="flex justify-end mb-4">
+          <select
+            value={sort}
+            onChange={(e) => setSort(e.target.value)}
+            className="bg-white/90 border border-orca-soft/50 rounded-lg px-3 py-1.5 text-sm text-orca-navy"
+            aria-label="Sort users"
+          >
+            {me?.id && <option value="suggested">Suggested for you</option>}
+            <option value="newest">Newest</option>
+            <option value="followers">Most followed</option>
+          </select>
+        </div>
+
         {loading ? (
           <div className="flex items-center justify-center p-8">
             <div className="w-6 h-6 border-2 border-orca-soft border-t-orca-navy rounded-full animate-spin"></div>
@@ -157,7 +189,13 @@ export default function PeoplePage() {
                       )}
                       <div className="text-xs text-orca-navy/60 mt-0.5">
                         <span className="mr-3">{u.followers_count ?? 0} followers</span>
-                        <span>{u.following_count ?? 0} following</span>
+                        {u.mutual_count > 0 ? (
+                          <span>{u.mutual_count} mutual</span>
+                        ) : u.same_program ? (
+                          <span>Same program</span>
+                        ) : (
+                          <span>{u.following_count ?? 0} following</span>
+                        )}
                       </div>
                     </div>
                   </div>
@@ -207,6 +245,18 @@ export default function PeoplePage() {
             })}
           </div>
         )}
+
+        {!loading && nextCursor && (
+          <div className="flex justify-center mt-6">
+            <button
+              onClick={() => fetchUsers(nextCursor)}
+              disabled={loadingMore}
+              className="px-5 py-2 rounded-lg text-sm font-medium bg-white text-orca-navy border border-orca-soft/70 hover:bg-orca-pale/50 disabled:opacity-50"
+            >
+              {loadingMore ? "Loading..." : "Load more"}
+            </button>
+          </div>
+        )}
           </div>
         </div>
       </div>
@@ -1,6 +1,6 @@
 import { useEffect, useMemo, useState } from 'react';
 import { useParams, useNavigate } from 'react-router-dom';
-import { getUser, followUser, unfollowUser, getMe } from '@/api/users';
+import { getUser, followUser, unfollowUser, getFollowers, getFollowing, getRelationships } from '@/api/users';
 import PostCard from '@/components/PostCard';
 import { useToast } from '@/utils/Toast';
 import api from '@/api/axios';
@@ -16,22 +16,24 @@ export default function Profile() {
   const [loading, setLoading] = useState(true);
   const toast = useToast();
   const { user: me } = useAuth();
-  const [meData, setMeData] = useState(null);
+  const [followsMe, setFollowsMe] = useState(false);
   const [showFollowers, setShowFollowers] = useState(false);
   const [showFollowing, setShowFollowing] = useState(false);
   const [followers, setFollowers] = useState([]);
   const [following, setFollowing] = useState([]);
+  const [followersCursor, setFollowersCursor] = useState(null);
+  const [followingCursor, setFollowingCursor] = useState(null);
   const [loadingList, setLoadingList] = useState(false);
 
   const load = async () => {
     setLoading(true);
     try {
-      const [meRes, uRes, pRes] = await Promise.all([
-        getMe(),
+      const [relRes, uRes, pRes] = await Promise.all([
+        me && String(me.id) !== String(id) ? getRelationships([id]) : null,
         getUser(id, me?.id),
         api.get('/posts/', { params: { user_id: id } }),
       ]);
-      setMeData(meRes.data);
+      setFollowsMe(Boolean(relRes?.data?.results?.[id]?.followed_by));
       setUser(uRes.data);
       const data = pRes.data;
       // If viewing own profile, sort pinned to top
@@ -95,25 +97,28 @@ export default function Profile() {
   if (!user) return <div>Not found</div>;
 
   const isSelf = me && String(me.id) === String(id);
-  const followsMe = meData?.followers_ids?.includes?.(user.id);
   const postsCount = posts.length;
   const avatar = user.profile_pic || user.avatar_url || null;
 
-  const loadFollowers = async () => {
-    setLoadingList(true);
+  const loadFollowers = async (cursor = null) => {
+    if (!cursor) setLoadingList(true);
     try {
-      const res = await api.get(`/users/${id}/followers`);
-      setFollowers(res.data || []);
+      const res = await getFollowers(id, cursor);
+      const page = res.data?.results || [];
+      setFollowers((prev) => (cursor ? [...prev, ...page] : page));
+      setFollowersCursor(res.data?.next_cursor || null);
       setShowFollowers(true);
     } finally {
       setLoadingList(false);
     }
   };
-  const loadFollowing = async () => {
-    setLoadingList(true);
+  const loadFollowing = async (cursor = null) => {
+    if (!cursor) setLoadingList(true);
     try {
-      const res = await api.get(`/users/${id}/following`);
-      setFollowing(res.data || []);
+      const res = await getFollowing(id, cursor);
+      const page = res.data?.results || [];
+      setFollowing((prev) => (cursor ? [...prev, ...page] : page));
+      setFollowingCursor(res.data?.next_cursor || null);
       setShowFollowing(true);
     } finally {
       setLoadingList(false);
@@ -158,10 +163,10 @@ export default function Profile() {
                   <div className="text-xl font-semibold text-gray-900">{user.username}</div>
                   {user.bio && <div className="text-gray-700 truncate">{user.bio}</div>}
                   <div className="text-sm text-gray-600 mt-1 flex gap-4">
-                    <button type="button" onClick={loadFollowers} className="hover:text-purple-700 underline-offset-2 hover:underline">
+                    <button type="button" onClick={() => loadFollowers()} className="hover:text-purple-700 underline-offset-2 hover:underline">
                       {user.followers_count || 0} followers
                     </button>
-                    <button type="button" onClick={loadFollowing} className="hover:text-purple-700 underline-offset-2 hover:underline">
+                    <button type="button" onClick={() => loadFollowing()} className="hover:text-purple-700 underline-offset-2 hover:underline">
                       {user.following_count || 0} following
                     </button>
                     <span>{postsCount} posts</span>
@@ -216,6 +221,11 @@ export default function Profile() {
                 ))}
               </div>
             )}
+            {followersCursor && !loadingList && (
+              <button type="button" onClick={() => loadFollowers(followersCursor)} className="w-full py-2 text-sm font-medium text-purple-700 hover:text-purple-900">
+                Load more
+              </button>
+            )}
           </div>
         </div>
       )}
@@ -245,6 +255,11 @@ export default function Profile() {
                 ))}
               </div>
             )}
+            {followingCursor && !loadingList && (
+              <button type="button" onClick={() => loadFollowing(followingCursor)} className="w-full py-2 text-sm font-medium text-purple-700 hover:text-purple-900">
+                Load more
+              </button>
+            )}
           </div>
         </div>
       )}
@@ -1,5 +1,6 @@
 import { useEffect, useRef, useState } from 'react'; 
 import api from '@/api/axios';
+import { getFollowers, getFollowing } from '@/api/users';
 import { useAuth } from '@/context/AuthContext';
 import CreatePost from '@/components/CreatePost';
 import PostCard from '@/components/PostCard';
@@ -22,6 +23,8 @@ export default function ProfilePage() {
   const [showFollowing, setShowFollowing] = useState(false);
   const [followers, setFollowers] = useState([]);
   const [following, setFollowing] = useState([]);
+  const [followersCursor, setFollowersCursor] = useState(null);
+  const [followingCursor, setFollowingCursor] = useState(null);
   const [loadingList, setLoadingList] = useState(false);
   const editFormRef = useRef(null);
   const [showEdit, setShowEdit] = useState(false);
@@ -111,25 +114,29 @@ export default function ProfilePage() {
     }
   };
 
-  // Followers/Following lists
-  const loadFollowers = async () => {
+  // Followers/Following lists, one page at a time
+  const loadFollowers = async (cursor = null) => {
     if (!profile) return;
-    setLoadingList(true);
+    if (!cursor) setLoadingList(true);
     try {
-      const res = await api.get(`/users/${profile.id}/followers`);
-      setFollowers(res.data || []);
+      const res = await getFollowers(profile.id, cursor);
+      const page = res.data?.results || [];
+      setFollowers((prev) => (cursor ? [...prev, ...page] : page));
+      setFollowersCursor(res.data?.next_cursor || null);
       setShowFollowers(true);
     } finally {
       setLoadingList(false);
     }
   };
 
-  const loadFollowing = async () => {
+  const loadFollowing = async (cursor = null) => {
     if (!profile) return;
-    setLoadingList(true);
+    if (!cursor) setLoadingList(true);
     try {
-      const res = await api.get(`/users/${profile.id}/following`);
-      setFollowing(res.data || []);
+      const res = await getFollowing(profile.id, cursor);
+      const page = res.data?.results || [];
+      setFollowing((prev) => (cursor ? [...prev, ...page] : page));
+      setFollowingCursor(res.data?.next_cursor || null);
       setShowFollowing(true);
     } finally {
       setLoadingList(false);
@@ -160,8 +167,8 @@ export default function ProfilePage() {
   }
 
   const letter = (profile.name?.[0] || profile.username?.[0] || 'U').toUpperCase();
-  const followersCount = Array.isArray(profile.followers_ids) ? profile.followers_ids.length : (profile.followers_count || 0);
-  const followingCount = Array.isArray(profile.following_ids) ? profile.following_ids.length : (profile.following_count || 0);
+  const followersCount = profile.followers_count || 0;
+  const followingCount = profile.following_count || 0;
   const postsCount = posts.length;
 
   return (
@@ -188,10 +195,10 @@ export default function ProfilePage() {
               <div className="text-xl font-semibold text-orca-navy">{profile.username}</div>
               {profile.bio && <div className="text-orca-navy/80 truncate">{profile.bio}</div>}
               <div className="text-sm text-orca-navy/70 mt-1 flex gap-4">
-                <button type="button" onClick={loadFollowers} className="hover:text-orca-ocean hover:underline underline-offset-2 transition-colors">
+                <button type="button" onClick={() => loadFollowers()} className="hover:text-orca-ocean hover:underline underline-offset-2 transition-colors">
                   {followersCount} followers
                 </button>
-                <button type="button" onClick={loadFollowing} className="hover:text-orca-ocean hover:underline underline-offset-2 transition-colors">
+                <button type="button" onClick={() => loadFollowing()} className="hover:text-orca-ocean hover:underline underline-offset-2 transition-colors">
                   {followingCount} following
                 </button>
                 <span className="text-orca-navy/60">{postsCount} posts</span>
@@ -330,6 +337,11 @@ export default function ProfilePage() {
                 ))}
               </div>
             )}
+            {followersCursor && !loadingList && (
+              <button type="button" onClick={() => loadFollowers(followersCursor)} className="w-full py-2 text-sm font-medium text-orca-navy hover:text-orca-ocean">
+                Load more
+              </button>
+            )}
           </div>
         </div>
       )}
@@ -372,6 +384,11 @@ export default function ProfilePage() {
                 ))}
               </div>
             )}
+            {followingCursor && !loadingList && (
+              <button type="button" onClick={() => loadFollowing(followingCursor)} className="w-full py-2 text-sm font-medium text-orca-navy hover:text-orca-ocean">
+                Load more
+              </button>
+            )}
           </div>
         </div>
       )}
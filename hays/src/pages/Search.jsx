@@ -1,21 +1,42 @@
 import { useState } from 'react';
+import { Link } from 'react-router-dom';
 import UserCard from '@/components/UserCard';
 import { useToast } from '@/utils/Toast';
 import { searchUsers } from '@/api/users';
+import { searchPosts } from '@/api/posts';
 
 export default function Search() {
   const [q, setQ] = useState('');
+  const [mode, setMode] = useState('users');
   const [results, setResults] = useState([]);
+  const [posts, setPosts] = useState([]);
+  const [postsQuery, setPostsQuery] = useState('');
+  const [nextCursor, setNextCursor] = useState(null);
   const [loading, setLoading] = useState(false);
+  const [loadingMore, setLoadingMore] = useState(false);
   const toast = useToast();
 
+  // Post search pages by cursor: { results, next_cursor }
+  const loadPosts = async (query, cursor = null) => {
+    const { data } = await searchPosts(query, cursor || undefined);
+    const page = data?.results || [];
+    setPosts((prev) => (cursor ? [...prev, ...page] : page));
+    setNextCursor(data?.next_cursor || null);
+  };
+
   const onSearch = async (e) => {
     e.preventDefault();
-    if (!q.trim()) return;
+    const query = q.trim();
+    if (!query) return;
     setLoading(true);
     try {
-      const { data } = await searchUsers(q);
-      setResults(data);
+      if (mode === 'posts') {
+        setPostsQuery(query);
+        await loadPosts(query);
+      } else {
+        const { data } = await searchUsers(query);
+        setResults(data);
+      }
     } catch (e) {
       toast.error('Search failed');
     } finally {
@@ -23,6 +44,22 @@ export default function Search() {
     }
   };
 
+  const onLoadMore = async () => {
+    setLoadingMore(true);
+    try {
+      await loadPosts(postsQuery, nextCursor);
+    } catch (e) {
+      toast.error('Search failed');
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
+  const tabClass = (value) =>
+    `px-4 py-1.5 rounded-full text-sm font-medium transition-colors duration-200 ${
+      mode === value ? 'bg-orca-navy text-white' : 'bg-white/90 text-orca-navy hover:bg-orca-soft/60'
+    }`;
+
   return (
     <div
       className="min-h-screen p-6 flex flex-col items-center bg-gradient-to-br from-orca-pale to-orca-soft/50 relative overflow-hidden"
@@ -40,11 +77,15 @@ export default function Search() {
         <div className="animate-cloud animation-delay-10 absolute w-80 h-40 bg-orca-soft/20 rounded-full opacity-30 top-52 left-[-50px]"></div>
       </div>
 
-      <h1 className="text-4xl font-bold mb-6 text-orca-navy z-10">Search Users</h1>
+      <h1 className="text-4xl font-bold mb-6 text-orca-navy z-10">{mode === 'posts' ? 'Search Posts' : 'Search Users'}</h1>
+      <div className="flex gap-2 mb-4 z-10">
+        <button type="button" className={tabClass('users')} onClick={() => setMode('users')}>People</button>
+        <button type="button" className={tabClass('posts')} onClick={() => setMode('posts')}>Posts</button>
+      </div>
       <form onSubmit={onSearch} className="flex gap-2 mb-6 w-full max-w-xl z-10">
         <input
           className="flex-1 border border-orca-soft rounded-lg px-4 py-2 text-orca-navy focus:outline-none focus:ring-2 focus:ring-orca-ocean/50 bg-white/90 backdrop-blur-sm shadow-sm"
-          placeholder="Search users..."
+          placeholder={mode === 'posts' ? 'Search posts and comments...' : 'Search users...'}
           value={q}
           onChange={(e) => setQ(e.target.value)}
         />
@@ -58,6 +99,44 @@ export default function Search() {
           <div className="w-5 h-5 border-2 border-orca-soft border-t-orca-navy rounded-full animate-spin"></div>
           Searching...
         </div>
+      ) : mode === 'posts' ? (
+        <div className="grid gap-3 w-full max-w-xl z-10">
+          {posts.map((p) => (
+            <Link
+              key={p.id}
+              to={`/posts/${p.id}`}
+              className="block bg-white border rounded p-3 hover:shadow transition"
+            >
+              <div className="text-sm text-gray-500 mb-1">@{p.user?.username}</div>
+              {/* Snippets are HTML-escaped by the API; only <mark> is markup */}
+              {p.highlights?.content ? (
+                <div
+                  className="text-gray-800 break-words"
+                  dangerouslySetInnerHTML={{ __html: p.highlights.content }}
+                />
+              ) : (
+                <div className="text-gray-800 break-words line-clamp-3">{p.content}</div>
+              )}
+              {(p.highlights?.comments || []).map((c) => (
+                <div
+                  key={c.id}
+                  className="mt-2 pl-3 border-l-2 border-orca-soft text-sm text-gray-600 break-words"
+                  dangerouslySetInnerHTML={{ __html: c.snippet }}
+                />
+              ))}
+            </Link>
+          ))}
+          {nextCursor && (
+            <button
+              type="button"
+              onClick={onLoadMore}
+              disabled={loadingMore}
+              className="w-full py-2 text-sm font-medium text-orca-navy hover:text-orca-ocean disabled:opacity-50"
+            >
+              {loadingMore ? 'Loading...' : 'Load more'}
+            </button>
+          )}
+        </div>
       ) : (
         <div className="grid gap-3 w-full max-w-xl z-10">
           {results.map((u) => (